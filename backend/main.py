@@ -5,12 +5,22 @@ import uvicorn
 def main():
     parser = argparse.ArgumentParser(description="Start the Hockey BI FastAPI backend")
     parser.add_argument("--prod", action="store_true", help="Run in production mode")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of API processes in production mode, "
+        "the tasks are run by `python -m hmtracker.worker`",
+    )
     args = parser.parse_args()
 
     if args.prod:
         # Production mode
         uvicorn.run(
-            "src.hmtracker.api.server:app", host="0.0.0.0", port=8000, workers=1
+            "src.hmtracker.api.server:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=args.workers,
         )
     else:
         # Development mode with auto-reload
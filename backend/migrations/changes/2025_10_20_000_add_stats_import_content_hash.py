@@ -0,0 +1,40 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from hmtracker.database.base import Migration
+
+
+class AddStatsImportContentHashMigration(Migration):
+    """Add content_hash column to STATS_IMPORT table."""
+
+    @property
+    def version(self) -> str:
+        return "2025_10_20_000"
+
+    @property
+    def description(self) -> str:
+        return "Add content_hash column to STATS_IMPORT table"
+
+    def up(self, session: Session) -> None:
+        session.execute(
+            text("""
+            ALTER TABLE STATS_IMPORT
+            ADD COLUMN content_hash VARCHAR(64) NULL
+        """)
+        )
+        session.execute(
+            text("""
+            CREATE INDEX ix_STATS_IMPORT_content_hash
+            ON STATS_IMPORT (content_hash)
+        """)
+        )
+
+    def down(self, session: Session) -> None:
+        """Remove the content_hash column."""
+        session.execute(text("DROP INDEX ix_STATS_IMPORT_content_hash"))
+        session.execute(
+            text("""
+            ALTER TABLE STATS_IMPORT
+            DROP COLUMN content_hash
+        """)
+        )
@@ -0,0 +1,48 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from hmtracker.database.base import Migration
+
+# Name, table and columns of the indexes, same as the __table_args__ of the models
+INDEXES = [
+    (
+        "ix_HOCKEY_PLAYER_STATS_season_id_validity_date",
+        "HOCKEY_PLAYER_STATS",
+        "season_id, validity_date",
+    ),
+    (
+        "ix_HOCKEY_PLAYER_STATS_player_id_validity_date",
+        "HOCKEY_PLAYER_STATS",
+        "player_id, validity_date",
+    ),
+    ("ix_TEAM_manager_id_season_id_team", "TEAM", "manager_id, season_id, team"),
+    ("ix_MATCHES_match_datetime", "MATCHES", "match_datetime"),
+    (
+        "ix_MANAGER_autolineup_last_autolineup",
+        "MANAGER",
+        "autolineup, last_autolineup",
+    ),
+]
+
+
+class AddQueryIndexesMigration(Migration):
+    """Add indexes for the queries on player stats, teams, matches and managers."""
+
+    @property
+    def version(self) -> str:
+        return "2025_10_21_000"
+
+    @property
+    def description(self) -> str:
+        return "Add indexes on HOCKEY_PLAYER_STATS, TEAM, MATCHES and MANAGER"
+
+    def up(self, session: Session) -> None:
+        for name, table, columns in INDEXES:
+            session.execute(
+                text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+            )
+
+    def down(self, session: Session) -> None:
+        """Remove the indexes."""
+        for name, _, _ in INDEXES:
+            session.execute(text(f"DROP INDEX IF EXISTS {name}"))
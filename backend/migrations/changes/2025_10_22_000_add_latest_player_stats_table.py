@@ -0,0 +1,64 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from hmtracker.database.base import Migration
+
+
+class AddLatestPlayerStatsTableMigration(Migration):
+    """Add HOCKEY_PLAYER_STATS_LATEST table, filled from HOCKEY_PLAYER_STATS."""
+
+    @property
+    def version(self) -> str:
+        return "2025_10_22_000"
+
+    @property
+    def description(self) -> str:
+        return "Add HOCKEY_PLAYER_STATS_LATEST table"
+
+    def up(self, session: Session) -> None:
+        session.execute(
+            text("""
+            CREATE TABLE HOCKEY_PLAYER_STATS_LATEST (
+                season_id INTEGER NOT NULL REFERENCES SEASONS (id),
+                player_id INTEGER NOT NULL REFERENCES HOCKEY_PLAYERS (id),
+                validity_date DATETIME NOT NULL,
+                import_id INTEGER NULL REFERENCES STATS_IMPORT (id),
+                price FLOAT NOT NULL,
+                club VARCHAR NOT NULL,
+                ownership FLOAT NULL,
+                hm_points INTEGER NULL,
+                appearances INTEGER NULL,
+                goal INTEGER NULL,
+                assists INTEGER NULL,
+                penalties INTEGER NULL,
+                plus_minus INTEGER NULL,
+                PRIMARY KEY (season_id, player_id)
+            )
+        """)
+        )
+        session.execute(
+            text("""
+            INSERT INTO HOCKEY_PLAYER_STATS_LATEST (
+                season_id, player_id, validity_date, import_id, price, club,
+                ownership, hm_points, appearances, goal, assists, penalties, plus_minus
+            )
+            SELECT
+                stats.season_id, stats.player_id, stats.validity_date, stats.import_id,
+                stats.price, stats.club, stats.ownership, stats.hm_points,
+                stats.appearances, stats.goal, stats.assists, stats.penalties,
+                stats.plus_minus
+            FROM HOCKEY_PLAYER_STATS stats
+            JOIN (
+                SELECT season_id, player_id, MAX(validity_date) AS max_date
+                FROM HOCKEY_PLAYER_STATS
+                GROUP BY season_id, player_id
+            ) latest
+            ON stats.season_id = latest.season_id
+            AND stats.player_id = latest.player_id
+            AND stats.validity_date = latest.max_date
+        """)
+        )
+
+    def down(self, session: Session) -> None:
+        """Remove the HOCKEY_PLAYER_STATS_LATEST table."""
+        session.execute(text("DROP TABLE HOCKEY_PLAYER_STATS_LATEST"))
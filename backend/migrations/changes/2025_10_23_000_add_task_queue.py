@@ -0,0 +1,107 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from hmtracker.database.base import Migration
+
+
+class AddTaskQueueMigration(Migration):
+    """
+    Turn the TASK table into a job queue: status, parameters and lease of the tasks.
+    Unique partial indexes keep a single unfinished task by name and a single
+    running task.
+    end_at becomes nullable for the unfinished tasks, the table is rebuilt as SQLite
+    can't drop a NOT NULL constraint.
+    """
+
+    @property
+    def version(self) -> str:
+        return "2025_10_23_000"
+
+    @property
+    def description(self) -> str:
+        return "Add status, parameters and lease columns to TASK table"
+
+    def up(self, session: Session) -> None:
+        session.execute(
+            text("""
+            CREATE TABLE TASK_QUEUE (
+                id INTEGER PRIMARY KEY,
+                name VARCHAR NOT NULL DEFAULT 'Unknown',
+                status VARCHAR NOT NULL DEFAULT 'queued',
+                parameters VARCHAR NULL,
+                created_at DATETIME NULL,
+                start_at DATETIME NOT NULL,
+                end_at DATETIME NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner VARCHAR NULL,
+                lease_expires_at DATETIME NULL,
+                heartbeat_at DATETIME NULL,
+                error VARCHAR NULL,
+                stacktrace VARCHAR NULL
+            )
+        """)
+        )
+        session.execute(
+            text("""
+            INSERT INTO TASK_QUEUE (
+                id, name, status, created_at, start_at, end_at, attempts, error, stacktrace
+            )
+            SELECT
+                id,
+                name,
+                CASE WHEN error IS NULL THEN 'succeeded' ELSE 'failed' END,
+                start_at,
+                start_at,
+                end_at,
+                1,
+                error,
+                stacktrace
+            FROM TASK
+        """)
+        )
+        session.execute(text("DROP TABLE TASK"))
+        session.execute(text("ALTER TABLE TASK_QUEUE RENAME TO TASK"))
+        session.execute(
+            text("""
+            CREATE INDEX ix_TASK_status_created_at
+            ON TASK (status, created_at)
+        """)
+        )
+        # A job is queued once, and the workers run one task at a time
+        session.execute(
+            text("""
+            CREATE UNIQUE INDEX ux_TASK_unfinished_name
+            ON TASK (name) WHERE status IN ('queued', 'running')
+        """)
+        )
+        session.execute(
+            text("""
+            CREATE UNIQUE INDEX ux_TASK_running
+            ON TASK (status) WHERE status = 'running'
+        """)
+        )
+
+    def down(self, session: Session) -> None:
+        """Restore the Task table, without the unfinished tasks."""
+        session.execute(
+            text("""
+            CREATE TABLE TASK_HISTORY (
+                id INTEGER PRIMARY KEY,
+                name VARCHAR NOT NULL DEFAULT 'Unknown',
+                start_at DATETIME NOT NULL,
+                end_at DATETIME NOT NULL,
+                error VARCHAR NULL,
+                stacktrace VARCHAR NULL
+            )
+        """)
+        )
+        session.execute(
+            text("""
+            INSERT INTO TASK_HISTORY (id, name, start_at, end_at, error, stacktrace)
+            SELECT id, name, start_at, end_at, error, stacktrace
+            FROM TASK
+            WHERE end_at IS NOT NULL
+        """)
+        )
+        session.execute(text("DROP TABLE TASK"))
+        session.execute(text("ALTER TABLE TASK_HISTORY RENAME TO TASK"))
@@ -0,0 +1,33 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from hmtracker.database.base import Migration
+
+
+class AddTaskProgressMigration(Migration):
+    """Add progress column to TASK table."""
+
+    @property
+    def version(self) -> str:
+        return "2025_10_24_000"
+
+    @property
+    def description(self) -> str:
+        return "Add progress column to TASK table"
+
+    def up(self, session: Session) -> None:
+        session.execute(
+            text("""
+            ALTER TABLE TASK
+            ADD COLUMN progress VARCHAR NULL
+        """)
+        )
+
+    def down(self, session: Session) -> None:
+        """Remove the progress column."""
+        session.execute(
+            text("""
+            ALTER TABLE TASK
+            DROP COLUMN progress
+        """)
+        )
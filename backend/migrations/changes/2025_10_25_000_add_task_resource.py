@@ -0,0 +1,78 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from hmtracker.database.base import Migration
+
+
+class AddTaskResourceMigration(Migration):
+    """
+    Run one task at a time by resource instead of one task at a time overall,
+    and add the WORKER table of the worker heartbeats.
+    """
+
+    @property
+    def version(self) -> str:
+        return "2025_10_25_000"
+
+    @property
+    def description(self) -> str:
+        return "Add resource column to TASK table and WORKER table"
+
+    def up(self, session: Session) -> None:
+        session.execute(
+            text("""
+            ALTER TABLE TASK
+            ADD COLUMN resource VARCHAR NULL
+        """)
+        )
+        # The loads of the stats share a resource, the other jobs have their own
+        session.execute(
+            text("""
+            UPDATE TASK
+            SET resource = CASE
+                WHEN name IN ('Load HM stats', 'Load changed HM stats')
+                THEN 'Player stats'
+                ELSE name
+            END
+        """)
+        )
+        session.execute(text("DROP INDEX ux_TASK_running"))
+        session.execute(
+            text("""
+            CREATE UNIQUE INDEX ux_TASK_running_resource
+            ON TASK (resource) WHERE status = 'running'
+        """)
+        )
+        session.execute(
+            text("""
+            CREATE TABLE WORKER (
+                id VARCHAR PRIMARY KEY,
+                heartbeat_at DATETIME NOT NULL
+            )
+        """)
+        )
+
+    def down(self, session: Session) -> None:
+        """Restore the single running task, the other running tasks are queued again."""
+        session.execute(text("DROP TABLE WORKER"))
+        session.execute(text("DROP INDEX ux_TASK_running_resource"))
+        session.execute(
+            text("""
+            UPDATE TASK
+            SET status = 'queued', lease_owner = NULL, lease_expires_at = NULL
+            WHERE status = 'running'
+            AND id <> (SELECT MIN(id) FROM TASK WHERE status = 'running')
+        """)
+        )
+        session.execute(
+            text("""
+            CREATE UNIQUE INDEX ux_TASK_running
+            ON TASK (status) WHERE status = 'running'
+        """)
+        )
+        session.execute(
+            text("""
+            ALTER TABLE TASK
+            DROP COLUMN resource
+        """)
+        )
@@ -0,0 +1,33 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from hmtracker.database.base import Migration
+
+
+class AddTaskProgressSequenceMigration(Migration):
+    """Add progress_sequence column to TASK table."""
+
+    @property
+    def version(self) -> str:
+        return "2025_10_26_000"
+
+    @property
+    def description(self) -> str:
+        return "Add progress_sequence column to TASK table"
+
+    def up(self, session: Session) -> None:
+        session.execute(
+            text("""
+            ALTER TABLE TASK
+            ADD COLUMN progress_sequence INTEGER NOT NULL DEFAULT 0
+        """)
+        )
+
+    def down(self, session: Session) -> None:
+        """Remove the progress_sequence column."""
+        session.execute(
+            text("""
+            ALTER TABLE TASK
+            DROP COLUMN progress_sequence
+        """)
+        )
@@ -3,19 +3,22 @@ import importlib.util
 import inspect
 from datetime import datetime
 from typing import List
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import text
+from sqlalchemy.orm import Session
 from sqlalchemy.exc import ProgrammingError
 
 from hmtracker.database.base import Migration
+from hmtracker.database.database import get_engine, init_session_maker
+from hmtracker.database.seasons import invalidate_season_index
 
 
 class MigrationRunner:
     """Handles running database migrations."""
 
     def __init__(self, database_url: str):
-        self.engine = create_engine(database_url)
-        self.SessionLocal = sessionmaker(bind=self.engine)
+        self.database_url = database_url
+        self.engine = get_engine(database_url)
+        self.SessionLocal = init_session_maker(database_url)
         self._ensure_migration_table()
 
     def _ensure_migration_table(self) -> None:
@@ -117,6 +120,8 @@ class MigrationRunner:
                     session.rollback()
                     print(f"✗ Failed to apply {migration}: {e}")
                     break
+        # Migrations can change the seasons
+        invalidate_season_index(self.database_url)
 
     def rollback(self, target_version: str | None = None) -> None:
         """Rollback migrations to a specific version or the previous one."""
@@ -154,6 +159,7 @@ class MigrationRunner:
                     session.rollback()
                     print(f"✗ Failed to rollback {migration}: {e}")
                     break
+        invalidate_season_index(self.database_url)
 
     def status(self) -> None:
         """Show migration status."""
@@ -75,7 +75,10 @@ class Team(BaseModel):
 class Task(BaseModel):
     id: int
     name: str
+    status: str
     start_at: datetime
-    end_at: datetime
+    end_at: Optional[datetime] = None
+    attempts: int = 0
+    heartbeat_at: Optional[datetime] = None
     error: Optional[str] = None
     stacktrace: Optional[str] = None
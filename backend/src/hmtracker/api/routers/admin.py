@@ -1,10 +1,15 @@
+import asyncio
+import json
 from typing import Annotated
-from fastapi import APIRouter, Depends, Query, Request, UploadFile, File
+from fastapi import APIRouter, Depends, Header, Query, Request, UploadFile, File
 from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
 from hmtracker.services import admin
 from hmtracker.api.admin_login import admin_login_scheme, decode_token
 from hmtracker.database import repository as repo
+from hmtracker.database.database import pool_stats
 from hmtracker.api import models as api_models
+from hmtracker.common.progress import progress_events
 from hmtracker.common.constants import HM_DATABASE_URL_ENV_NAME
 from hmtracker.loader.matches.mapper import parse_match_csv
 from hmtracker.loader.matches.importer import import_matches
@@ -18,25 +23,41 @@ router = APIRouter(
 _HM_DATABASE_URL = getenv(HM_DATABASE_URL_ENV_NAME)
 if _HM_DATABASE_URL is None:
     raise SystemError(f"{HM_DATABASE_URL_ENV_NAME} is not defined")
-repo_session_maker = repo.create_repository_session_maker(_HM_DATABASE_URL)
+repo_session_maker = repo.create_async_repository_session_maker(_HM_DATABASE_URL)
 
 
-def get_session():
-    with repo_session_maker() as session:
+async def get_session():
+    async with repo_session_maker() as session:
         yield session
 
 
-SessionDep = Annotated[repo.RepositorySession, Depends(get_session)]
+SessionDep = Annotated[repo.AsyncRepositorySession, Depends(get_session)]
+
+
+def _start(operation, *args):
+    try:
+        operation(*args)
+    except admin.ServerBusyException as e:
+        raise HTTPException(status.HTTP_409_CONFLICT, detail=str(e))
 
 
 @router.post("/load/start")
-def start_loading() -> None:
-    admin.start_loading()
+def start_loading(force: bool = False) -> None:
+    """
+    Queue the loading of the HM stats, run by a worker
+    :param force: import the stats even if identical stats were already imported
+    """
+    _start(admin.start_loading, force)
+
+
+@router.post("/load/incremental/start")
+def start_incremental_loading(force: bool = False) -> None:
+    _start(admin.start_incremental_loading, force)
 
 
 @router.post("/autoteam/start")
 def start_team_alignement() -> None:
-    admin.start_team_alignement()
+    _start(admin.start_team_alignement)
 
 
 class AdminUser(BaseModel):
@@ -59,6 +80,58 @@ def get_operation() -> str:
     )
 
 
+_PROGRESS_WAIT_S = 1.0
+_PROGRESS_KEEPALIVE_S = 15.0
+
+
+@router.get("/progress")
+def get_progress(since: int = Query(0, ge=0)) -> list[dict]:
+    """
+    Get the progress events of the operations kept in memory, oldest first
+    :param since: only the events after this sequence
+    """
+    admin.tasks_progress_relay.refresh()
+    return [event.to_dict() for event in progress_events.since(since)]
+
+
+@router.get("/progress/stream")
+async def stream_progress(
+    request: Request,
+    last_event_id: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    """
+    Stream the progress of the recent tasks as server-sent events, the sequence of an
+    event is the progress sequence of its task.
+    The id of an event holds the progress received by the client, so a reconnecting
+    client only receives the newer progress with its Last-Event-ID header, whichever
+    process of the API it reaches. A new client first receives the current progress.
+    """
+
+    async def events():
+        positions = admin.parse_progress_event_id(last_event_id)
+        idle_s = 0.0
+        while not await request.is_disconnected():
+            new_events = await asyncio.to_thread(
+                admin.tasks_progress_relay.wait, positions, _PROGRESS_WAIT_S
+            )
+            for event in new_events:
+                positions[event.task_id] = event.sequence
+                yield (
+                    f"id: {admin.progress_event_id(positions)}\nevent: progress\n"
+                    f"data: {json.dumps(event.to_dict())}\n\n"
+                )
+            idle_s = 0.0 if new_events else idle_s + _PROGRESS_WAIT_S
+            if idle_s >= _PROGRESS_KEEPALIVE_S:
+                idle_s = 0.0
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/tasks")
 async def get_tasks(
     session: SessionDep,
@@ -68,10 +141,19 @@ async def get_tasks(
     """
     Get tasks with pagination, ordered by most recent first
     """
-    tasks = session.get_tasks(limit=limit, offset=offset)
+    tasks = await session.get_tasks(limit=limit, offset=offset)
     return [api_models.Task.model_validate(task.__dict__) for task in tasks]
 
 
+@router.get("/database/pool")
+def get_database_pool() -> dict[str, dict[str, int | float]]:
+    """
+    Get the state of the database connection pools and how long the requests
+    waited for a connection, by database
+    """
+    return pool_stats()
+
+
 class MatchImportResponse(BaseModel):
     new_matches: int
     updated_matches: int
@@ -123,10 +205,10 @@ async def upload_matches_csv(
             )
 
         # Import matches to database
-        new_count, updated_count = import_matches(session, matches)
+        new_count, updated_count = await session.run_sync(import_matches, matches)
 
         # Commit the transaction
-        session.session.commit()
+        await session.commit()
 
         return MatchImportResponse(
             new_matches=new_count,
@@ -135,7 +217,7 @@ async def upload_matches_csv(
         )
 
     except Exception as e:
-        session.session.rollback()
+        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to import matches: {str(e)}",
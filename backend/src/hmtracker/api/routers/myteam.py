@@ -3,12 +3,19 @@ from typing import Annotated, List
 
 from fastapi import APIRouter, Depends, HTTPException
 from os import getenv
-from hmtracker.common.constants import HM_DATABASE_URL_ENV_NAME
+from hmtracker.common.constants import (
+    HM_DATABASE_URL_ENV_NAME,
+    HM_DB_TIMEOUT_ENV_NAME,
+)
 from hmtracker.database import repository as repo
 from hmtracker.api import models as api_models
 from hmtracker.loader.main import import_teamplayers_from_loader
-from hmtracker.loader.teamplayers.source.website import team_players_ajax_loader
-from hmtracker.services.check_user import connect_to_hm
+from hmtracker.loader.teamplayers.source.website import team_players_async_loader
+from hmtracker.services.check_user import (
+    connect_to_hm_async,
+    hm_sessions,
+    remember_verified_credentials,
+)
 from hmtracker.services.encryption import encrypt
 from hmtracker.services.team_value import (
     TeamModification,
@@ -22,15 +29,15 @@ router = APIRouter(prefix="/myteam", tags=["myteam"])
 _HM_DATABASE_URL = getenv(HM_DATABASE_URL_ENV_NAME)
 if _HM_DATABASE_URL is None:
     raise SystemError(f"{HM_DATABASE_URL_ENV_NAME} is not defined")
-repo_session_maker = repo.create_repository_session_maker(_HM_DATABASE_URL)
+repo_session_maker = repo.create_async_repository_session_maker(_HM_DATABASE_URL)
 
 
-def get_session():
-    with repo_session_maker() as session:
+async def get_session():
+    async with repo_session_maker() as session:
         yield session
 
 
-SessionDep = Annotated[repo.RepositorySession, Depends(get_session)]
+SessionDep = Annotated[repo.AsyncRepositorySession, Depends(get_session)]
 
 
 class AuthRequest(BaseModel):
@@ -48,30 +55,45 @@ class DashBoardData(BaseModel):
 
 
 _CACHE_S = 600
+DEFAULT_DB_TIMEOUT_S = 60.0
+# The HM part of the requests is bounded by hm_sessions
+_DB_TIMEOUT_S = float(getenv(HM_DB_TIMEOUT_ENV_NAME, DEFAULT_DB_TIMEOUT_S))
 
 
 @router.post("/load")
 async def load(request: LoadRequest, session: SessionDep) -> DashBoardData:
-    manager = session.get_manager_by_email(request.hm_user)
+    manager = await session.get_manager_by_email(request.hm_user)
     if (
         manager is None
         or manager.last_import is None
         or (datetime.now() - manager.last_import).total_seconds() > _CACHE_S
         or request.force_team_reload
     ):
-        loader = team_players_ajax_loader(
+        loader = team_players_async_loader(
             request.hm_user, request.hm_password.get_secret_value()
         )
-        import_teamplayers_from_loader(loader, request.hm_user, session)
+        async with hm_sessions.session():
+            team_players = await loader()
+        await remember_verified_credentials(
+            request.hm_user, request.hm_password.get_secret_value()
+        )
+        await session.run_sync(
+            lambda repository_session: import_teamplayers_from_loader(
+                lambda: team_players, request.hm_user, repository_session
+            ),
+            timeout_s=_DB_TIMEOUT_S,
+        )
+        manager = await session.get_manager_by_email(request.hm_user)
     else:
-        connect_to_hm(request.hm_user, password=request.hm_password.get_secret_value())
+        await connect_to_hm_async(
+            request.hm_user, password=request.hm_password.get_secret_value()
+        )
 
-    manager = session.get_manager_by_email(request.hm_user)
     if manager is None:
         raise HTTPException(status_code=500, detail="Manager wasn't saved correctly")
     teams = [
         api_models.Team.model_validate(team.__dict__)
-        for team in session.get_teams(manager=manager)
+        for team in await session.get_teams(manager=manager)
     ]
 
     # Group teams by team attribute and sort
@@ -95,15 +117,17 @@ async def load(request: LoadRequest, session: SessionDep) -> DashBoardData:
 async def register_for_autolinup(
     request: AuthRequest, session: SessionDep
 ) -> api_models.Manager:
-    manager = session.get_manager_by_email(request.hm_user)
+    manager = await session.get_manager_by_email(request.hm_user)
     if manager is None:
         raise HTTPException(status_code=500, detail="Manager wasn't saved correctly")
-    connect_to_hm(request.hm_user, password=request.hm_password.get_secret_value())
+    await connect_to_hm_async(
+        request.hm_user, password=request.hm_password.get_secret_value()
+    )
 
     manager.encrypted_password = encrypt(request.hm_password.get_secret_value())
     manager.autolineup = True
     response = api_models.Manager.model_validate(manager.__dict__)
-    session.session.commit()
+    await session.commit()
     return response
 
 
@@ -111,14 +135,16 @@ async def register_for_autolinup(
 async def unregister_for_autolinup(
     request: AuthRequest, session: SessionDep
 ) -> api_models.Manager:
-    manager = session.get_manager_by_email(request.hm_user)
+    manager = await session.get_manager_by_email(request.hm_user)
     if manager is None:
         raise HTTPException(status_code=500, detail="Manager wasn't saved correctly")
-    connect_to_hm(request.hm_user, password=request.hm_password.get_secret_value())
+    await connect_to_hm_async(
+        request.hm_user, password=request.hm_password.get_secret_value()
+    )
     manager.encrypted_password = None
     manager.autolineup = False
     response = api_models.Manager.model_validate(manager.__dict__)
-    session.session.commit()
+    await session.commit()
     return response
 
 
@@ -138,26 +164,31 @@ async def team_value_evolution(
     transfert_modification: TransfertModifications = TransfertModifications(),
 ) -> TeamValueEvolution:
     # Get the manager from the email
-    manager = session.get_manager_by_email(request.hm_user)
+    manager = await session.get_manager_by_email(request.hm_user)
     if manager is None:
         raise HTTPException(status_code=404, detail="Manager not found")
 
     # Verify credentials
-    connect_to_hm(request.hm_user, password=request.hm_password.get_secret_value())
+    await connect_to_hm_async(
+        request.hm_user, password=request.hm_password.get_secret_value()
+    )
 
     # Get current season
-    current_season = session.get_current_season()
+    current_season = await session.get_current_season()
     if current_season is None:
         raise HTTPException(status_code=404, detail="No current season found")
 
-    evolution = compute_team_value_sql(
-        repository=session,
-        manager_id=manager.id,
-        season_id=current_season.id,
-        team_code=team_code,
-        modifications=transfert_modification.modifications
-        if transfert_modification.modifications
-        else None,
+    evolution = await session.run_sync(
+        lambda repository_session: compute_team_value_sql(
+            repository=repository_session,
+            manager_id=manager.id,
+            season_id=current_season.id,
+            team_code=team_code,
+            modifications=transfert_modification.modifications
+            if transfert_modification.modifications
+            else None,
+        ),
+        timeout_s=_DB_TIMEOUT_S,
     )
 
     return TeamValueEvolution(evolution=evolution)
@@ -12,15 +12,18 @@ router = APIRouter(prefix="/players", tags=["players"])
 _HM_DATABASE_URL = getenv(HM_DATABASE_URL_ENV_NAME)
 if _HM_DATABASE_URL is None:
     raise SystemError(f"{HM_DATABASE_URL_ENV_NAME} is not defined")
-repo_session_maker = repo.create_repository_session_maker(_HM_DATABASE_URL)
+# Only reads, not blocked by the imports on SQLite
+repo_session_maker = repo.create_async_repository_session_maker(
+    _HM_DATABASE_URL, read_only=True
+)
 
 
-def get_session():
-    with repo_session_maker() as session:
+async def get_session():
+    async with repo_session_maker() as session:
         yield session
 
 
-SessionDep = Annotated[repo.RepositorySession, Depends(get_session)]
+SessionDep = Annotated[repo.AsyncRepositorySession, Depends(get_session)]
 
 
 @router.get("/")
@@ -28,7 +31,7 @@ async def get_players(session: SessionDep) -> list[api_models.HockeyPlayer]:
     """
     Get all players of the current season
     """
-    players = session.get_players()
+    players = await session.get_players()
     return [api_models.HockeyPlayer.model_validate(p.__dict__) for p in players]
 
 
@@ -37,7 +40,7 @@ async def get_player(player_id: int, session: SessionDep):
     """
     Get the data of one player
     """
-    players = session.get_players(player_ids=[player_id])
+    players = await session.get_players(player_ids=[player_id])
     if not players:
         raise HTTPException(status_code=404, detail="Player not found")
     return api_models.HockeyPlayer.model_validate(players[0].__dict__)
@@ -47,7 +50,7 @@ async def get_player(player_id: int, session: SessionDep):
 async def get_player_stats(
     player_id: int, session: SessionDep
 ) -> list[api_models.HockeyPlayerStats]:
-    players_stats = session.get_player_stats([player_id])
+    players_stats = await session.get_player_stats([player_id])
 
     if players_stats is None or len(players_stats) == 0:
         raise HTTPException(status_code=404, detail="No player found")
@@ -66,9 +69,9 @@ class LastPlayerStats(BaseModel):
 async def get_latest_player_stats(session: SessionDep) -> list[LastPlayerStats]:
     players = [
         api_models.HockeyPlayer.model_validate(p.__dict__)
-        for p in session.get_players()
+        for p in await session.get_players()
     ]
-    stats = session.get_current_player_stats([p.id for p in players])
+    stats = await session.get_current_player_stats()
     if stats is None:
         raise HTTPException(
             status_code=404, detail="No player stats could be found for current season"
@@ -1,10 +1,21 @@
+import logging
+import time
+from os import getenv
 from typing import Annotated, Literal
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from fastapi.security import (
+    HTTPAuthorizationCredentials,
+    HTTPBearer,
+    OAuth2PasswordRequestForm,
+)
 
-from hmtracker.api.admin_login import create_access_token
+from hmtracker.api.admin_login import create_access_token, decode_token
+from hmtracker.common import metrics
+from hmtracker.common.constants import HM_SQL_DEBUG_ENV_NAME
+from hmtracker.database import database
 from pydantic import BaseModel
 from .routers import admin, players, myteam
 
@@ -20,12 +31,108 @@ api.include_router(admin.router)
 api.include_router(players.router)
 api.include_router(myteam.router)
 
+HTTP_REQUEST_SECONDS = metrics.Histogram(
+    "hmtracker_http_request_duration_seconds",
+    "Duration of the API requests until the response starts, by route",
+    ["method", "route", "status"],
+)
+
+if metrics.metrics_enabled():
+
+    @api.middleware("http")
+    async def time_request(request: Request, call_next):
+        started_at = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started_at,
+            method=request.method,
+            # The template of the path, to not create a label by player
+            route=getattr(route, "path", "unmatched"),
+            status=str(response.status_code),
+        )
+        return response
+
+
+# Log the statements run several times by a request, likely N+1 queries
+_SQL_DEBUG = getenv(HM_SQL_DEBUG_ENV_NAME, "").lower() in ("1", "true", "yes")
+
+
+if database.query_count_enabled():
+
+    @api.middleware("http")
+    async def count_queries(request: Request, call_next):
+        """
+        Count the queries of the request and report them in the Server-Timing header,
+        queries run after the start of a streamed response are not included
+        """
+        with database.count_queries(track_statements=_SQL_DEBUG) as queries:
+            response = await call_next(request)
+        duration_ms = queries.duration_s * 1000
+        response.headers.append(
+            "Server-Timing", f'db;dur={duration_ms:.3f};desc="{queries.count} queries"'
+        )
+        logging.debug(
+            f"{request.method} {request.url.path}: {queries.count} queries in {duration_ms:.1f}ms"
+        )
+        for statement, count in queries.repeated_statements().items():
+            logging.warning(
+                f"{request.method} {request.url.path} ran {count} times: {statement}"
+            )
+        return response
+
+
+@api.exception_handler(TimeoutError)
+async def timeout_error_handler(request: Request, exc: TimeoutError):
+    """
+    Hockey Manager or the database took longer than the request can wait
+    """
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "The request took too long, try again later"},
+    )
+
 
 @api.get("/ping")
 async def ping_server():
     return True
 
 
+metrics_bearer = HTTPBearer(auto_error=False)
+
+
+def check_metrics_access(
+    credentials: Annotated[
+        HTTPAuthorizationCredentials | None, Depends(metrics_bearer)
+    ],
+):
+    """
+    The metrics are read with the token HM_METRICS_TOKEN or by an admin
+    """
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not metrics.is_metrics_token(credentials.credentials):
+        decode_token(credentials.credentials)
+
+
+@api.get(
+    "/metrics",
+    include_in_schema=False,
+    dependencies=[Depends(check_metrics_access)],
+)
+async def get_metrics():
+    """
+    Metrics of this API process in the Prometheus text format
+    """
+    if not metrics.metrics_enabled():
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 class AuthTokenResponse(BaseModel):
     type: Literal["bearer"] = "bearer"
     access_token: str
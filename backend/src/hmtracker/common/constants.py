@@ -3,3 +3,23 @@ HM_USER_ENV_NAME = "HM_USER"
 HM_PASSWORD_ENV_NAME = "HM_PASSWORD"
 HM_SECRET_KEY_ENV_NAME = "HMTRACKER_SECRET_KEY"
 HM_URL = "https://www.hockeymanager.ch/"
+HM_PARSER_BACKEND_ENV_NAME = "HM_PARSER_BACKEND"
+HM_ARCHIVE_DIR_ENV_NAME = "HM_ARCHIVE_DIR"
+HM_BASE_URL_ENV_NAME = "HM_BASE_URL"
+HM_RATE_LIMIT_ENV_NAME = "HM_RATE_LIMIT"
+HM_RATE_BURST_ENV_NAME = "HM_RATE_BURST"
+HM_STATS_ONLY_CHANGES_ENV_NAME = "HM_STATS_ONLY_CHANGES"
+HM_DB_POOL_SIZE_ENV_NAME = "HM_DB_POOL_SIZE"
+HM_DB_MAX_OVERFLOW_ENV_NAME = "HM_DB_MAX_OVERFLOW"
+HM_DB_POOL_TIMEOUT_ENV_NAME = "HM_DB_POOL_TIMEOUT"
+HM_DB_POOL_RECYCLE_ENV_NAME = "HM_DB_POOL_RECYCLE"
+HM_SQLITE_WAL_ENV_NAME = "HM_SQLITE_WAL"
+HM_SQLITE_BUSY_TIMEOUT_ENV_NAME = "HM_SQLITE_BUSY_TIMEOUT"
+HM_MAX_SESSIONS_ENV_NAME = "HM_MAX_SESSIONS"
+HM_SESSION_TIMEOUT_ENV_NAME = "HM_SESSION_TIMEOUT"
+HM_DB_THREADS_ENV_NAME = "HM_DB_THREADS"
+HM_DB_TIMEOUT_ENV_NAME = "HM_DB_TIMEOUT"
+HM_METRICS_ENV_NAME = "HM_METRICS"
+HM_METRICS_TOKEN_ENV_NAME = "HM_METRICS_TOKEN"
+HM_SQL_DEBUG_ENV_NAME = "HM_SQL_DEBUG"
+HM_QUERY_COUNT_ENV_NAME = "HM_QUERY_COUNT"
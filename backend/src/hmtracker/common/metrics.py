@@ -0,0 +1,253 @@
+"""
+Minimal metrics exported in the Prometheus text format.
+
+The metrics are disabled unless the environment variable HM_METRICS is true:
+recording a value then only checks a flag, and the repository methods and the
+engines aren't instrumented for the metrics at all.
+Every process has its own registry, the API serves it on /metrics and the worker
+on its own port. Both only serve it to the bearer of the token HM_METRICS_TOKEN,
+the API also to an admin.
+"""
+
+import hmac
+import math
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import getenv
+
+from hmtracker.common.constants import HM_METRICS_ENV_NAME, HM_METRICS_TOKEN_ENV_NAME
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_enabled = getenv(HM_METRICS_ENV_NAME, "").lower() in ("1", "true", "yes")
+
+
+def metrics_enabled() -> bool:
+    return _enabled
+
+
+def is_metrics_token(token: str | None) -> bool:
+    """
+    :param token: bearer token of the request
+    :return: True if HM_METRICS_TOKEN is set and the token is the same
+    """
+    expected_token = getenv(HM_METRICS_TOKEN_ENV_NAME)
+    if not expected_token or token is None:
+        return False
+    return hmac.compare_digest(token.encode(), expected_token.encode())
+
+
+def set_metrics_enabled(enabled: bool):
+    """
+    Enable or disable the recording of the metrics, the instrumentation installed
+    at import is not changed
+    """
+    global _enabled
+    _enabled = enabled
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Sequence[tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """
+        :return: every metric in the Prometheus text format
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        registry: MetricsRegistry | None = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} needs the labels {self.label_names}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _labels(self, key: tuple[str, ...]) -> list[tuple[str, str]]:
+        return list(zip(self.label_names, key))
+
+    def render(self) -> list[str]:
+        raise NotImplementedError()
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # Count by bucket, not cumulated, then the sum and the count (+Inf bucket)
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[position] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def time(self, **labels: str) -> AbstractContextManager:
+        """
+        :return: a context manager observing the seconds spent in it
+        """
+        if not _enabled:
+            return nullcontext()
+        return self._timer(labels)
+
+    @contextmanager
+    def _timer(self, labels: dict[str, str]) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def count(self, **labels: str) -> float:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return 0.0 if state is None else state[-1]
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in values:
+            labels = self._labels(key)
+            cumulated = 0.0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), state):
+                cumulated = state[-1] if math.isinf(bound) else cumulated + bucket_count
+                bucket_labels = _format_labels(labels + [("le", _format_value(bound))])
+                lines.append(
+                    f"{self.name}_bucket{bucket_labels} {_format_value(cumulated)}"
+                )
+            lines.append(
+                f"{self.name}_sum{_format_labels(labels)} {_format_value(state[-2])}"
+            )
+            lines.append(
+                f"{self.name}_count{_format_labels(labels)} {_format_value(state[-1])}"
+            )
+        return lines
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        scheme, _, token = self.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not is_metrics_token(token):
+            self.send_response(401)
+            self.send_header("WWW-Authenticate", "Bearer")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve the metrics of the process in a background thread, for the processes
+    without API like the worker
+    :param port:
+    :param host: address the server is bound to, only the local host by default
+    :return: the server, to shut down
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    return server
@@ -0,0 +1,160 @@
+"""
+Progress of the long operations, e.g. the loading of the HM stats.
+
+The operations report their progress with a ProgressTracker, which publishes
+throttled ProgressEvent in the ring buffer of the process, progress_events.
+The listeners of the buffer forward the events, e.g. the worker saves them in the
+TASK table, where the API reads them back for its clients.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+
+DEFAULT_BUFFER_SIZE = 256
+DEFAULT_MIN_INTERVAL_S = 1.0
+
+
+@dataclass
+class ProgressEvent:
+    stage: str
+    done: int
+    total: int | None = None
+    rate: float | None = None  # items per second since the start of the stage
+    eta_s: float | None = None
+    finished: bool = False
+    timestamp: float = field(default_factory=time.time)
+    task_id: int | None = None
+    sequence: int = 0  # set by the buffer
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ProgressBuffer:
+    """
+    Ring buffer of the last progress events of the process, thread safe.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        self._events: deque[ProgressEvent] = deque(maxlen=max_size)
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._listeners: list[Callable[[ProgressEvent], None]] = []
+
+    def publish(self, event: ProgressEvent) -> ProgressEvent:
+        """
+        Add the event to the buffer and call the listeners, in the calling thread
+        :return: the event with its sequence
+        """
+        with self._condition:
+            self._sequence += 1
+            event.sequence = self._sequence
+            self._events.append(event)
+            listeners = list(self._listeners)
+            self._condition.notify_all()
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logging.warning(f"Progress listener failed: {e}")
+        return event
+
+    def since(self, sequence: int = 0) -> list[ProgressEvent]:
+        """
+        :param sequence: last sequence received by the caller
+        :return: the events of the buffer published after it, oldest first
+        """
+        with self._condition:
+            return [event for event in self._events if event.sequence > sequence]
+
+    def wait(self, sequence: int, timeout_s: float) -> list[ProgressEvent]:
+        """
+        Same as since, but waits up to timeout_s for an event if there is none
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._sequence > sequence, timeout_s)
+            return [event for event in self._events if event.sequence > sequence]
+
+    def add_listener(self, listener: Callable[[ProgressEvent], None]):
+        with self._condition:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[ProgressEvent], None]):
+        with self._condition:
+            self._listeners.remove(listener)
+
+
+progress_events = ProgressBuffer()
+
+
+class ProgressTracker:
+    """
+    Progress of one stage of an operation, with the rate and ETA since its start.
+    The events are published at most every min_interval_s, apart from the first
+    and the last. Thread safe, can be advanced by the threads of a pool.
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        total: int | None = None,
+        min_interval_s: float = DEFAULT_MIN_INTERVAL_S,
+        buffer: ProgressBuffer | None = None,
+    ) -> None:
+        """
+        :param stage: name of the stage
+        :param total: number of items to process, None if unknown
+        :param min_interval_s: minimum seconds between two events
+        :param buffer: buffer of the events, progress_events if not set
+        """
+        self.stage = stage
+        self.total = total
+        self.min_interval_s = min_interval_s
+        self.buffer = progress_events if buffer is None else buffer
+        self.done = 0
+        self._started_at = time.monotonic()
+        self._published_at = self._started_at
+        self._lock = threading.Lock()
+        self._publish(self._event())
+
+    def advance(self, count: int = 1):
+        with self._lock:
+            self.done += count
+            now = time.monotonic()
+            if now - self._published_at < self.min_interval_s:
+                return
+            self._published_at = now
+            event = self._event(now)
+        self._publish(event)
+
+    def finish(self):
+        with self._lock:
+            event = self._event(finished=True)
+        self._publish(event)
+
+    def _event(self, now: float | None = None, finished: bool = False) -> ProgressEvent:
+        elapsed = (time.monotonic() if now is None else now) - self._started_at
+        rate = self.done / elapsed if elapsed > 0 and self.done else None
+        eta_s = None
+        if finished:
+            eta_s = 0.0
+        elif rate and self.total is not None:
+            eta_s = max(self.total - self.done, 0) / rate
+        return ProgressEvent(
+            stage=self.stage,
+            done=self.done,
+            total=self.total,
+            rate=rate,
+            eta_s=eta_s,
+            finished=finished,
+        )
+
+    def _publish(self, event: ProgressEvent):
+        logging.debug(
+            f"{event.stage}: {event.done}/{event.total if event.total is not None else '?'}"
+        )
+        self.buffer.publish(event)
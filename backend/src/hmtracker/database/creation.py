@@ -3,7 +3,8 @@ import sys
 from datetime import date
 
 from hmtracker.database import models
-from hmtracker.database.database import create_engine
+from hmtracker.database.database import get_engine
+from hmtracker.database.seasons import invalidate_season_index
 from hmtracker.database.repository import (
     create_repository_session_maker,
     RepositorySession,
@@ -41,6 +42,7 @@ def create_seasons(db_url: str, from_year: int, to_year: int | None = None):
 
     database_session.session.add_all(seasons)
     database_session.end_session()
+    invalidate_season_index(db_url)
 
 
 def initialize_database(db_url: str):
@@ -49,13 +51,9 @@ def initialize_database(db_url: str):
     :param db_url:
     :return:
     """
-    db_engine = create_engine(db_url)
-    try:
-        models.HMDatabaseObject.metadata.create_all(db_engine)
+    models.HMDatabaseObject.metadata.create_all(get_engine(db_url))
 
-        create_seasons(db_url, FIRST_SEASON)
-    finally:
-        db_engine.dispose()
+    create_seasons(db_url, FIRST_SEASON)
 
 
 if __name__ == "__main__":
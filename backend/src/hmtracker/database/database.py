@@ -1,25 +1,437 @@
-from sqlalchemy import create_engine, Engine
+import threading
+import time
+from collections import Counter as StatementCounter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from os import getenv
+from typing import Any
 
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import URL, Engine, create_engine, event, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from hmtracker.common.constants import (
+    HM_DB_POOL_SIZE_ENV_NAME,
+    HM_DB_MAX_OVERFLOW_ENV_NAME,
+    HM_DB_POOL_TIMEOUT_ENV_NAME,
+    HM_DB_POOL_RECYCLE_ENV_NAME,
+    HM_SQLITE_WAL_ENV_NAME,
+    HM_SQLITE_BUSY_TIMEOUT_ENV_NAME,
+    HM_QUERY_COUNT_ENV_NAME,
+)
+from hmtracker.common.metrics import Counter, Histogram, metrics_enabled
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+DEFAULT_POOL_TIMEOUT_S = 30
+DEFAULT_POOL_RECYCLE_S = 1800
+DEFAULT_SQLITE_BUSY_TIMEOUT_MS = 5000
+
+# Pragmas of the SQLite connections in WAL mode
+SQLITE_WAL_PRAGMAS: dict[str, str | int] = {
+    "journal_mode": "WAL",  # Readers don't block the writer and the opposite
+    "synchronous": "NORMAL",  # Durable on application crash with WAL
+    "cache_size": -64000,  # 64MB of page cache
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+# Repository method running the queries of the context, label of the query metrics
+query_origin: ContextVar[str] = ContextVar("query_origin", default="other")
+
+DB_QUERIES = Counter(
+    "hmtracker_db_queries_total",
+    "Queries sent to the database, by repository method",
+    ["method"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "hmtracker_db_query_duration_seconds",
+    "Duration of the queries sent to the database, by repository method",
+    ["method"],
+)
+
+
+class QueryCounter:
+    """
+    Queries run in a context, e.g. by an API request, including its database threads.
+    Thread safe.
+    """
+
+    def __init__(self, track_statements: bool = False) -> None:
+        """
+        :param track_statements: count each statement with its parameters, to find
+            the statements run several times
+        """
+        self.count = 0
+        self.duration_s = 0.0
+        self.track_statements = track_statements
+        self.statements: StatementCounter[str] = StatementCounter()
+        self._lock = threading.Lock()
+
+    def add(self, statement: str, parameters, duration_s: float):
+        with self._lock:
+            self.count += 1
+            self.duration_s += duration_s
+            if self.track_statements:
+                self.statements[f"{statement} {parameters!r}"] += 1
+
+    def repeated_statements(self) -> dict[str, int]:
+        """
+        :return: the statements run more than once with the same parameters, with
+            their count. Empty if the statements are not tracked
+        """
+        with self._lock:
+            return {
+                statement: count
+                for statement, count in self.statements.items()
+                if count > 1
+            }
+
+
+# Counter of the queries of the context, set by count_queries
+query_counter: ContextVar[QueryCounter | None] = ContextVar(
+    "query_counter", default=None
+)
+
+
+def query_count_enabled() -> bool:
+    """
+    :return: whether the new engines count their queries in the query counter of the
+        context, set with the environment variable HM_QUERY_COUNT (off by default)
+    """
+    return getenv(HM_QUERY_COUNT_ENV_NAME, "false").lower() in ("1", "true", "yes")
+
+
+@contextmanager
+def count_queries(track_statements: bool = False) -> Iterator[QueryCounter]:
+    """
+    Count the queries run in the block, by the caller and by the threads and tasks
+    started from it, e.g. AsyncRepositorySession.run_sync.
+    Nothing is counted on the engines created while query_count_enabled is False
+    :param track_statements: see QueryCounter
+    """
+    counter = QueryCounter(track_statements)
+    token = query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        query_counter.reset(token)
+
+
+@dataclass
+class PoolCheckoutStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_time: float = 0.0  # includes opening the new connections
+    max_wait_time: float = 0.0
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool measuring how long the checkouts wait for a connection
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = PoolCheckoutStats()
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            wait_time = time.perf_counter() - started_at
+            with self._stats_lock:
+                self.checkout_stats.checkouts += 1
+                self.checkout_stats.timeouts += timed_out
+                self.checkout_stats.wait_time += wait_time
+                self.checkout_stats.max_wait_time = max(
+                    self.checkout_stats.max_wait_time, wait_time
+                )
+
+    def status_dict(self) -> dict[str, int | float]:
+        with self._stats_lock:
+            stats = PoolCheckoutStats(**vars(self.checkout_stats))
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "wait_time_s": stats.wait_time,
+            "mean_wait_time_s": stats.wait_time / stats.checkouts
+            if stats.checkouts
+            else 0.0,
+            "max_wait_time_s": stats.max_wait_time,
+        }
+
+
+_engines: dict[tuple[URL, bool], Engine] = {}
+_session_makers: dict[tuple[URL, bool], sessionmaker[Session]] = {}
+_engines_lock = threading.Lock()
+
+
+def _is_sqlite_file(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def _sqlite_pragmas(read_only: bool) -> dict[str, str | int]:
+    pragmas: dict[str, str | int] = {
+        "busy_timeout": int(
+            getenv(HM_SQLITE_BUSY_TIMEOUT_ENV_NAME, DEFAULT_SQLITE_BUSY_TIMEOUT_MS)
+        )
+    }
+    if getenv(HM_SQLITE_WAL_ENV_NAME, "true").lower() in ("1", "true", "yes"):
+        pragmas.update(SQLITE_WAL_PRAGMAS)
+    if read_only:
+        pragmas["query_only"] = "ON"
+    return pragmas
+
+
+def _set_sqlite_pragmas(engine: Engine, pragmas: dict[str, str | int]):
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+
+def _count_query(statement: str, parameters, duration_s: float):
+    counter = query_counter.get()
+    if counter is not None:
+        counter.add(statement, parameters, duration_s)
+
+
+def _record_query_metrics(statement: str, parameters, duration_s: float):
+    method = query_origin.get()
+    DB_QUERIES.inc(method=method)
+    DB_QUERY_SECONDS.observe(duration_s, method=method)
+
+
+def _query_observers() -> list[Callable[[str, Any, float], None]]:
+    """
+    :return: the functions receiving the queries of the new engines, the queries
+        are only counted and recorded in the metrics if enabled when the engine
+        is created
+    """
+    observers: list[Callable[[str, Any, float], None]] = []
+    if query_count_enabled():
+        observers.append(_count_query)
+    if metrics_enabled():
+        observers.append(_record_query_metrics)
+    return observers
+
+
+def _time_queries(engine: Engine, observers: list[Callable[[str, Any, float], None]]):
+    """
+    Time the queries of the engine and pass their statement, parameters and
+    duration to the observers. Nothing is installed without observer
+    """
+    if not observers:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query(connection, cursor, statement, parameters, context, executemany):
+        context._hm_query_started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_query(connection, cursor, statement, parameters, context, executemany):
+        duration_s = time.perf_counter() - context._hm_query_started_at
+        for observer in observers:
+            observer(statement, parameters, duration_s)
+
+
+# Virtual machine instructions between two checks of the deadline by SQLite
+_SQLITE_DEADLINE_CHECK_STEPS = 1000
+
+
+@contextmanager
+def interrupt_queries_after(session: Session, timeout_s: float) -> Iterator[None]:
+    """
+    Interrupt the queries the session runs in the block once timeout_s seconds have
+    passed, including the running one: SQLite checks the deadline while running
+    a statement, PostgreSQL gets a statement_timeout. Other databases aren't bounded.
+    Only the connections of the session are concerned while they are in its
+    transactions, and nothing is installed outside the block.
+    Must be called in the thread using the session.
+    :raise TimeoutError: if a query of the block was interrupted, the transaction
+        is rolled back
+    """
+    deadline = time.monotonic() + timeout_s
+    bounded_connections: list = []
+
+    def bound(connection):
+        dbapi_connection = connection.connection.dbapi_connection
+        backend = connection.dialect.name
+        if backend == "sqlite":
+            dbapi_connection.set_progress_handler(
+                lambda: time.monotonic() >= deadline, _SQLITE_DEADLINE_CHECK_STEPS
+            )
+        elif backend == "postgresql":
+            remaining_ms = max(1, int((deadline - time.monotonic()) * 1000))
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {remaining_ms}")
+        bounded_connections.append((backend, dbapi_connection))
+
+    def unbound(*args):
+        # The connection goes back to the pool, its next user mustn't be interrupted
+        while bounded_connections:
+            backend, dbapi_connection = bounded_connections.pop()
+            if backend == "sqlite":
+                dbapi_connection.set_progress_handler(None, 0)
+
+    def on_begin(session, transaction, connection):
+        bound(connection)
+
+    if session.in_transaction():
+        bound(session.connection())
+    event.listen(session, "after_begin", on_begin)
+    event.listen(session, "after_commit", unbound)
+    event.listen(session, "after_rollback", unbound)
+    try:
+        yield
+    except DBAPIError as error:
+        if time.monotonic() < deadline:
+            raise
+        session.rollback()
+        raise TimeoutError(
+            f"Database queries interrupted after {timeout_s}s"
+        ) from error
+    finally:
+        event.remove(session, "after_begin", on_begin)
+        event.remove(session, "after_commit", unbound)
+        event.remove(session, "after_rollback", unbound)
+        if session.in_transaction() and any(
+            backend == "postgresql" for backend, _ in bounded_connections
+        ):
+            session.connection().exec_driver_sql(
+                "SET LOCAL statement_timeout TO DEFAULT"
+            )
+        unbound()
+
+
+def _engine_options(url: URL) -> dict:
+    """
+    Pool options by database, overridable with the environment variables
+    """
+    if url.get_backend_name() == "sqlite" and not _is_sqlite_file(url):
+        # One in-memory database per connection, keep the default pool
+        return {"connect_args": {"check_same_thread": False}}
+
+    options: dict = {
+        "poolclass": TimedQueuePool,
+        "pool_size": int(getenv(HM_DB_POOL_SIZE_ENV_NAME, DEFAULT_POOL_SIZE)),
+        "max_overflow": int(getenv(HM_DB_MAX_OVERFLOW_ENV_NAME, DEFAULT_MAX_OVERFLOW)),
+        "pool_timeout": float(
+            getenv(HM_DB_POOL_TIMEOUT_ENV_NAME, DEFAULT_POOL_TIMEOUT_S)
+        ),
+    }
+    if url.get_backend_name() == "sqlite":
+        # Connections to a file don't go stale, but are shared between threads
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        # Server connections can be closed by the server or a proxy
+        options["pool_pre_ping"] = True
+        options["pool_recycle"] = int(
+            getenv(HM_DB_POOL_RECYCLE_ENV_NAME, DEFAULT_POOL_RECYCLE_S)
+        )
+    return options
+
+
+def get_engine(database_url: str | URL, read_only: bool = False) -> Engine:
+    """
+    :param database_url: url of the database to connect to
+    :param read_only: get the engine for the readers. Only SQLite files have
+        a distinct engine, whose connections cannot write
+    :return: the engine of the database, shared by the whole process
+    """
+    url = make_url(database_url)
+    read_only = read_only and _is_sqlite_file(url)
+    with _engines_lock:
+        engine = _engines.get((url, read_only))
+        if engine is None:
+            engine = create_engine(url, **_engine_options(url))
+            if _is_sqlite_file(url):
+                _set_sqlite_pragmas(engine, _sqlite_pragmas(read_only))
+            _time_queries(engine, _query_observers())
+            _engines[(url, read_only)] = engine
+        return engine
+
+
+def dispose_engine(database_url: str | URL | None = None):
+    """
+    Close the connections of an engine and remove it from the registry
+    :param database_url: database of the engine, every engine if not set
+    """
+    with _engines_lock:
+        keys = (
+            list(_engines)
+            if database_url is None
+            else [(make_url(database_url), read_only) for read_only in (False, True)]
+        )
+        for key in keys:
+            _session_makers.pop(key, None)
+            engine = _engines.pop(key, None)
+            if engine is not None:
+                engine.dispose()
+
+
+def pool_stats() -> dict[str, dict[str, int | float]]:
+    """
+    :return: the status and checkout waits of the pool of each engine, by url
+        without password
+    """
+    with _engines_lock:
+        engines = list(_engines.items())
+    return {
+        url.render_as_string(hide_password=True)
+        + (" (read only)" if read_only else ""): engine.pool.status_dict()
+        for (url, read_only), engine in engines
+        if isinstance(engine.pool, TimedQueuePool)
+    }
 
 
 def init_engine(database_url: str) -> Engine:
     """
     Initialize the database engine
     :param database_url: url of the database to connect to
-    :return: the database engine
+    :return: the database engine, shared with every caller in the process
     """
-    engine = create_engine(database_url, connect_args={"check_same_thread": False})
-    return engine
+    return get_engine(database_url)
 
 
-def init_session_maker(database_url: str) -> sessionmaker[Session]:
+def init_session_maker(
+    database_url: str, read_only: bool = False
+) -> sessionmaker[Session]:
     """
     Initialize the database session maker
     :param database_url: url of the database to connect to
+    :param read_only: the sessions are only used to read, see get_engine
     :return: A session maker that create a session to the database
     """
-    engine = init_engine(database_url)
-    db_session_maker = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    engine.dispose()
-    return db_session_maker
+    url = make_url(database_url)
+    engine = get_engine(url, read_only)
+    with _engines_lock:
+        db_session_maker = _session_makers.get((url, read_only))
+        if db_session_maker is None:
+            db_session_maker = sessionmaker(
+                autocommit=False, autoflush=False, bind=engine
+            )
+            _session_makers[(url, read_only)] = db_session_maker
+        return db_session_maker
@@ -7,6 +7,8 @@ from sqlalchemy import (
     Float,
     Date,
     Boolean,
+    Index,
+    text,
 )
 from sqlalchemy.orm import relationship, mapped_column, Mapped, DeclarativeBase
 from sqlalchemy.sql.functions import func
@@ -41,6 +43,20 @@ class HockeyPlayer(HMDatabaseObject):
 
 class HockeyPlayerStats(HMDatabaseObject):
     __tablename__ = "HOCKEY_PLAYER_STATS"
+    __table_args__ = (
+        # Stats of a season within dates
+        Index(
+            "ix_HOCKEY_PLAYER_STATS_season_id_validity_date",
+            "season_id",
+            "validity_date",
+        ),
+        # History of players whatever the season, the primary key has season_id before the date
+        Index(
+            "ix_HOCKEY_PLAYER_STATS_player_id_validity_date",
+            "player_id",
+            "validity_date",
+        ),
+    )
 
     player_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("HOCKEY_PLAYERS.id"), primary_key=True, nullable=False
@@ -69,6 +85,36 @@ class HockeyPlayerStats(HMDatabaseObject):
     importation = relationship("StatImport", back_populates="stats")
 
 
+class HockeyPlayerStatsLatest(HMDatabaseObject):
+    """
+    Latest stats of each player in each season, copy of HOCKEY_PLAYER_STATS
+    maintained by the imports
+    """
+
+    __tablename__ = "HOCKEY_PLAYER_STATS_LATEST"
+
+    season_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("SEASONS.id"), primary_key=True, nullable=False
+    )
+    player_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("HOCKEY_PLAYERS.id"), primary_key=True, nullable=False
+    )
+    validity_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    import_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("STATS_IMPORT.id"), nullable=True
+    )
+    price: Mapped[float] = mapped_column(Float, nullable=False)
+    club: Mapped[str] = mapped_column(String, nullable=False)
+    ownership: Mapped[float | None] = mapped_column(Float)
+    hm_points: Mapped[int | None] = mapped_column(Integer)
+    appearances: Mapped[int | None] = mapped_column(Integer)
+    goal: Mapped[int | None] = mapped_column(Integer)
+    assists: Mapped[int | None] = mapped_column(Integer)
+    penalties: Mapped[int | None] = mapped_column(Integer)
+    plus_minus: Mapped[int | None] = mapped_column(Integer)
+
+
 class StatImport(HMDatabaseObject):
     __tablename__ = "STATS_IMPORT"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -79,22 +125,64 @@ class StatImport(HMDatabaseObject):
         String, nullable=False, server_default="Unknown"
     )
     comment: Mapped[str] = mapped_column(String, server_default="", nullable=False)
+    content_hash: Mapped[str | None] = mapped_column(String(64), index=True)
 
     stats = relationship("HockeyPlayerStats", back_populates="importation")
 
 
 class Task(HMDatabaseObject):
     __tablename__ = "TASK"
+    __table_args__ = (
+        Index("ix_TASK_status_created_at", "status", "created_at"),
+        # A job is queued once, and one task at a time runs on a resource
+        Index(
+            "ux_TASK_unfinished_name",
+            "name",
+            unique=True,
+            sqlite_where=text("status IN ('queued', 'running')"),
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        Index(
+            "ux_TASK_running_resource",
+            "resource",
+            unique=True,
+            sqlite_where=text("status = 'running'"),
+            postgresql_where=text("status = 'running'"),
+        ),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String, server_default="Unknown", nullable=False)
+    status: Mapped[str] = mapped_column(String, server_default="queued", nullable=False)
+    parameters: Mapped[str | None] = mapped_column(String, nullable=True)  # JSON
+    # What the task writes, the tasks of a resource don't run at the same time
+    resource: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     start_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
-    end_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    end_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    lease_owner: Mapped[str | None] = mapped_column(String, nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    progress: Mapped[str | None] = mapped_column(String, nullable=True)  # JSON
+    # Number of progress saved, identifies the progress between the processes
+    progress_sequence: Mapped[int] = mapped_column(
+        Integer, server_default="0", nullable=False
+    )
     error: Mapped[str | None] = mapped_column(String, nullable=True)
     stacktrace: Mapped[str | None] = mapped_column(String, nullable=True)
 
 
+class Worker(HMDatabaseObject):
+    __tablename__ = "WORKER"
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    heartbeat_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
 class Manager(HMDatabaseObject):
     __tablename__ = "MANAGER"
+    __table_args__ = (
+        Index("ix_MANAGER_autolineup_last_autolineup", "autolineup", "last_autolineup"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     email: Mapped[str | None] = mapped_column(String, unique=True)
     last_import: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -105,6 +193,9 @@ class Manager(HMDatabaseObject):
 
 class Team(HMDatabaseObject):
     __tablename__ = "TEAM"
+    __table_args__ = (
+        Index("ix_TEAM_manager_id_season_id_team", "manager_id", "season_id", "team"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     team: Mapped[str] = mapped_column(String, unique=False, nullable=False)
     manager_id: Mapped[int] = mapped_column(
@@ -128,4 +219,6 @@ class Match(HMDatabaseObject):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     home_club: Mapped[str] = mapped_column(String, nullable=False)
     away_club: Mapped[str] = mapped_column(String, nullable=False)
-    match_datetime: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    match_datetime: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, index=True
+    )
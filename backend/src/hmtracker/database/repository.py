@@ -1,14 +1,55 @@
+import asyncio
+import contextvars
 import datetime
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from os import getenv
+from typing import Any, TypeVar
 
 from sqlalchemy import Column
 from sqlalchemy.orm import Session
 
-from hmtracker.database import models, database
+from hmtracker.common.constants import HM_DB_THREADS_ENV_NAME
+from hmtracker.common.metrics import Histogram, metrics_enabled
+from hmtracker.database import models, database, seasons
+
+DEFAULT_DB_THREADS = 8
+
+# Threads of the async sessions, apart from the default executor of the event loop
+# so the database work can't starve the other blocking calls
+_db_executor = ThreadPoolExecutor(
+    max_workers=int(getenv(HM_DB_THREADS_ENV_NAME, DEFAULT_DB_THREADS)),
+    thread_name_prefix="hmtracker-db",
+)
+
+REPOSITORY_CALL_SECONDS = Histogram(
+    "hmtracker_repository_call_duration_seconds",
+    "Duration of the calls of the repository methods",
+    ["method"],
+)
+
+
+def create_repository_session_maker(database_url: str, read_only: bool = False):
+    """
+    :param database_url:
+    :param read_only: the sessions are only used to read, on SQLite they don't
+        wait for the writers
+    """
+    session_maker = database.init_session_maker(database_url, read_only)
+    return lambda: RepositorySession(session_maker())
 
 
-def create_repository_session_maker(database_url: str):
-    session_maker = database.init_session_maker(database_url)
-    return lambda: RepositorySession(session_maker())
+_T = TypeVar("_T")
+
+
+def create_async_repository_session_maker(database_url: str, read_only: bool = False):
+    """
+    Same as create_repository_session_maker, for the async code
+    """
+    repository_session_maker = create_repository_session_maker(database_url, read_only)
+    return lambda: AsyncRepositorySession(repository_session_maker())
 
 
 class RepositorySession:
@@ -37,7 +78,7 @@ class RepositorySession:
     def get_season(self, season_id: int) -> models.Season | None:
         if season_id is None:
             return self.get_current_season()
-        return self.session.query(models.Season).get(season_id)
+        return seasons.get_season(self.session, season_id)
 
     def get_player(self, player_id: int, season_id: int) -> models.HockeyPlayer | None:
         return self.session.get(models.HockeyPlayer, (player_id, season_id))
@@ -70,6 +111,16 @@ class RepositorySession:
     def get_imported_stats_dates(self):
         return self.session.query(models.StatImport).all()
 
+    def get_stat_import_by_content_hash(
+        self, content_hash: str
+    ) -> models.StatImport | None:
+        return (
+            self.session.query(models.StatImport)
+            .filter(models.StatImport.content_hash == content_hash)
+            .order_by(models.StatImport.import_date.desc())
+            .first()
+        )
+
     def get_stat_imports_for_season(self, season_id: int) -> list[models.StatImport]:
         season = self.get_season(season_id)
         if season is None:
@@ -84,15 +135,7 @@ class RepositorySession:
     def find_season(
         self, validity_date: datetime.datetime, arcade: bool = False
     ) -> models.Season:
-        return (
-            self.session.query(models.Season)
-            .filter(
-                models.Season.start <= validity_date,
-                models.Season.end >= validity_date,
-                models.Season.arcade == arcade,
-            )
-            .one()
-        )
+        return seasons.find_season(self.session, validity_date, arcade)
 
     def get_team(
         self, manager: int | models.Manager, season: int | models.Season, team_code: str
@@ -131,19 +174,16 @@ class RepositorySession:
             .all()
         )
 
-    def get_manager_by_email(self, email: str):
+    def get_manager_by_email(self, email: str) -> models.Manager | None:
         return (
             self.session.query(models.Manager)
             .filter(models.Manager.email == email)
             .one_or_none()
         )
 
-    def get_managers_with_autolineup(
-        self,
-        limit: int = 50,
-        offset: int = 0,
-        last_autolineup_before: datetime.datetime | None = None,
-    ) -> list[models.Manager]:
+    def _managers_with_autolineup_query(
+        self, last_autolineup_before: datetime.datetime | None = None
+    ):
         query = self.session.query(models.Manager).filter(
             models.Manager.autolineup.is_(True)
         )
@@ -153,10 +193,29 @@ class RepositorySession:
                 (models.Manager.last_autolineup < last_autolineup_before)
                 | (models.Manager.last_autolineup.is_(None))
             )
+        return query
 
-        return query.limit(limit).offset(offset).all()
+    def get_managers_with_autolineup(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        last_autolineup_before: datetime.datetime | None = None,
+    ) -> list[models.Manager]:
+        return (
+            self._managers_with_autolineup_query(last_autolineup_before)
+            .limit(limit)
+            .offset(offset)
+            .all()
+        )
+
+    def count_managers_with_autolineup(
+        self, last_autolineup_before: datetime.datetime | None = None
+    ) -> int:
+        return self._managers_with_autolineup_query(last_autolineup_before).count()
 
-    def get_player_stats(self, player_ids: list[int], season_id: int | None = None):
+    def get_player_stats(
+        self, player_ids: list[int], season_id: int | None = None
+    ) -> list[models.HockeyPlayerStats] | None:
         season = (
             self.get_current_season()
             if season_id is None
@@ -182,8 +241,13 @@ class RepositorySession:
         return query.all()
 
     def get_current_player_stats(
-        self, player_ids: list[int], season_id: int | None = None
-    ):
+        self, player_ids: list[int] | None = None, season_id: int | None = None
+    ) -> list[models.HockeyPlayerStatsLatest] | None:
+        """
+        Get the latest stats of each player, from HOCKEY_PLAYER_STATS_LATEST
+        :param player_ids: players to get, every player of the season if not set
+        :param season_id: the current season if not set
+        """
         season = (
             self.get_current_season()
             if season_id is None
@@ -192,34 +256,14 @@ class RepositorySession:
         if season is None:
             return None
 
-        from sqlalchemy import func
-
-        subquery = (
-            self.session.query(
-                models.HockeyPlayerStats.player_id,
-                func.max(models.HockeyPlayerStats.validity_date).label("max_date"),
-            )
-            .filter(
-                models.HockeyPlayerStats.validity_date.between(
-                    season.start, season.end
-                ),
-                models.HockeyPlayerStats.player_id.in_(player_ids),
-            )
-            .group_by(models.HockeyPlayerStats.player_id)
-            .subquery()
+        query = self.session.query(models.HockeyPlayerStatsLatest).filter(
+            models.HockeyPlayerStatsLatest.season_id == season.id
         )
-
-        query = (
-            self.session.query(models.HockeyPlayerStats)
-            .join(
-                subquery,
-                (models.HockeyPlayerStats.player_id == subquery.c.player_id)
-                & (models.HockeyPlayerStats.validity_date == subquery.c.max_date),
+        if player_ids is not None:
+            query = query.filter(
+                models.HockeyPlayerStatsLatest.player_id.in_(player_ids)
             )
-            .order_by(models.HockeyPlayerStats.player_id)
-        )
-
-        return query.all()
+        return query.order_by(models.HockeyPlayerStatsLatest.player_id).all()
 
     def add_task(self, task: models.Task) -> models.Task:
         self.session.add(task)
@@ -229,7 +273,7 @@ class RepositorySession:
     def get_tasks(self, limit: int = 50, offset: int = 0) -> list[models.Task]:
         return (
             self.session.query(models.Task)
-            .order_by(models.Task.start_at.desc())
+            .order_by(models.Task.created_at.desc(), models.Task.id.desc())
             .limit(limit)
             .offset(offset)
             .all()
@@ -289,3 +333,148 @@ class RepositorySession:
         )
 
         return query.all()
+
+
+class AsyncRepositorySession:
+    """
+    RepositorySession for the async code: the queries are awaited and run in the
+    database threads, so the event loop serves other requests during the database I/O.
+    Has the methods of RepositorySession used by the async code, the others are
+    called through run_sync. The calls on one session run one after the other, as the session can't be used by two threads at the same time.
+    """
+
+    def __init__(self, repository_session: RepositorySession):
+        self.repository_session = repository_session
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.run_sync(RepositorySession.end_session)
+
+    async def run_sync(
+        self,
+        function: Callable[..., _T],
+        *args: Any,
+        timeout_s: float | None = None,
+        **kwargs: Any,
+    ) -> _T:
+        """
+        Run synchronous code using the repository session in a database thread.
+        A thread can't be interrupted: if the caller is cancelled, e.g. by an
+        asyncio timeout, the cancellation only takes effect once the code is done,
+        so the session is never used by two threads. Use timeout_s to bound the call.
+        :param function: called with the RepositorySession then the arguments
+        :param timeout_s: if set, the queries of the call are interrupted after
+            timeout_s seconds, see database.interrupt_queries_after
+        :return: what the function returns
+        :raise TimeoutError: if the queries were interrupted
+        """
+        call = partial(function, self.repository_session, *args, **kwargs)
+        if timeout_s is not None:
+            call = partial(_run_with_timeout, self.repository_session, call, timeout_s)
+        async with self._lock:
+            future = asyncio.get_running_loop().run_in_executor(
+                _db_executor, contextvars.copy_context().run, call
+            )
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                await asyncio.wait([future])
+                raise
+
+    async def commit(self):
+        await self.run_sync(
+            lambda repository_session: repository_session.session.commit()
+        )
+
+    async def rollback(self):
+        await self.run_sync(
+            lambda repository_session: repository_session.session.rollback()
+        )
+
+    # The methods of RepositorySession used by the async code, run in a database thread
+
+    async def get_current_season(self, arcade: bool = False) -> models.Season | None:
+        return await self.run_sync(RepositorySession.get_current_season, arcade)
+
+    async def get_season(self, season_id: int) -> models.Season | None:
+        return await self.run_sync(RepositorySession.get_season, season_id)
+
+    async def find_season(
+        self, validity_date: datetime.datetime, arcade: bool = False
+    ) -> models.Season:
+        return await self.run_sync(RepositorySession.find_season, validity_date, arcade)
+
+    async def get_players(
+        self, player_ids: list | None = None, season_id: int | None = None
+    ) -> list[models.HockeyPlayer]:
+        return await self.run_sync(RepositorySession.get_players, player_ids, season_id)
+
+    async def get_teams(
+        self, manager: int | models.Manager, season: int | models.Season | None = None
+    ) -> list[models.Team]:
+        return await self.run_sync(RepositorySession.get_teams, manager, season)
+
+    async def get_manager_by_email(self, email: str) -> models.Manager | None:
+        return await self.run_sync(RepositorySession.get_manager_by_email, email)
+
+    async def get_player_stats(
+        self, player_ids: list[int], season_id: int | None = None
+    ) -> list[models.HockeyPlayerStats] | None:
+        return await self.run_sync(
+            RepositorySession.get_player_stats, player_ids, season_id
+        )
+
+    async def get_current_player_stats(
+        self, player_ids: list[int] | None = None, season_id: int | None = None
+    ) -> list[models.HockeyPlayerStatsLatest] | None:
+        return await self.run_sync(
+            RepositorySession.get_current_player_stats, player_ids, season_id
+        )
+
+    async def get_tasks(self, limit: int = 50, offset: int = 0) -> list[models.Task]:
+        return await self.run_sync(RepositorySession.get_tasks, limit, offset)
+
+
+def _run_with_timeout(
+    repository_session: RepositorySession, call: Callable[[], _T], timeout_s: float
+) -> _T:
+    with database.interrupt_queries_after(repository_session.session, timeout_s):
+        return call()
+
+
+def _instrument(name: str, method: Callable[..., _T]) -> Callable[..., _T]:
+    @wraps(method)
+    def instrumented(*args, **kwargs) -> _T:
+        token = database.query_origin.set(name)
+        started_at = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            REPOSITORY_CALL_SECONDS.observe(
+                time.perf_counter() - started_at, method=name
+            )
+            database.query_origin.reset(token)
+
+    return instrumented
+
+
+def instrument_repository_methods():
+    """
+    Time the public methods of RepositorySession and label their queries in the
+    metrics. Done at import when the metrics are enabled, so they cost nothing
+    otherwise
+    """
+    for name, method in list(vars(RepositorySession).items()):
+        if (
+            callable(method)
+            and not name.startswith("_")
+            and not hasattr(method, "__wrapped__")
+        ):
+            setattr(RepositorySession, name, _instrument(name, method))
+
+
+if metrics_enabled():
+    instrument_repository_methods()
@@ -0,0 +1,122 @@
+import datetime
+import threading
+from bisect import bisect_right
+
+from sqlalchemy import URL, make_url, select
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import Session
+
+from hmtracker.database import models
+
+
+def as_datetime(day: datetime.date | datetime.datetime) -> datetime.datetime:
+    """
+    :return: the datetime, or the start of the day for a date without time
+    """
+    if isinstance(day, datetime.datetime):
+        return day
+    return datetime.datetime.combine(day, datetime.time())
+
+
+class SeasonIndex:
+    """
+    Seasons of a database kept in memory, sorted by start so the season of a date is
+    found with a binary search. The seasons are detached from any session.
+    """
+
+    def __init__(self, seasons: list[models.Season]):
+        self._by_id = {season.id: season for season in seasons}
+        self._starts: dict[bool, list[datetime.datetime]] = {False: [], True: []}
+        self._seasons: dict[bool, list[models.Season]] = {False: [], True: []}
+        for season in sorted(seasons, key=lambda season: season.start):
+            self._starts[bool(season.arcade)].append(as_datetime(season.start))
+            self._seasons[bool(season.arcade)].append(season)
+
+    @classmethod
+    def load(cls, session: Session) -> "SeasonIndex":
+        # Own session, to not detach the seasons already loaded by the caller
+        with Session(session.get_bind()) as loading_session:
+            seasons = list(loading_session.execute(select(models.Season)).scalars())
+        return cls(seasons)
+
+    def get(self, season_id: int) -> models.Season | None:
+        return self._by_id.get(season_id)
+
+    def find(
+        self, validity_date: datetime.date | datetime.datetime, arcade: bool = False
+    ) -> models.Season | None:
+        """
+        :return: the season whose start and end include the date, None if there is none
+        """
+        validity_datetime = as_datetime(validity_date)
+        arcade = bool(arcade)
+        position = bisect_right(self._starts[arcade], validity_datetime) - 1
+        if position < 0:
+            return None
+        season = self._seasons[arcade][position]
+        if validity_datetime > as_datetime(season.end):
+            return None
+        return season
+
+
+_season_indexes: dict[URL, SeasonIndex] = {}
+_season_indexes_lock = threading.Lock()
+
+
+def get_season_index(session: Session, refresh: bool = False) -> SeasonIndex:
+    """
+    :param session: session connected to the database of the seasons
+    :param refresh: reload the seasons from the database
+    :return: the season index of the database, shared by the whole process
+    """
+    key = session.get_bind().engine.url
+    with _season_indexes_lock:
+        season_index = _season_indexes.get(key)
+    if season_index is None or refresh:
+        season_index = SeasonIndex.load(session)
+        with _season_indexes_lock:
+            _season_indexes[key] = season_index
+    return season_index
+
+
+def invalidate_season_index(database_url: str | None = None):
+    """
+    Forget the seasons loaded in memory, to call when the SEASONS table changes
+    :param database_url: database whose seasons changed, every database if not set
+    """
+    with _season_indexes_lock:
+        if database_url is None:
+            _season_indexes.clear()
+            return
+        _season_indexes.pop(make_url(database_url), None)
+
+
+def find_season(
+    session: Session,
+    validity_date: datetime.date | datetime.datetime,
+    arcade: bool = False,
+) -> models.Season:
+    """
+    Find the season of a date in the season index, refreshed once if no season
+    matches in case it was created by another process
+    :return: the season, merged into the session without querying the database
+    :raise NoResultFound: if no season includes the date
+    """
+    season = get_season_index(session).find(validity_date, arcade)
+    if season is None:
+        season = get_season_index(session, refresh=True).find(validity_date, arcade)
+    if season is None:
+        raise NoResultFound(f"No season includes {validity_date}")
+    return session.merge(season, load=False)
+
+
+def get_season(session: Session, season_id: int) -> models.Season | None:
+    """
+    Same as find_season but by the id of the season
+    """
+    season = get_season_index(session).get(season_id)
+    if season is None:
+        season = get_season_index(session, refresh=True).get(season_id)
+    if season is None:
+        return None
+    return session.merge(season, load=False)
@@ -0,0 +1,7 @@
+from hmtracker.common.metrics import Counter
+
+IMPORT_ROWS = Counter(
+    "hmtracker_import_rows_total",
+    "Rows written by the imports, by table",
+    ["table"],
+)
@@ -15,11 +15,28 @@ from hmtracker.common.constants import (
     HM_DATABASE_URL_ENV_NAME,
     HM_USER_ENV_NAME,
     HM_PASSWORD_ENV_NAME,
+    HM_ARCHIVE_DIR_ENV_NAME,
+)
+from hmtracker.loader.playerstats.backfill import backfill_player_stats
+from hmtracker.loader.playerstats.compaction import compact_player_stats
+from hmtracker.loader.playerstats.fingerprint import content_hash
+from hmtracker.loader.playerstats.importer import (
+    import_hockey_stats_chunks,
+    import_hockey_stats_data,
+)
+from hmtracker.loader.playerstats.incremental import changed_players_filter
+from hmtracker.loader.playerstats.latest import rebuild_latest_stats
+from hmtracker.loader.playerstats.mapper import (
+    DEFAULT_CHUNK_SIZE,
+    iter_player_stats_chunks,
+    map_player_stats,
+)
+from hmtracker.loader.playerstats.source.archive import playerstats_archive_loader
+from hmtracker.loader.playerstats.source.file import __ENCODING, iter_csv
+from hmtracker.loader.playerstats.source.website import (
+    DEFAULT_DETAIL_WORKERS,
+    playerstats_ajax_loader,
 )
-from hmtracker.loader.playerstats.importer import import_hockey_stats_data
-from hmtracker.loader.playerstats.mapper import map_player_stats
-from hmtracker.loader.playerstats.source.file import __ENCODING, playerstats_csv_loader
-from hmtracker.loader.playerstats.source.website import playerstats_ajax_loader
 from hmtracker.loader.teamplayers.importer import import_team, import_manager
 from hmtracker.loader.teamplayers.source.website import team_players_ajax_loader
 from hmtracker.loader.matches.importer import import_matches
@@ -38,44 +55,207 @@ def __connect_session(
     raise ValueError("Database session must be provided")
 
 
-def import_playerstats_from_ajax(db_access: Session | str, user, password):
+def __already_imported(database_session: RepositorySession, data_hash: str) -> bool:
+    # Only the completed importations have a content hash, see __mark_imported
+    importation = database_session.get_stat_import_by_content_hash(data_hash)
+    if importation is None:
+        return False
+    logging.info(
+        f"Identical player stats already imported on {importation.import_date} (import {importation.id}), skipped"
+    )
+    return True
+
+
+def __mark_imported(
+    database_session: RepositorySession,
+    importation: models.StatImport,
+    data_hash: str,
+):
+    """
+    Store the content hash once every chunk of the importation is committed,
+    an interrupted importation is then imported again on the next run
+    """
+    importation.content_hash = data_hash
+    database_session.session.commit()
+
+
+def import_playerstats_from_ajax(
+    db_access: Session | str,
+    user,
+    password,
+    max_workers: int = DEFAULT_DETAIL_WORKERS,
+    incremental: bool = False,
+    archive_directory: str | None = None,
+    only_changes: bool = False,
+    force: bool = False,
+):
     """
     Import data from HockeyManager website
     :param db_access:
     :param user:
     :param password:
+    :param max_workers: maximum number of player details fetched concurrently
+    :param incremental: only import the players that can have changed since
+        their latest stats
+    :param archive_directory: if provided, archive the responses of HM in it
+    :param only_changes: only store the stats that changed since the latest stats
+    :param force: import the data even if identical data was already imported
     :return:
     """
-    ajax_loader = playerstats_ajax_loader(user, password)
-    import_playerstats_from_loader(ajax_loader, db_access)
+    details_filter = None
+    if incremental:
+        database_session: RepositorySession = __connect_session(db_access)
+        details_filter = changed_players_filter(database_session)
+        if isinstance(db_access, str):
+            database_session.end_session()
+
+    ajax_loader = playerstats_ajax_loader(
+        user,
+        password,
+        max_workers,
+        details_filter=details_filter,
+        archive_directory=archive_directory,
+    )
+    import_playerstats_from_loader(
+        ajax_loader, db_access, only_changes=only_changes, force=force
+    )
 
 
 def import_playerstats_from_csv(
-    csv_file_path, db_access: Session | str | RepositorySession
+    csv_file_path,
+    db_access: Session | str | RepositorySession,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    only_changes: bool = False,
+    force: bool = False,
 ):
     """
     import a csv file containing the player stats into the database tables.
+    The file is streamed and imported by chunks so it doesn't need to fit in memory.
     Close the session once finished
     :param csv_file_path:
     :param db_access: url of database or opened session
+    :param chunk_size: number of rows imported at once
+    :param only_changes: only store the stats that changed since the latest stats
+    :param force: import the file even if identical data was already imported
     :return:
     """
-    csv_loader = playerstats_csv_loader(csv_file_path)
-    import_playerstats_from_loader(csv_loader, db_access)
+    data_hash = content_hash(iter_csv(csv_file_path))
+
+    database_session: RepositorySession = __connect_session(db_access)
+    if force or not __already_imported(database_session, data_hash):
+        chunks = iter_player_stats_chunks(iter_csv(csv_file_path), chunk_size)
+        importation = models.StatImport(origin="Unknown", comment="")
+        imported_stats = import_hockey_stats_chunks(
+            database_session, chunks, importation, only_changes=only_changes
+        )
+        __mark_imported(database_session, importation, data_hash)
+        logging.info(f"{imported_stats} player stats imported from {csv_file_path}")
+    if isinstance(db_access, RepositorySession):
+        database_session.session.commit()
+    else:
+        database_session.end_session()
+
+
+def backfill_playerstats(
+    source: str,
+    db_access: Session | str | RepositorySession,
+    processes: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    only_changes: bool = False,
+) -> int:
+    """
+    Import every snapshot csv file of a directory or glob pattern, skipping the
+    files already imported by a previous backfill
+    :param source: directory of csv files or a glob pattern
+    :param db_access: url of database or opened session
+    :param processes: number of processes parsing the files
+    :param chunk_size: number of rows imported at once
+    :param only_changes: only store the stats that changed since the latest stats
+    :return: the number of stats stored
+    """
+    database_session: RepositorySession = __connect_session(db_access)
+    imported_stats = backfill_player_stats(
+        database_session, source, processes, chunk_size, only_changes
+    )
+    if isinstance(db_access, RepositorySession):
+        database_session.session.commit()
+    else:
+        database_session.end_session()
+    return imported_stats
 
 
 def import_playerstats_from_loader(
-    playerstats_loader, db_access: Session | str | RepositorySession, origin="Unknown"
+    playerstats_loader,
+    db_access: Session | str | RepositorySession,
+    origin="Unknown",
+    only_changes: bool = False,
+    force: bool = False,
 ):
+    """
+    Import the player stats returned by the loader, unless identical data
+    was already imported
+    :param playerstats_loader:
+    :param db_access: url of database or opened session
+    :param origin: indicates the origin of the importation
+    :param only_changes: only store the stats that changed since the latest stats
+    :param force: import the data even if identical data was already imported
+    :return:
+    """
     players_data = playerstats_loader()
-    players, players_stats = map_player_stats(players_data)
+    data_hash = content_hash(players_data)
+
+    database_session: RepositorySession = __connect_session(db_access)
+    if force or not __already_imported(database_session, data_hash):
+        players, players_stats = map_player_stats(players_data)
+        importation = models.StatImport(origin=origin, comment="")
+        import_hockey_stats_data(
+            database_session,
+            players,
+            players_stats,
+            importation,
+            only_changes=only_changes,
+        )
+        __mark_imported(database_session, importation, data_hash)
+    if isinstance(db_access, RepositorySession):
+        database_session.session.commit()
+    else:
+        database_session.end_session()
+
+
+def compact_playerstats(
+    db_access: Session | str | RepositorySession, season_id: int | None = None
+) -> int:
+    """
+    Delete the player stats identical to the previous stats of the player
+    :param db_access: url of database or opened session
+    :param season_id: season to compact, every season if not set
+    :return: the number of deleted stats
+    """
+    database_session: RepositorySession = __connect_session(db_access)
+    deleted_stats = compact_player_stats(database_session, season_id)
+    if isinstance(db_access, RepositorySession):
+        database_session.session.commit()
+    else:
+        database_session.end_session()
+    return deleted_stats
+
 
+def rebuild_latest_playerstats(
+    db_access: Session | str | RepositorySession, season_id: int | None = None
+) -> int:
+    """
+    Recompute the latest stats of the players from their history
+    :param db_access: url of database or opened session
+    :param season_id: season to rebuild, every season if not set
+    :return: the number of latest stats that were inconsistent
+    """
     database_session: RepositorySession = __connect_session(db_access)
-    import_hockey_stats_data(database_session, players, players_stats, origin=origin)
+    inconsistent_stats = rebuild_latest_stats(database_session, season_id)
     if isinstance(db_access, RepositorySession):
         database_session.session.commit()
     else:
         database_session.end_session()
+    return inconsistent_stats
 
 
 def import_teamplayers_from_loader(
@@ -161,6 +341,86 @@ if __name__ == "__main__":
         help=f"""If provided, import data from CSV path instead of ajax. Encoding needs to be {__ENCODING}""",
     )
 
+    argument_parser.add_argument(
+        "-b",
+        "--backfill",
+        help="""If provided, import every csv file of this directory or glob pattern, skipping the files already backfilled""",
+    )
+
+    argument_parser.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        help="""Number of processes parsing the files of a backfill, the number of CPUs if not set""",
+    )
+
+    argument_parser.add_argument(
+        "-c",
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="""Number of rows of the CSV imported at once""",
+    )
+
+    argument_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=DEFAULT_DETAIL_WORKERS,
+        help="""Maximum number of player details fetched concurrently from Hockey Manager""",
+    )
+
+    argument_parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="""If present, only load from Hockey Manager the players that can have changed since the last import""",
+    )
+
+    argument_parser.add_argument(
+        "-a",
+        "--archive-dir",
+        default=getenv(HM_ARCHIVE_DIR_ENV_NAME),
+        help=f"""Directory where the responses of Hockey Manager are archived.
+                                 If not set, use environment variable {HM_ARCHIVE_DIR_ENV_NAME}""",
+    )
+
+    argument_parser.add_argument(
+        "-r",
+        "--replay",
+        nargs="?",
+        const="latest",
+        help="""If present, import the player stats from a snapshot of the archive (the latest one if no snapshot id is given) instead of ajax""",
+    )
+
+    argument_parser.add_argument(
+        "-o",
+        "--only-changes",
+        action="store_true",
+        help="""If present, only store the player stats that changed since the latest stats of the player""",
+    )
+
+    argument_parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="""If present, import the player stats even if identical player stats were already imported""",
+    )
+
+    argument_parser.add_argument(
+        "--compact",
+        nargs="?",
+        const="all",
+        help="""If present, delete the player stats identical to the previous stats of the player, in every season or only in the given season id""",
+    )
+
+    argument_parser.add_argument(
+        "--rebuild-latest",
+        nargs="?",
+        const="all",
+        help="""If present, recompute the latest stats of the players from their history, in every season or only in the given season id""",
+    )
+
     argument_parser.add_argument(
         "-t",
         "--teams",
@@ -184,6 +444,24 @@ if __name__ == "__main__":
     arguments = argument_parser.parse_args()
     check_exists(arguments.database_url, "database-url")
 
+    if arguments.compact is not None:
+        deleted_stats = compact_playerstats(
+            arguments.database_url,
+            None if arguments.compact == "all" else int(arguments.compact),
+        )
+        logging.info(f"Compaction completed: {deleted_stats} player stats deleted")
+        exit(0)
+
+    if arguments.rebuild_latest is not None:
+        inconsistent_stats = rebuild_latest_playerstats(
+            arguments.database_url,
+            None
+            if arguments.rebuild_latest == "all"
+            else int(arguments.rebuild_latest),
+        )
+        logging.info(f"Latest stats rebuilt: {inconsistent_stats} were inconsistent")
+        exit(0)
+
     if arguments.matches:
         if arguments.source_csv is None:
             logging.error("Error: --source-csv is required for matches import")
@@ -208,11 +486,50 @@ if __name__ == "__main__":
         )
         exit(0)
 
+    if arguments.replay is not None:
+        check_exists(arguments.archive_dir, "archive-dir")
+        loader = playerstats_archive_loader(
+            arguments.archive_dir,
+            None if arguments.replay == "latest" else arguments.replay,
+        )
+        import_playerstats_from_loader(
+            loader,
+            arguments.database_url,
+            origin="Archive",
+            only_changes=arguments.only_changes,
+            force=arguments.force,
+        )
+        exit(0)
+
+    if arguments.backfill is not None:
+        imported_stats = backfill_playerstats(
+            arguments.backfill,
+            arguments.database_url,
+            arguments.processes,
+            arguments.chunk_size,
+            arguments.only_changes,
+        )
+        logging.info(f"Backfill completed: {imported_stats} player stats imported")
+        exit(0)
+
     if arguments.source_csv is not None:
-        loader = playerstats_csv_loader(arguments.source_csv)
+        import_playerstats_from_csv(
+            arguments.source_csv,
+            arguments.database_url,
+            arguments.chunk_size,
+            arguments.only_changes,
+            arguments.force,
+        )
     else:
         check_exists(arguments.hm_user, "hm-user")
         check_exists(arguments.hm_password, "hm-password")
-        loader = playerstats_ajax_loader(arguments.hm_user, arguments.hm_password)
-
-    import_playerstats_from_loader(loader, arguments.database_url)
+        import_playerstats_from_ajax(
+            arguments.database_url,
+            arguments.hm_user,
+            arguments.hm_password,
+            arguments.workers,
+            arguments.incremental,
+            arguments.archive_dir,
+            arguments.only_changes,
+            arguments.force,
+        )
@@ -1,6 +1,7 @@
 import logging
 
 from hmtracker.database import models
+from hmtracker.loader import IMPORT_ROWS
 from hmtracker.database.repository import RepositorySession
 
 
@@ -48,6 +49,7 @@ def import_matches(
 
     repository_session.session.add_all(new_matches)
     repository_session.session.commit()
+    IMPORT_ROWS.inc(len(new_matches) + updated_count, table=models.Match.__tablename__)
 
     logging.info(
         f"Imported {len(new_matches)} new matches, updated {updated_count} existing matches"
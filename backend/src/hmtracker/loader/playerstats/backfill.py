@@ -0,0 +1,202 @@
+import glob
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date
+from itertools import groupby, islice
+from operator import itemgetter
+
+from sqlalchemy import select
+
+from hmtracker.database import models
+from hmtracker.database.repository import RepositorySession
+from hmtracker.loader.playerstats.importer import import_hockey_stats_chunks
+from hmtracker.loader.playerstats.mapper import DEFAULT_CHUNK_SIZE, map_player_stats
+from hmtracker.loader.playerstats.source.file import iter_csv
+
+BACKFILL_ORIGIN = "Backfill"
+BACKFILL_INCOMPLETE_ORIGIN = "Backfill (incomplete)"
+
+_Chunk = tuple[list[models.HockeyPlayer], list[models.HockeyPlayerStats]]
+
+
+def find_snapshot_files(source: str) -> list[str]:
+    """
+    :param source: directory searched recursively for csv files, or a glob pattern
+    :return: the absolute paths of the snapshot files
+    """
+    pattern = os.path.join(source, "**", "*.csv") if os.path.isdir(source) else source
+    return sorted(
+        os.path.abspath(path)
+        for path in glob.glob(pattern, recursive=True)
+        if os.path.isfile(path)
+    )
+
+
+def first_validity_date(csv_file_path: str) -> date:
+    """
+    :return: the date of the first row of the file, date.max if it has none
+    """
+    for row in iter_csv(csv_file_path):
+        try:
+            return date.fromisoformat(row.get("date") or "")
+        except ValueError:
+            return date.max
+    return date.max
+
+
+def imported_snapshot_files(repository_session: RepositorySession) -> set[str]:
+    """
+    :return: the files whose backfill completed
+    """
+    return set(
+        repository_session.session.execute(
+            select(models.StatImport.comment).where(
+                models.StatImport.origin == BACKFILL_ORIGIN
+            )
+        ).scalars()
+    )
+
+
+def incomplete_importation(
+    repository_session: RepositorySession, csv_file_path: str
+) -> models.StatImport | None:
+    """
+    :return: the importation of the file left by an interrupted backfill, if any
+    """
+    return (
+        repository_session.session.execute(
+            select(models.StatImport)
+            .where(
+                models.StatImport.origin == BACKFILL_INCOMPLETE_ORIGIN,
+                models.StatImport.comment == csv_file_path,
+            )
+            .order_by(models.StatImport.id)
+        )
+        .scalars()
+        .first()
+    )
+
+
+def _rows_by_chunk(
+    files: list[str], chunk_size: int
+) -> Iterator[tuple[str, list[dict[str, str]] | None]]:
+    """
+    :return: the rows of the files by chunks, each file ends with None so that an
+        empty file is imported too
+    """
+    for csv_file_path in files:
+        rows = iter_csv(csv_file_path)
+        while chunk := list(islice(rows, chunk_size)):
+            yield csv_file_path, chunk
+        yield csv_file_path, None
+
+
+def _mapped_in_order(
+    executor: ProcessPoolExecutor, files: list[str], chunk_size: int, window: int
+) -> Iterator[tuple[str, Iterator[_Chunk]]]:
+    """
+    Map the chunks of the files in the worker processes, at most window chunks ahead
+    of the writer so that only those are in memory
+    :return: the chunks of each file, in the order of the files. The chunks of a file
+        are mapped as they are consumed
+    """
+
+    def submit(
+        item: tuple[str, list[dict[str, str]] | None],
+    ) -> tuple[str, Future | None]:
+        csv_file_path, rows = item
+        if rows is None:
+            return csv_file_path, None
+        # Runs in the worker processes, the mapped objects are pickled back
+        return csv_file_path, executor.submit(map_player_stats, rows)
+
+    remaining_chunks = _rows_by_chunk(files, chunk_size)
+    pending: deque[tuple[str, Future | None]] = deque(
+        submit(item) for item in islice(remaining_chunks, window)
+    )
+
+    def mapped_chunks() -> Iterator[tuple[str, Future | None]]:
+        while pending:
+            mapped_chunk = pending.popleft()
+            next_chunk = next(remaining_chunks, None)
+            if next_chunk is not None:
+                pending.append(submit(next_chunk))
+            yield mapped_chunk
+
+    for csv_file_path, file_chunks in groupby(mapped_chunks(), key=itemgetter(0)):
+        yield (
+            csv_file_path,
+            (future.result() for _, future in file_chunks if future is not None),
+        )
+
+
+def backfill_player_stats(
+    repository_session: RepositorySession,
+    source: str,
+    processes: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    only_changes: bool = False,
+) -> int:
+    """
+    Import many snapshot files of player stats. The files are parsed and mapped in a
+    pool of processes while this process is the single writer, importing them in
+    the order of their validity dates.
+    Each file is recorded as an importation, the files already imported by a
+    previous backfill are skipped so an interrupted backfill can be resumed, and the
+    importation of the file it was importing is completed.
+    :param repository_session:
+    :param source: directory of csv files or a glob pattern
+    :param processes: number of processes mapping the files, the number of CPUs if not set
+    :param chunk_size: number of rows imported at once
+    :param only_changes: only store the stats that changed since the latest stats
+    :return: the number of stats stored
+    """
+    files = find_snapshot_files(source)
+    already_imported = imported_snapshot_files(repository_session)
+    files_to_import = sorted(
+        (path for path in files if path not in already_imported),
+        key=lambda path: (first_validity_date(path), path),
+    )
+    logging.info(
+        f"Backfill of {len(files_to_import)} files, "
+        f"{len(files) - len(files_to_import)} already imported"
+    )
+    if not files_to_import:
+        return 0
+
+    processes = processes or os.cpu_count() or 1
+    imported_stats = 0
+    started_at = time.perf_counter()
+    # Forked workers would inherit the connections of the writer
+    with ProcessPoolExecutor(
+        processes, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        # Chunks mapped ahead, the only ones in memory with the chunk being written
+        window = 2 * processes
+        for file_number, (csv_file_path, chunks) in enumerate(
+            _mapped_in_order(executor, files_to_import, chunk_size, window), start=1
+        ):
+            # The stats already imported by an interrupted backfill are skipped
+            importation = incomplete_importation(
+                repository_session, csv_file_path
+            ) or models.StatImport(
+                origin=BACKFILL_INCOMPLETE_ORIGIN, comment=csv_file_path
+            )
+            file_stats = import_hockey_stats_chunks(
+                repository_session, chunks, importation, only_changes=only_changes
+            )
+            importation.origin = BACKFILL_ORIGIN
+            repository_session.session.commit()
+
+            imported_stats += file_stats
+            elapsed = time.perf_counter() - started_at
+            logging.info(
+                f"Backfill {file_number}/{len(files_to_import)} {csv_file_path}: "
+                f"{file_stats} stats imported, {imported_stats / elapsed:.0f} stats/s"
+            )
+    return imported_stats
@@ -0,0 +1,85 @@
+import logging
+
+from sqlalchemy import Table, bindparam, delete, select
+
+from hmtracker.database import models
+from hmtracker.database.repository import RepositorySession
+from hmtracker.loader.playerstats.importer import STATS_VALUE_COLUMNS, stats_values
+from hmtracker.loader.playerstats.latest import rebuild_latest_stats
+
+_DELETE_BATCH_SIZE = 5000
+
+
+def compact_player_stats(
+    repository_session: RepositorySession, season_id: int | None = None
+) -> int:
+    """
+    Rewrite the history of the player stats into change points: delete every stats
+    whose values are identical to the previous stats of the same player and season.
+    The latest stats before a date stay the same for every date.
+    :param repository_session:
+    :param season_id: season to compact, every season if not set
+    :return: the number of deleted stats
+    """
+    table: Table = models.HockeyPlayerStats.__table__  # type: ignore[assignment]
+    session = repository_session.session
+    seasons_id = (
+        [season_id]
+        if season_id is not None
+        else session.execute(select(table.c.season_id).distinct()).scalars().all()
+    )
+
+    deleted_stats = 0
+    for compacted_season_id in seasons_id:
+        redundant_keys = _redundant_stats_keys(repository_session, compacted_season_id)
+        for start in range(0, len(redundant_keys), _DELETE_BATCH_SIZE):
+            session.execute(
+                delete(table).where(
+                    table.c.player_id == bindparam("key_player_id"),
+                    table.c.season_id == bindparam("key_season_id"),
+                    table.c.validity_date == bindparam("key_validity_date"),
+                ),
+                redundant_keys[start : start + _DELETE_BATCH_SIZE],
+            )
+        session.commit()
+        logging.info(
+            f"{len(redundant_keys)} redundant player stats deleted in season {compacted_season_id}"
+        )
+        deleted_stats += len(redundant_keys)
+    # The latest stats can be the last of identical stats, which is deleted
+    rebuild_latest_stats(repository_session, season_id)
+    return deleted_stats
+
+
+def _redundant_stats_keys(
+    repository_session: RepositorySession, season_id: int
+) -> list[dict]:
+    """
+    :return: the primary keys of the stats identical to the previous stats of the player
+    """
+    table: Table = models.HockeyPlayerStats.__table__  # type: ignore[assignment]
+    query = (
+        select(
+            table.c.player_id,
+            table.c.validity_date,
+            *(table.c[column] for column in STATS_VALUE_COLUMNS),
+        )
+        .where(table.c.season_id == season_id)
+        .order_by(table.c.player_id, table.c.validity_date)
+    )
+
+    redundant_keys = []
+    previous_player_id = None
+    previous_values = None
+    for row in repository_session.session.execute(query):
+        values = stats_values(row)
+        if row.player_id == previous_player_id and values == previous_values:
+            redundant_keys.append(
+                {
+                    "key_player_id": row.player_id,
+                    "key_season_id": season_id,
+                    "key_validity_date": row.validity_date,
+                }
+            )
+        previous_player_id, previous_values = row.player_id, values
+    return redundant_keys
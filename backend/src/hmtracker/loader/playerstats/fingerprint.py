@@ -0,0 +1,35 @@
+from collections.abc import Iterable
+from datetime import date
+from hashlib import sha256
+
+from hmtracker.loader.playerstats.mapper import FIELDS
+
+_FIELDS = list(FIELDS)
+_DATE_POSITION = _FIELDS.index("date")
+_SEPARATOR = "\x1f"
+_MODULUS = 2**256
+
+
+def content_hash(
+    player_stats_data: Iterable[dict[str, str]], default_date: date | None = None
+) -> str:
+    """
+    Fingerprint of the player stats, to recognise a snapshot already imported.
+    Only the imported fields count, stripped of spaces, and the order of the rows
+    doesn't matter: the hashes of the rows are summed, so the data can be streamed.
+    :param player_stats_data: rows of player stats, can be a generator
+    :param default_date: date of the rows without one, as they are imported with the
+        date of the import. Today if not set
+    :return: hexadecimal sha256
+    """
+    default_date_value = (default_date or date.today()).isoformat()
+    rows_sum = 0
+    rows_count = 0
+    for row in player_stats_data:
+        values = [(row.get(field) or "").strip() for field in _FIELDS]
+        if values[_DATE_POSITION] == "":
+            values[_DATE_POSITION] = default_date_value
+        row_hash = sha256(_SEPARATOR.join(values).encode("utf-8")).digest()
+        rows_sum = (rows_sum + int.from_bytes(row_hash)) % _MODULUS
+        rows_count += 1
+    return sha256(f"{rows_count}:{rows_sum:064x}".encode()).hexdigest()
@@ -1,8 +1,17 @@
 import logging
-from datetime import datetime
+from collections.abc import Iterable
+from datetime import date, datetime
 
+from sqlalchemy import Insert, Table, insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from hmtracker.common.progress import ProgressTracker
 from hmtracker.database import models
 from hmtracker.database.repository import RepositorySession
+from hmtracker.database.seasons import as_datetime
+from hmtracker.loader import IMPORT_ROWS
+from hmtracker.loader.playerstats.latest import update_latest_stats
 
 
 def import_new_players(
@@ -20,22 +29,25 @@ def import_new_players(
         logging.error("No season are currently opened, exiting")
         return
 
-    players_id = [player.id for player in players]
+    players_id_by_season: dict[int, set[int]] = {}
+    for player in players:
+        if player.season_id is None:
+            player.season_id = current_season.id
+        players_id_by_season.setdefault(player.season_id, set()).add(player.id)
+
     existing_players: set[tuple[int, int]] = {
         (player.id, player.season_id)
-        for player in repository_session.get_players(players_id, current_season.id)
+        for season_id, players_id in players_id_by_season.items()
+        for player in repository_session.get_players(list(players_id), season_id)
     }
 
     new_players = []
     for player in players:
-        if player.season_id is None:
-            player.season_id = current_season.id
-
         if (player.id, player.season_id) not in existing_players:
             existing_players.add((player.id, player.season_id))
             new_players.append(player)
 
-    repository_session.session.add_all(new_players)
+    _bulk_insert(repository_session.session, models.HockeyPlayer, new_players)
     repository_session.session.commit()
 
 
@@ -46,6 +58,7 @@ def import_hockey_stats_data(
     importation: models.StatImport | None = None,
     origin: str = "Unknown",
     comment: str = "",
+    only_changes: bool = False,
 ):
     """
     Import the hockey player stats into the database.
@@ -56,43 +69,162 @@ def import_hockey_stats_data(
     :param importation: importation object in database
     :param origin: indicates the origin of the importation. ignored if importation object is provided
     :param comment: comment related to the importation ignored if importation object is provided
+    :param only_changes: only store the stats that differ from the latest stats
+        stored for the player, the latest stats before a date stay valid at that date
     :return:
     """
+    import_hockey_stats_chunks(
+        repository_session,
+        [(players, players_stats)],
+        importation,
+        origin,
+        comment,
+        only_changes,
+        total=len(players_stats),
+    )
+
+
+def import_hockey_stats_chunks(
+    repository_session: RepositorySession,
+    chunks: Iterable[tuple[list[models.HockeyPlayer], list[models.HockeyPlayerStats]]],
+    importation: models.StatImport | None = None,
+    origin: str = "Unknown",
+    comment: str = "",
+    only_changes: bool = False,
+    total: int | None = None,
+) -> int:
+    """
+    Same as import_hockey_stats_data but for chunks of players and stats,
+    each chunk is committed before the next one is consumed.
+    :param repository_session:
+    :param chunks: players and their stats by chunks, can be a generator
+    :param importation: importation object in database shared by every chunk
+    :param origin: indicates the origin of the importation. ignored if importation object is provided
+    :param comment: comment related to the importation ignored if importation object is provided
+    :param only_changes: only store the stats that differ from the latest stats
+        stored for the player
+    :param total: number of stats in the chunks if known, for the progress
+    :return: the number of stats stored
+    """
+    progress = ProgressTracker("Import player stats", total)
     if importation is None:
         importation = models.StatImport(origin=origin, comment=comment)
 
-    repository_session.session.begin_nested()
+    repository_session.session.add(importation)
+    repository_session.session.flush()
 
-    _attach_seasons(repository_session, players, players_stats)
+    imported_stats = 0
+    for players, players_stats in chunks:
+        repository_session.session.begin_nested()
 
-    import_new_players(repository_session, players)
+        _attach_seasons(repository_session, players, players_stats)
 
-    _import_stats(repository_session, importation, players_stats)
+        import_new_players(repository_session, players)
 
-    repository_session.session.commit()
+        imported_stats += _import_stats(
+            repository_session, importation, players_stats, only_changes
+        )
+
+        repository_session.session.commit()
+        progress.advance(len(players_stats))
+    progress.finish()
+    return imported_stats
 
 
 def _import_stats(
     database_session: RepositorySession,
     importation,
     players_stats: list[models.HockeyPlayerStats],
-):
+    only_changes: bool = False,
+) -> int:
+    """
+    :return: the number of stats stored
+    """
     database_session.session.begin_nested()
     current_season: models.Season | None = database_session.get_current_season()
 
     if current_season is None:
         logging.error("No season are currently opened, exiting")
-        return
+        return 0
 
+    import_id = importation.id
     for stats in players_stats:
-        stats.importation = importation
+        stats.import_id = import_id
         if stats.season_id is None:
             stats.season_id = current_season.id
         if stats.validity_date is None:
             stats.validity_date = datetime.now()
 
-    database_session.session.add(importation)
+    if only_changes:
+        all_stats_count = len(players_stats)
+        players_stats = _changed_stats(database_session, players_stats)
+        logging.info(
+            f"{len(players_stats)}/{all_stats_count} player stats changed since their latest stats"
+        )
+
+    players_stats = _bulk_insert(
+        database_session.session,
+        models.HockeyPlayerStats,
+        players_stats,
+        ignored_columns=("import_id",),
+    )
+    update_latest_stats(database_session.session, players_stats)
     database_session.session.commit()
+    return len(players_stats)
+
+
+def _changed_stats(
+    database_session: RepositorySession,
+    players_stats: list[models.HockeyPlayerStats],
+) -> list[models.HockeyPlayerStats]:
+    """
+    :return: the stats whose values differ from the previous stats of the player,
+        either stored or earlier in the list
+    """
+    stats_by_season: dict[int, list[models.HockeyPlayerStats]] = {}
+    # Dates of the csv files are parsed as date without time
+    for stats in sorted(
+        players_stats, key=lambda stats: as_datetime(stats.validity_date)
+    ):
+        stats_by_season.setdefault(stats.season_id, []).append(stats)
+
+    changed_stats = []
+    for season_id, season_stats in stats_by_season.items():
+        previous_values = {
+            stored_stats.player_id: stats_values(stored_stats)
+            for stored_stats in database_session.get_player_stats_at_date(
+                list({stats.player_id for stats in season_stats}),
+                as_datetime(season_stats[0].validity_date),
+                season_id,
+            )
+        }
+        for stats in season_stats:
+            values = stats_values(stats)
+            if previous_values.get(stats.player_id) != values:
+                previous_values[stats.player_id] = values
+                changed_stats.append(stats)
+    return changed_stats
+
+
+STATS_VALUE_COLUMNS = (
+    "price",
+    "club",
+    "ownership",
+    "hm_points",
+    "appearances",
+    "goal",
+    "assists",
+    "penalties",
+    "plus_minus",
+)
+
+
+def stats_values(stats) -> tuple:
+    """
+    :param stats: player stats or a row with the same columns
+    :return: the values that make a change point in the player history
+    """
+    return tuple(getattr(stats, column) for column in STATS_VALUE_COLUMNS)
 
 
 def _attach_seasons(
@@ -109,14 +241,125 @@ def _attach_seasons(
         for stats in players_stats
         if stats.validity_date is not None
     }
-    season_for_date = {
-        validity_date: database_session.find_season(validity_date, arcade)
+    season_id_for_date = {
+        validity_date: database_session.find_season(validity_date, arcade).id
         for validity_date in all_validity_date
     }
 
     for player, stats in zip(players, players_stats):
         if stats.validity_date is None:
             continue
-        season_id = season_for_date[stats.validity_date].id
+        season_id = season_id_for_date[stats.validity_date]
         player.season_id = season_id
         stats.season_id = season_id
+
+
+def _bulk_insert(
+    session: Session,
+    model: type[models.HMDatabaseObject],
+    objects: list,
+    ignored_columns: tuple[str, ...] = (),
+) -> list:
+    """
+    Insert the objects in one executemany through SQLAlchemy Core, skipping the
+    unit of work of the ORM. The objects are not added to the session.
+    Rows whose primary key already exists are skipped on SQLite and PostgreSQL,
+    other databases fail on them. A warning is logged when a skipped row differs
+    from the stored one.
+    :param session:
+    :param model: mapped class of the objects
+    :param objects:
+    :param ignored_columns: columns not compared between a skipped row and the
+        stored one
+    :return: the objects actually inserted
+    """
+    if not objects:
+        return []
+    table: Table = model.__table__  # type: ignore[assignment]
+    columns = [column.key for column in table.columns]
+    key_columns = [column.key for column in table.primary_key.columns]
+    rows = [{column: getattr(obj, column) for column in columns} for obj in objects]
+
+    dialect = session.get_bind().dialect.name
+    statement: Insert
+    if dialect == "sqlite":
+        statement = sqlite.insert(table).on_conflict_do_nothing()
+    elif dialect == "postgresql":
+        statement = postgresql.insert(table).on_conflict_do_nothing()
+    else:
+        session.execute(insert(table), rows)
+        IMPORT_ROWS.inc(len(rows), table=table.name)
+        return objects
+
+    inserted_keys = {
+        _row_key(row)
+        for row in session.execute(
+            statement.returning(*table.primary_key.columns), rows
+        )
+    }
+    inserted, skipped = [], []
+    for obj, row in zip(objects, rows):
+        key = _row_key(row[column] for column in key_columns)
+        if key in inserted_keys:
+            # A key repeated in the objects is only inserted once
+            inserted_keys.discard(key)
+            inserted.append(obj)
+        else:
+            skipped.append(row)
+    IMPORT_ROWS.inc(len(inserted), table=table.name)
+
+    if skipped:
+        _warn_conflicting_rows(session, table, skipped, ignored_columns)
+    return inserted
+
+
+def _row_key(values: Iterable) -> tuple:
+    # Dates of the csv files are parsed as date without time
+    return tuple(
+        as_datetime(value) if isinstance(value, date) else value for value in values
+    )
+
+
+_CONFLICT_BATCH_SIZE = 500
+
+
+def _warn_conflicting_rows(
+    session: Session,
+    table: Table,
+    rows: list[dict],
+    ignored_columns: tuple[str, ...],
+):
+    """
+    Log a warning for the skipped rows that differ from the stored row with the
+    same primary key
+    """
+    key_columns = list(table.primary_key.columns)
+    compared = [
+        column.key
+        for column in table.columns
+        if not column.primary_key and column.key not in ignored_columns
+    ]
+    rows_by_key = {
+        _row_key(row[column.key] for column in key_columns): row for row in rows
+    }
+    keys = list(rows_by_key)
+
+    conflicts = []
+    for start in range(0, len(keys), _CONFLICT_BATCH_SIZE):
+        batch = keys[start : start + _CONFLICT_BATCH_SIZE]
+        for stored in session.execute(
+            select(table).where(tuple_(*key_columns).in_(batch))
+        ).mappings():
+            key = _row_key(stored[column.key] for column in key_columns)
+            row = rows_by_key[key]
+            if any(
+                _row_key([row[column]]) != _row_key([stored[column]])
+                for column in compared
+            ):
+                conflicts.append(key)
+
+    if conflicts:
+        logging.warning(
+            f"{len(conflicts)} rows of {table.name} were not inserted because a "
+            f"different row with the same key is already stored, e.g. {conflicts[:5]}"
+        )
@@ -0,0 +1,76 @@
+import logging
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from hmtracker.database import models
+from hmtracker.database.repository import RepositorySession
+
+# HM updates the player stats some hours after a match,
+# an import done meanwhile must not hide the match
+MATCH_STATS_DELAY = timedelta(hours=24)
+
+
+def changed_players_filter(
+    repository_session: RepositorySession, at: datetime | None = None
+) -> Callable[[dict[str, str]], bool]:
+    """
+    Build a filter telling, from the players list data of HM, if the details of a
+    player can have changed since the latest stats stored for the current season.
+    A player can have changed if he has no stats yet, if his club or role changed,
+    or if his club played a match since his latest stats.
+    :param repository_session:
+    :param at: date of the load, now by default
+    :return: the filter, True if the player details need to be loaded
+    """
+    if at is None:
+        at = datetime.now()
+
+    current_season: models.Season | None = repository_session.get_current_season()
+    if current_season is None:
+        logging.warning("No season are currently opened, loading every player")
+        return lambda player: True
+
+    players = {
+        player.id: player
+        for player in repository_session.get_players(season_id=current_season.id)
+    }
+    latest_stats: dict[int, models.HockeyPlayerStatsLatest] = {
+        stats.player_id: stats
+        for stats in repository_session.get_current_player_stats(
+            list(players), current_season.id
+        )
+        or []
+    }
+
+    last_match_by_club: dict[str, datetime] = {}
+    for match in repository_session.get_matches_for_season(current_season.id):
+        if match.match_datetime > at:
+            continue
+        for club in (match.home_club, match.away_club):
+            last_match_by_club[club] = max(
+                match.match_datetime,
+                last_match_by_club.get(club, match.match_datetime),
+            )
+
+    def has_changed(player_data: dict[str, str]) -> bool:
+        try:
+            player_id = int(player_data["id"])
+        except (KeyError, ValueError):
+            return True
+
+        player = players.get(player_id)
+        stats = latest_stats.get(player_id)
+        if player is None or stats is None:
+            return True
+        if player.role != player_data.get("role") or stats.club != player_data.get(
+            "club"
+        ):
+            return True
+
+        last_match = last_match_by_club.get(stats.club)
+        return (
+            last_match is not None
+            and last_match + MATCH_STATS_DELAY > stats.validity_date
+        )
+
+    return has_changed
@@ -0,0 +1,146 @@
+import logging
+from collections.abc import Iterable
+
+from sqlalchemy import Select, Table, and_, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from hmtracker.database import models
+from hmtracker.database.repository import RepositorySession
+from hmtracker.database.seasons import as_datetime
+
+_STATS_TABLE: Table = models.HockeyPlayerStats.__table__  # type: ignore[assignment]
+_LATEST_TABLE: Table = models.HockeyPlayerStatsLatest.__table__  # type: ignore[assignment]
+_COLUMNS = [column.key for column in _LATEST_TABLE.columns]
+_KEY_COLUMNS = ("season_id", "player_id")
+
+
+def update_latest_stats(
+    session: Session, players_stats: list[models.HockeyPlayerStats]
+):
+    """
+    Replace the latest stats of the players by the given stats when they are more
+    recent, in the transaction of the session.
+    The stats need their season set.
+    :param session:
+    :param players_stats: stats just stored in HOCKEY_PLAYER_STATS
+    """
+    if not players_stats:
+        return
+    latest_by_key: dict[tuple[int, int], models.HockeyPlayerStats] = {}
+    for stats in players_stats:
+        key = (stats.season_id, stats.player_id)
+        if key not in latest_by_key or as_datetime(stats.validity_date) > as_datetime(
+            latest_by_key[key].validity_date
+        ):
+            latest_by_key[key] = stats
+    rows = [
+        {column: getattr(stats, column) for column in _COLUMNS}
+        for stats in latest_by_key.values()
+    ]
+
+    dialect = session.get_bind().dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        # No upsert, recompute the latest stats of the players from their history
+        for season_id in {season_id for season_id, _ in latest_by_key}:
+            _replace_latest_stats(
+                session,
+                season_id,
+                [
+                    player_id
+                    for stats_season_id, player_id in latest_by_key
+                    if stats_season_id == season_id
+                ],
+            )
+        return
+
+    statement = (
+        sqlite.insert(_LATEST_TABLE)
+        if dialect == "sqlite"
+        else postgresql.insert(_LATEST_TABLE)
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=_KEY_COLUMNS,
+        set_={
+            column: statement.excluded[column]
+            for column in _COLUMNS
+            if column not in _KEY_COLUMNS
+        },
+        where=statement.excluded.validity_date > _LATEST_TABLE.c.validity_date,
+    )
+    session.execute(statement, rows)
+
+
+def _latest_stats_query(
+    season_id: int | None = None, player_ids: Iterable[int] | None = None
+) -> Select:
+    """
+    :return: the latest stats of each player and season in HOCKEY_PLAYER_STATS
+    """
+    filters = []
+    if season_id is not None:
+        filters.append(_STATS_TABLE.c.season_id == season_id)
+    if player_ids is not None:
+        filters.append(_STATS_TABLE.c.player_id.in_(player_ids))
+    latest_dates = (
+        select(
+            _STATS_TABLE.c.season_id,
+            _STATS_TABLE.c.player_id,
+            func.max(_STATS_TABLE.c.validity_date).label("max_date"),
+        )
+        .where(*filters)
+        .group_by(_STATS_TABLE.c.season_id, _STATS_TABLE.c.player_id)
+        .subquery()
+    )
+    return select(*(_STATS_TABLE.c[column] for column in _COLUMNS)).join(
+        latest_dates,
+        and_(
+            _STATS_TABLE.c.season_id == latest_dates.c.season_id,
+            _STATS_TABLE.c.player_id == latest_dates.c.player_id,
+            _STATS_TABLE.c.validity_date == latest_dates.c.max_date,
+        ),
+    )
+
+
+def _replace_latest_stats(
+    session: Session, season_id: int | None, player_ids: list[int] | None = None
+):
+    filters = []
+    if season_id is not None:
+        filters.append(_LATEST_TABLE.c.season_id == season_id)
+    if player_ids is not None:
+        filters.append(_LATEST_TABLE.c.player_id.in_(player_ids))
+    session.execute(delete(_LATEST_TABLE).where(*filters))
+    session.execute(
+        insert(_LATEST_TABLE).from_select(
+            _COLUMNS, _latest_stats_query(season_id, player_ids)
+        )
+    )
+
+
+def rebuild_latest_stats(
+    repository_session: RepositorySession, season_id: int | None = None
+) -> int:
+    """
+    Recompute HOCKEY_PLAYER_STATS_LATEST from the history of the player stats
+    :param repository_session:
+    :param season_id: season to rebuild, every season if not set
+    :return: the number of latest stats that were missing, outdated or in excess
+    """
+    session = repository_session.session
+    current_query = select(_LATEST_TABLE)
+    if season_id is not None:
+        current_query = current_query.where(_LATEST_TABLE.c.season_id == season_id)
+    current = {tuple(row) for row in session.execute(current_query)}
+    expected = {tuple(row) for row in session.execute(_latest_stats_query(season_id))}
+    key_positions = [_COLUMNS.index(column) for column in _KEY_COLUMNS]
+    inconsistent_keys = {
+        tuple(row[position] for position in key_positions) for row in current ^ expected
+    }
+
+    _replace_latest_stats(session, season_id)
+    session.commit()
+    logging.info(
+        f"{len(expected)} latest player stats rebuilt, {len(inconsistent_keys)} were inconsistent"
+    )
+    return len(inconsistent_keys)
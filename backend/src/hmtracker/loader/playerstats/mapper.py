@@ -1,9 +1,13 @@
 import logging
+from collections.abc import Iterable, Iterator
 from datetime import date
+from itertools import islice
 from typing import Any
 
 from hmtracker.database import models
 
+DEFAULT_CHUNK_SIZE = 5000
+
 
 def _to_float(value: str) -> float:
     return float(value.replace(",", ".").replace("%", ""))
@@ -56,63 +60,129 @@ FIELDS = {
 }
 
 
-def _try_convert(data_dict: dict[str, str], field_name: str, type_cast):
-    if field_name not in data_dict:
-        return None
-    field: str = data_dict[field_name]
-    if field == "":
-        return None
-    try:
-        return type_cast(field)
-    except Exception as exception:
+_MISSING = object()  # Field absent from the row
+_INVALID_EXAMPLES = 3
+
+
+def _convert_column(field_name: str, values: list, type_cast) -> list[Any]:
+    """
+    Convert a whole column at once. Each distinct value is converted a single time,
+    the invalid values are reported in one warning for the column.
+    :param field_name:
+    :param values: raw values of the column, _MISSING if the field is absent
+    :param type_cast: conversion of a raw value
+    :return: the converted values, None for empty, absent or invalid values
+    """
+    converted: dict[Any, Any] = {_MISSING: None, "": None}
+    invalid: dict[Any, Exception] = {}
+    for value in set(values).difference(converted):
+        try:
+            converted[value] = type_cast(value)
+        except Exception as exception:
+            converted[value] = None
+            invalid[value] = exception
+
+    if invalid:
+        invalid_count = sum(1 for value in values if value in invalid)
+        examples = ", ".join(
+            f'"{value}" ({exception})'
+            for value, exception in list(invalid.items())[:_INVALID_EXAMPLES]
+        )
         logging.warning(
-            f'Invalid field cannot convert value "{field}" into type <{type_cast.__name__}>: {exception}'
+            f'Invalid field "{field_name}" cannot convert {invalid_count} values into type <{type_cast.__name__}>: {examples}'
         )
-        return None
+    return [converted[value] for value in values]
 
 
-def _convert_data(player_stats_data: list[dict[str, str]]) -> list[dict[str, Any]]:
-    player_stats_converted: list[dict[str, Any]] = []
-    for player in player_stats_data:
-        player_converted = {
-            field_name: _try_convert(player, field_name, convertion)
-            for field_name, convertion in FIELDS.items()
-        }
-        player_stats_converted.append(player_converted)
-    return player_stats_converted
+def _convert_columns(player_stats_data: list[dict[str, str]]) -> dict[str, list[Any]]:
+    """
+    :return: the converted values of each field of FIELDS, by column
+    """
+    return {
+        field_name: _convert_column(
+            field_name,
+            [player.get(field_name, _MISSING) for player in player_stats_data],
+            convertion,
+        )
+        for field_name, convertion in FIELDS.items()
+    }
 
 
 def map_player_stats(
     player_stats_data: list[dict[str, str]],
 ) -> tuple[list[models.HockeyPlayer], list[models.HockeyPlayerStats]]:
-    player_stats_converted: list[dict[str, Any]] = _convert_data(player_stats_data)
+    columns = _convert_columns(player_stats_data)
 
     players = [
         models.HockeyPlayer(
-            id=player["id"],
-            name=player["name"],
-            role=player["role"],
-            foreigner=player["foreigner"],
+            id=player_id,
+            name=name,
+            role=role,
+            foreigner=foreigner,
+        )
+        for player_id, name, role, foreigner in zip(
+            columns["id"], columns["name"], columns["role"], columns["foreigner"]
         )
-        for player in player_stats_converted
     ]
 
     players_stats = [
         models.HockeyPlayerStats(
-            player_id=player["id"],
-            validity_date=player["date"],
-            price=player["Price"],
-            hm_points=player["HM points"],
-            appearances=player["Appareances"],
-            ownership=player["Ownership"],
-            goal=player["Goal"],
-            club=player["club"],
-            assists=None
-            if player["Assist #1"] is None
-            else player["Assist #1"] + player["Assist #2"] + player["Assist OT"],
-            penalties=player["Penalties"],
-            plus_minus=player["+/-"],
+            player_id=player_id,
+            validity_date=validity_date,
+            price=price,
+            hm_points=hm_points,
+            appearances=appearances,
+            ownership=ownership,
+            goal=goal,
+            club=club,
+            assists=None if assist_1 is None else assist_1 + assist_2 + assist_ot,
+            penalties=penalties,
+            plus_minus=plus_minus,
+        )
+        for (
+            player_id,
+            validity_date,
+            price,
+            hm_points,
+            appearances,
+            ownership,
+            goal,
+            club,
+            assist_1,
+            assist_2,
+            assist_ot,
+            penalties,
+            plus_minus,
+        ) in zip(
+            columns["id"],
+            columns["date"],
+            columns["Price"],
+            columns["HM points"],
+            columns["Appareances"],
+            columns["Ownership"],
+            columns["Goal"],
+            columns["club"],
+            columns["Assist #1"],
+            columns["Assist #2"],
+            columns["Assist OT"],
+            columns["Penalties"],
+            columns["+/-"],
         )
-        for player in player_stats_converted
     ]
     return players, players_stats
+
+
+def iter_player_stats_chunks(
+    player_stats_data: Iterable[dict[str, str]], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[tuple[list[models.HockeyPlayer], list[models.HockeyPlayerStats]]]:
+    """
+    Map the player stats by chunks, so only one chunk is in memory at a time
+    :param player_stats_data: rows of player stats, can be a generator
+    :param chunk_size: maximum number of rows in a chunk
+    :return: the players and their stats of each chunk
+    """
+    if chunk_size < 1:
+        raise ValueError("Chunks need to contain at least one row")
+    rows = iter(player_stats_data)
+    while chunk := list(islice(rows, chunk_size)):
+        yield map_player_stats(chunk)
@@ -0,0 +1,68 @@
+from collections.abc import Callable
+
+from hmtracker.parser import archive
+from hmtracker.parser.hmparser import (
+    MY_TEAM_CLUB_ID,
+    NOT_IN_MY_TEAM_CLUB_ID,
+    ParserBackend,
+    get_parser_backend,
+)
+
+
+def playerstats_archive_loader(
+    archive_directory: str,
+    snapshot_id: str | None = None,
+    parser_backend: ParserBackend | None = None,
+) -> Callable[[], list[dict[str, str]]]:
+    """
+    Replay a load from HM archived with `ResponseArchive`, without any network access.
+    :param archive_directory: directory of the archive
+    :param snapshot_id: snapshot to replay, the latest one if not set
+    :param parser_backend: backend used to scrap the archived pages
+    :return: A callable to get the data
+    """
+
+    def load_data() -> list[dict[str, str]]:
+        replayed_snapshot = snapshot_id
+        if replayed_snapshot is None:
+            snapshots = archive.list_snapshots(archive_directory)
+            if not snapshots:
+                raise FileNotFoundError(f"No snapshot archived in {archive_directory}")
+            replayed_snapshot = snapshots[-1]
+
+        backend = get_parser_backend() if parser_backend is None else parser_backend
+        started_at, responses = archive.read_snapshot(
+            archive_directory, replayed_snapshot
+        )
+
+        players_lists: dict[str, str] = {}
+        players_details: dict[str, str] = {}
+        for response in responses:
+            if response.endpoint == "transfers-classic-get-list-preview":
+                players_lists[response.parameters.get("club", "")] = response.sha256
+            elif response.endpoint == "get-player-detail":
+                players_details[response.parameters.get("id", "")] = response.sha256
+
+        players_data: list[dict[str, str]] = []
+        for club in (NOT_IN_MY_TEAM_CLUB_ID, MY_TEAM_CLUB_ID):
+            if str(club) in players_lists:
+                players_data += backend.scrap_players_html_list(
+                    archive.read_payload(archive_directory, players_lists[str(club)])
+                )
+
+        replayed_players = []
+        for player in players_data:
+            if player["id"] not in players_details:
+                continue  # Details weren't loaded during the snapshot
+            player.update(
+                backend.scrap_player_details(
+                    archive.read_payload(
+                        archive_directory, players_details[player["id"]]
+                    )
+                )
+            )
+            player["date"] = started_at.date().isoformat()
+            replayed_players.append(player)
+        return replayed_players
+
+    return load_data
@@ -1,5 +1,5 @@
 import csv
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
 
 __DELIMITER = ";"
 __ENCODING = "utf-8-sig"
@@ -10,6 +10,14 @@ def playerstats_csv_loader(csv_file_path: str) -> Callable[[], list[dict[str, st
 
 
 def load_csv(csv_file_path: str) -> list[dict[str, str]]:
+    return list(iter_csv(csv_file_path))
+
+
+def iter_csv(csv_file_path: str) -> Iterator[dict[str, str]]:
+    """
+    Read the csv file row by row, without loading it in memory
+    :param csv_file_path:
+    :return: the rows of the csv file
+    """
     with open(csv_file_path, encoding=__ENCODING) as csv_file:
-        reader = csv.DictReader(csv_file, delimiter=__DELIMITER, quotechar='"')
-        return list(reader)
+        yield from csv.DictReader(csv_file, delimiter=__DELIMITER, quotechar='"')
@@ -1,29 +1,107 @@
+import logging
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 
+from hmtracker.common.progress import ProgressTracker
+from hmtracker.parser.archive import ResponseArchive
 from hmtracker.parser.hmparser import HMAjaxScrapper
 
+DEFAULT_DETAIL_WORKERS = 8
+
 
 def playerstats_ajax_loader(
-    user: str, password: str
+    user: str,
+    password: str,
+    max_workers: int = DEFAULT_DETAIL_WORKERS,
+    details_filter: Callable[[dict[str, str]], bool] | None = None,
+    archive_directory: str | None = None,
 ) -> Callable[[], list[dict[str, str]]]:
     """
     :param user: login for Hockey manager website
     :param password:
+    :param max_workers: maximum number of player details fetched concurrently
+    :param details_filter: if provided, only the players of the list for which
+        it returns True get their details loaded, the others are left out
+    :param archive_directory: if provided, archive the responses of HM in it
     :return: A callable to get the data
     """
     if user is None or password is None:
         raise ConnectionRefusedError("User password to connect to HM are not provided")
+    if max_workers < 1:
+        raise ValueError("At least one worker is needed to load the player details")
 
     def load_data():
-        parser = HMAjaxScrapper()
+        archive = (
+            None if archive_directory is None else ResponseArchive(archive_directory)
+        )
+        parser = HMAjaxScrapper(pool_size=max_workers, archive=archive)
         try:
             parser.connect_to_hm(user, password)
 
             players_data = parser.get_all_players()
-            for player in players_data:
-                player.update(parser.get_player_stats(player["id"]))
+            if details_filter is not None:
+                all_players_count = len(players_data)
+                players_data = [
+                    player for player in players_data if details_filter(player)
+                ]
+                logging.info(
+                    f"Loading details of {len(players_data)}/{all_players_count} players"
+                )
+            players_data = _load_players_details(parser, players_data, max_workers)
         finally:
             parser.close_session()
+            if archive is not None:
+                archive.close()
         return players_data
 
     return load_data
+
+
+def _load_players_details(
+    parser: HMAjaxScrapper, players_data: list[dict[str, str]], max_workers: int
+) -> list[dict[str, str]]:
+    """
+    Fetch the details of every player with a bounded pool of workers sharing the
+    parser session, and merge them into the player data.
+    Players whose details couldn't be fetched are logged and left out of the result.
+    :param parser: connected scrapper
+    :param players_data: players as returned by the players list
+    :param max_workers: maximum number of concurrent requests
+    :return: the players with their details
+    """
+
+    progress = ProgressTracker("Load player details", total=len(players_data))
+
+    def fetch(player: dict[str, str]) -> dict[str, str] | Exception:
+        try:
+            return parser.get_player_stats(player["id"])
+        except Exception as exception:
+            return exception
+        finally:
+            progress.advance()
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="hm-player-detail"
+    ) as executor:
+        details = list(executor.map(fetch, players_data))
+    progress.finish()
+
+    loaded_players = []
+    failed_players = []
+    for player, player_details in zip(players_data, details):
+        if isinstance(player_details, Exception):
+            logging.warning(
+                f"Couldn't load details of player {player['id']}: {player_details}"
+            )
+            failed_players.append(player["id"])
+            continue
+        player.update(player_details)
+        loaded_players.append(player)
+
+    if failed_players:
+        logging.error(
+            f"Details of {len(failed_players)}/{len(players_data)} players couldn't be loaded: {failed_players}"
+        )
+        if not loaded_players:
+            raise ConnectionError("Couldn't load the details of any player")
+    return loaded_players
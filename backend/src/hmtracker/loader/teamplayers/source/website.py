@@ -1,6 +1,6 @@
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
 
-from hmtracker.parser.hmparser import HMAjaxScrapper
+from hmtracker.parser.hmparser import AsyncHMScrapper, HMAjaxScrapper
 
 
 def team_players_ajax_loader(user: str, password: str) -> Callable:
@@ -36,3 +36,40 @@ def team_players_ajax_loader(user: str, password: str) -> Callable:
         return teams_players
 
     return load_data
+
+
+def team_players_async_loader(
+    user: str, password: str
+) -> Callable[[], Awaitable[dict[str, list[int]]]]:
+    """
+    Same as team_players_ajax_loader but the returned loader has to be awaited.
+    :param user: user login
+    :param password: user password
+    :return: the coroutine function to load the hockey players in the user team
+    """
+    if user is None or password is None:
+        raise ConnectionRefusedError("User password to connect to HM are not provided")
+
+    async def load_data() -> dict[str, list[int]]:
+        parser = AsyncHMScrapper()
+        teams_players = dict()
+        try:
+            await parser.connect_to_hm(user, password)
+
+            teams = await parser.get_teams()
+
+            for team in teams:
+                team_id = team["id"]
+                await parser.select_team(team_id)
+                try:
+                    teams_players[team_id] = [
+                        player["id"] for player in await parser.get_current_team()
+                    ]
+                except Exception:
+                    pass  # Team is possibly not created
+
+        finally:
+            await parser.close_session()
+        return teams_players
+
+    return load_data
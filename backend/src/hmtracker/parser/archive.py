@@ -0,0 +1,165 @@
+import gzip
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from hashlib import sha256
+from queue import Queue
+from threading import Thread, get_ident
+from urllib.parse import parse_qsl
+
+_OBJECTS_FOLDER = "objects"
+_SNAPSHOTS_FOLDER = "snapshots"
+_SNAPSHOT_EXTENSION = ".jsonl"
+_ENCODING = "utf-8"
+
+# Parameters of the queries that are never archived
+_IGNORED_PARAMETERS = {"randomNumber", "fh_u", "fh_p"}
+
+
+@dataclass
+class ArchivedResponse:
+    endpoint: str
+    parameters: dict[str, str]
+    sha256: str
+    received_at: datetime
+
+
+class ResponseArchive:
+    """
+    Archive of the raw responses received from HM.
+
+    Payloads are compressed and stored once under `objects/` by their sha256,
+    so identical payloads of different loads share the same file.
+    Each load is a snapshot listing its responses in `snapshots/<snapshot_id>.jsonl`.
+    Responses are written by a background thread to not slow the scrapping.
+    """
+
+    def __init__(self, directory: str, snapshot_id: str | None = None) -> None:
+        self.directory = directory
+        self.started_at = datetime.now()
+        self.snapshot_id = (
+            self.started_at.strftime("%Y%m%dT%H%M%S%f")
+            if snapshot_id is None
+            else snapshot_id
+        )
+        os.makedirs(os.path.join(directory, _OBJECTS_FOLDER), exist_ok=True)
+        os.makedirs(os.path.join(directory, _SNAPSHOTS_FOLDER), exist_ok=True)
+
+        self._queue: Queue[tuple[str, str, str, datetime] | None] = Queue()
+        self._writer = Thread(
+            target=self._write_responses,
+            name=f"hm-archive-{self.snapshot_id}",
+            daemon=True,
+        )
+        self._writer.start()
+
+    def record(self, endpoint: str, query_data: str, payload: str):
+        """
+        Queue a response to be archived
+        :param endpoint: endpoint of HM that was queried
+        :param query_data: url encoded data sent with the query
+        :param payload: raw response
+        """
+        self._queue.put((endpoint, query_data, payload, datetime.now()))
+
+    def close(self):
+        """
+        Wait for every queued response to be written
+        """
+        self._queue.put(None)
+        self._writer.join()
+
+    def _write_responses(self):
+        snapshot_path = _snapshot_path(self.directory, self.snapshot_id)
+        with open(snapshot_path, "a", encoding=_ENCODING) as snapshot_file:
+            snapshot_file.write(
+                json.dumps({"started_at": self.started_at.isoformat()}) + "\n"
+            )
+            while (response := self._queue.get()) is not None:
+                endpoint, query_data, payload, received_at = response
+                try:
+                    payload_hash = self._write_payload(payload)
+                except OSError as exception:
+                    logging.error(
+                        f"Couldn't archive response of {endpoint}: {exception}"
+                    )
+                    continue
+                parameters = {
+                    name: value
+                    for name, value in parse_qsl(query_data, keep_blank_values=True)
+                    if name not in _IGNORED_PARAMETERS
+                }
+                snapshot_file.write(
+                    json.dumps(
+                        {
+                            "endpoint": endpoint,
+                            "parameters": parameters,
+                            "sha256": payload_hash,
+                            "received_at": received_at.isoformat(),
+                        }
+                    )
+                    + "\n"
+                )
+
+    def _write_payload(self, payload: str) -> str:
+        content = payload.encode(_ENCODING)
+        payload_hash = sha256(content).hexdigest()
+        object_path = _object_path(self.directory, payload_hash)
+        if os.path.exists(object_path):
+            return payload_hash
+
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        temporary_path = f"{object_path}.{os.getpid()}.{get_ident()}.tmp"
+        with gzip.open(temporary_path, "wb") as object_file:
+            object_file.write(content)
+        os.replace(temporary_path, object_path)
+        return payload_hash
+
+
+def list_snapshots(directory: str) -> list[str]:
+    """
+    :return: the id of the snapshots in the archive, from the oldest to the newest
+    """
+    snapshots_folder = os.path.join(directory, _SNAPSHOTS_FOLDER)
+    if not os.path.isdir(snapshots_folder):
+        return []
+    return sorted(
+        file_name[: -len(_SNAPSHOT_EXTENSION)]
+        for file_name in os.listdir(snapshots_folder)
+        if file_name.endswith(_SNAPSHOT_EXTENSION)
+    )
+
+
+def read_snapshot(
+    directory: str, snapshot_id: str
+) -> tuple[datetime, list[ArchivedResponse]]:
+    """
+    :return: the start of the snapshot and its responses in reception order
+    """
+    with open(_snapshot_path(directory, snapshot_id), encoding=_ENCODING) as file:
+        header = json.loads(file.readline())
+        responses = [
+            ArchivedResponse(
+                endpoint=entry["endpoint"],
+                parameters=entry["parameters"],
+                sha256=entry["sha256"],
+                received_at=datetime.fromisoformat(entry["received_at"]),
+            )
+            for entry in map(json.loads, file)
+        ]
+    return datetime.fromisoformat(header["started_at"]), responses
+
+
+def read_payload(directory: str, payload_hash: str) -> str:
+    with gzip.open(_object_path(directory, payload_hash), "rb") as object_file:
+        return object_file.read().decode(_ENCODING)
+
+
+def _snapshot_path(directory: str, snapshot_id: str) -> str:
+    return os.path.join(directory, _SNAPSHOTS_FOLDER, snapshot_id + _SNAPSHOT_EXTENSION)
+
+
+def _object_path(directory: str, payload_hash: str) -> str:
+    return os.path.join(directory, _OBJECTS_FOLDER, payload_hash[:2], payload_hash)
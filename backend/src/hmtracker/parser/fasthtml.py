@@ -0,0 +1,268 @@
+"""
+Streaming extraction of the Hockey Manager fields without building a DOM.
+
+Each scrapper tokenizes the page once and only keeps the few elements it needs.
+The results are the same as the BeautifulSoup implementations of hmparser
+("html.parser" tree builder): same element nesting rules, same `.text` content.
+"""
+
+from html.parser import HTMLParser
+
+# Elements that are never pushed on the open elements stack (same as bs4)
+_VOID_ELEMENTS = frozenset(
+    {
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "keygen",
+        "link",
+        "menuitem",
+        "meta",
+        "param",
+        "source",
+        "track",
+        "wbr",
+        "basefont",
+        "bgsound",
+        "command",
+        "frame",
+        "image",
+        "isindex",
+        "nextid",
+        "spacer",
+    }
+)
+
+# Content of those elements is not part of the text of their parents
+_NO_TEXT_ELEMENTS = frozenset({"script", "style"})
+
+
+class _OpenElement:
+    __slots__ = ("captures", "scopes", "tag")
+
+    def __init__(self, tag: str) -> None:
+        self.tag = tag
+        self.captures: list[list[str]] = []
+        self.scopes: list[object] = []
+
+
+class _StreamingScrapper(HTMLParser):
+    """
+    Keep track of the open elements and of the text captured inside some of them.
+    Subclasses react to opening elements through `_on_element`.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._open_elements: list[_OpenElement] = []
+        self._active_captures: list[list[str]] = []
+        self._active_scopes: list[object] = []
+        self._no_text_depth = 0
+
+    def scrap(self, html: str):
+        self.feed(html)
+        self.close()
+        self._pop_to(0)
+
+    def handle_starttag(self, tag, attrs):
+        attributes = {name: "" if value is None else value for name, value in attrs}
+        element = _OpenElement(tag)
+        self._open_elements.append(element)
+        if tag in _NO_TEXT_ELEMENTS:
+            self._no_text_depth += 1
+        self._on_element(element, attributes, attributes.get("class", "").split())
+        if tag in _VOID_ELEMENTS:
+            self._pop_to(len(self._open_elements) - 1)
+
+    def handle_endtag(self, tag):
+        for index in range(len(self._open_elements) - 1, -1, -1):
+            if self._open_elements[index].tag == tag:
+                self._pop_to(index)
+                return
+
+    def handle_data(self, data):
+        if self._no_text_depth:
+            return
+        for capture in self._active_captures:
+            capture.append(data)
+
+    def unknown_decl(self, data):
+        if data.upper().startswith("CDATA["):
+            self.handle_data(data[len("CDATA[") :])
+
+    def _on_element(
+        self, element: _OpenElement, attributes: dict[str, str], classes: list[str]
+    ):
+        pass
+
+    def _capture_text(self, element: _OpenElement) -> list[str]:
+        """
+        :return: buffer receiving the text of the element until it is closed
+        """
+        capture: list[str] = []
+        element.captures.append(capture)
+        self._active_captures.append(capture)
+        return capture
+
+    def _open_scope(self, element: _OpenElement, scope: object):
+        """
+        Register an object that stays active until the element is closed
+        """
+        element.scopes.append(scope)
+        self._active_scopes.append(scope)
+
+    def _pop_to(self, index: int):
+        while len(self._open_elements) > index:
+            element = self._open_elements.pop()
+            if element.tag in _NO_TEXT_ELEMENTS:
+                self._no_text_depth -= 1
+            for capture in element.captures:
+                _remove_identical(self._active_captures, capture)
+            for scope in element.scopes:
+                _remove_identical(self._active_scopes, scope)
+
+
+def _remove_identical(items: list, item: object):
+    """Remove the item itself, not the first item equal to it"""
+    for index in range(len(items) - 1, -1, -1):
+        if items[index] is item:
+            del items[index]
+            return
+
+
+class _PlayerRow:
+    __slots__ = ("club", "foreigner", "id", "name", "role")
+
+    def __init__(self, player_id: str) -> None:
+        self.id = player_id
+        self.name: list[str] | None = None
+        self.club: str | None = None
+        self.role: list[str] | None = None
+        self.foreigner = False
+
+    def to_dict(self) -> dict[str, str]:
+        if self.name is None:
+            raise IndexError("Player row has no name")
+        return {
+            "id": self.id,
+            "name": "".join(self.name),
+            "club": "" if self.club is None else self.club,
+            "role": "" if self.role is None else "".join(self.role),
+            "foreigner": str(self.foreigner),
+        }
+
+
+class _PlayersListScrapper(_StreamingScrapper):
+    def __init__(self) -> None:
+        super().__init__()
+        self.rows: list[_PlayerRow] = []
+
+    def _on_element(self, element, attributes, classes):
+        for row in self._active_scopes:
+            assert isinstance(row, _PlayerRow)
+            if row.name is None and "name" in classes:
+                row.name = self._capture_text(element)
+            if row.club is None and element.tag == "img":
+                row.club = attributes.get("src", "/").split("/")[-2]
+            if row.role is None and element.tag == "div":
+                row.role = self._capture_text(element)
+            if "ch" in classes:
+                row.foreigner = True
+        if "row" in classes:
+            row = _PlayerRow(attributes["attr"])
+            self.rows.append(row)
+            self._open_scope(element, row)
+
+
+class _PlayerDetailsScrapper(_StreamingScrapper):
+    def __init__(self) -> None:
+        super().__init__()
+        self.details: dict[str, str] = {}
+
+    def _on_element(self, element, attributes, classes):
+        if "histogram" in classes and "horiz" in classes:
+            self.details[attributes["label"]] = attributes["value"]
+
+
+class _Team:
+    __slots__ = ("id", "name", "rank")
+
+    def __init__(self, team_id: str) -> None:
+        self.id = team_id
+        self.name: list[str] | None = None
+        self.rank: list[str] | None = None
+
+
+class _DashboardScrapper(_StreamingScrapper):
+    def __init__(self) -> None:
+        super().__init__()
+        self.logo: list[str] | None = None
+        self.teams: list[_Team] = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.logo is not None and self._logo_open():
+            self.logo.append(self.get_starttag_text() or "")
+        super().handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if self.logo is not None and self._logo_open():
+            self.logo.append(f"</{tag}>")
+        super().handle_endtag(tag)
+
+    def _logo_open(self) -> bool:
+        return any(scope is self.logo for scope in self._active_scopes)
+
+    def _on_element(self, element, attributes, classes):
+        for team in self._active_scopes:
+            if not isinstance(team, _Team):
+                continue
+            if team.name is None and "team-name" in classes:
+                team.name = self._capture_text(element)
+            if team.rank is None and "team-rank" in classes:
+                team.rank = self._capture_text(element)
+        if self.logo is None and "logo-hm" in classes:
+            self.logo = self._capture_text(element)
+            self.logo.append(self.get_starttag_text() or "")
+            self._open_scope(element, self.logo)
+        if "is-a-team" in classes and "selectTeam" in classes:
+            team = _Team(attributes["attr"])
+            self.teams.append(team)
+            self._open_scope(element, team)
+
+
+def scrap_player_details(player_details_html: str) -> dict[str, str]:
+    scrapper = _PlayerDetailsScrapper()
+    scrapper.scrap(player_details_html)
+    return scrapper.details
+
+
+def scrap_players_html_list(player_html_list: str) -> list[dict[str, str]]:
+    scrapper = _PlayersListScrapper()
+    scrapper.scrap(player_html_list)
+    return [row.to_dict() for row in scrapper.rows]
+
+
+def scrap_dashboard(
+    dashboard_html: str,
+) -> tuple[bool, list[tuple[str, str | None, str | None]]]:
+    """
+    :return: whether the dashboard is in arcade mode and the (id, name, rank text)
+        of each team. Name or rank are None if the team has none.
+    """
+    scrapper = _DashboardScrapper()
+    scrapper.scrap(dashboard_html)
+    is_arcade = scrapper.logo is not None and "arcade" in "".join(scrapper.logo)
+    teams = [
+        (
+            team.id,
+            None if team.name is None else "".join(team.name),
+            None if team.rank is None else "".join(team.rank),
+        )
+        for team in scrapper.teams
+    ]
+    return is_arcade, teams
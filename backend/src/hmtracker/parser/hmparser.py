@@ -1,12 +1,24 @@
-from urllib.parse import quote
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from os import getenv
+from urllib.parse import quote, urlparse
 from random import randint
 import logging
 import bs4.element
+import httpx
 import requests
 from bs4 import BeautifulSoup, Tag
 from requests import Session
+from requests.adapters import HTTPAdapter
 
-from hmtracker.common.constants import HM_URL
+from hmtracker.common.constants import (
+    HM_URL,
+    HM_BASE_URL_ENV_NAME,
+    HM_PARSER_BACKEND_ENV_NAME,
+)
+from hmtracker.parser import fasthtml
+from hmtracker.parser.archive import ResponseArchive
+from hmtracker.parser.requester import AsyncHMRequester, HMRequester, RetryPolicy
 
 AJAX_URL = HM_URL + "ajaxrequest/"
 
@@ -26,6 +38,13 @@ AJAX_REQUEST_HEADER = {
     "X-Requested-With": "XMLHttpRequest",
 }
 
+# httpx keeps a user provided Content-Length, so let it compute its own
+ASYNC_AJAX_REQUEST_HEADER = {
+    name: value
+    for name, value in AJAX_REQUEST_HEADER.items()
+    if name != "Content-Length"
+}
+
 PAGE_REQUEST_HEADER = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
     "Accept-Language": "en-US,en;q=0.5",
@@ -43,34 +62,198 @@ MY_TEAM_CLUB_ID = -1
 
 NOT_IN_MY_TEAM_CLUB_ID = 0
 
+DASHBOARD_MAX_ATTEMPTS = 5
+
 
 class ScrappingError(Exception):
     """Exception for scrapping"""
 
 
-class HMAjaxScrapper:
+@dataclass
+class Dashboard:
+    """Data of the HM dashboard needed for navigation"""
+
+    arcade: bool
+    teams: list[tuple[str, str | None, str | None]]  # id, name, rank text
+
+
+class ParserBackend(ABC):
+    """Extract the data from the HTML pages returned by HM"""
+
+    @abstractmethod
+    def scrap_player_details(self, player_details_html: str) -> dict[str, str]:
+        pass
+
+    @abstractmethod
+    def scrap_players_html_list(self, player_html_list: str) -> list[dict[str, str]]:
+        pass
+
+    @abstractmethod
+    def scrap_dashboard(self, dashboard_html: str) -> Dashboard:
+        pass
+
+
+class SoupParserBackend(ParserBackend):
+    """Build the full BeautifulSoup tree of each page"""
+
+    def scrap_player_details(self, player_details_html: str) -> dict[str, str]:
+        return _scrap_player_details(player_details_html)
+
+    def scrap_players_html_list(self, player_html_list: str) -> list[dict[str, str]]:
+        return _scrap_players_html_list(player_html_list)
+
+    def scrap_dashboard(self, dashboard_html: str) -> Dashboard:
+        dashboard_soup = BeautifulSoup(dashboard_html, features="html.parser")
+        return Dashboard(
+            arcade=bool(_is_arcade(dashboard_soup)),
+            teams=_scrap_teams(dashboard_soup),
+        )
+
+
+class StreamingParserBackend(ParserBackend):
     """
-    Scrapper for HockeyManager website
+    Only extract the needed fields while tokenizing the page.
+    Fall back to BeautifulSoup if the page can't be scrapped.
     """
 
     def __init__(self) -> None:
+        self.fallback = SoupParserBackend()
+
+    def scrap_player_details(self, player_details_html: str) -> dict[str, str]:
+        try:
+            return fasthtml.scrap_player_details(player_details_html)
+        except Exception as exception:
+            logging.debug(f"Streaming scrap of player details failed: {exception}")
+            return self.fallback.scrap_player_details(player_details_html)
+
+    def scrap_players_html_list(self, player_html_list: str) -> list[dict[str, str]]:
+        try:
+            return fasthtml.scrap_players_html_list(player_html_list)
+        except Exception as exception:
+            logging.debug(f"Streaming scrap of players list failed: {exception}")
+            return self.fallback.scrap_players_html_list(player_html_list)
+
+    def scrap_dashboard(self, dashboard_html: str) -> Dashboard:
+        try:
+            arcade, teams = fasthtml.scrap_dashboard(dashboard_html)
+            return Dashboard(arcade=arcade, teams=teams)
+        except Exception as exception:
+            logging.debug(f"Streaming scrap of dashboard failed: {exception}")
+            return self.fallback.scrap_dashboard(dashboard_html)
+
+
+PARSER_BACKENDS: dict[str, type[ParserBackend]] = {
+    "soup": SoupParserBackend,
+    "streaming": StreamingParserBackend,
+}
+
+
+def get_hm_url(base_url: str | None = None) -> str:
+    """
+    :param base_url: url of HM, if not set use environment variable
+        HM_BASE_URL or the HM website
+    :return: url of HM ending with a slash
+    """
+    hm_url = getenv(HM_BASE_URL_ENV_NAME, HM_URL) if base_url is None else base_url
+    return hm_url if hm_url.endswith("/") else hm_url + "/"
+
+
+def _ajax_request_header(hm_url: str, header: dict[str, str]) -> dict[str, str]:
+    """
+    :return: the ajax request header addressed to the given HM url
+    """
+    return {
+        **header,
+        "Host": urlparse(hm_url).netloc,
+        "Origin": hm_url,
+        "Referer": hm_url,
+    }
+
+
+def get_parser_backend(name: str | None = None) -> ParserBackend:
+    """
+    :param name: name of the backend, if not set use environment variable
+        HM_PARSER_BACKEND or the streaming backend
+    :return: the parser backend
+    """
+    if name is None:
+        name = getenv(HM_PARSER_BACKEND_ENV_NAME, "streaming")
+    if name not in PARSER_BACKENDS:
+        raise ValueError(
+            f"Unknown parser backend {name}, expected one of {list(PARSER_BACKENDS)}"
+        )
+    return PARSER_BACKENDS[name]()
+
+
+@dataclass
+class _HMRequest:
+    """Request to HM, sent the same way by the sync and the async scrapper"""
+
+    method: str
+    url: str
+    headers: dict[str, str]
+    body: str | None = None
+    retry: bool = True  # False if the request mustn't be sent twice
+
+
+class _BaseHMScrapper:
+    """State shared by the sync and the async scrapper"""
+
+    def __init__(
+        self,
+        ajax_header: dict[str, str],
+        parser_backend: ParserBackend | None = None,
+        archive: ResponseArchive | None = None,
+        base_url: str | None = None,
+    ) -> None:
+        self.dashboard: Dashboard | None = None  # Cached for navigation
+        self.parser_backend = (
+            get_parser_backend() if parser_backend is None else parser_backend
+        )
+        self.archive = archive
+        self.hm_url = get_hm_url(base_url)
+        self.ajax_url = self.hm_url + "ajaxrequest/"
+        self.ajax_header = _ajax_request_header(self.hm_url, ajax_header)
+
+    def _archive(self, endpoint: str, query_data: str, payload: str):
+        if self.archive is not None:
+            self.archive.record(endpoint, query_data, payload)
+
+
+class HMAjaxScrapper(_BaseHMScrapper):
+    """
+    Scrapper for HockeyManager website
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 1,
+        parser_backend: ParserBackend | None = None,
+        archive: ResponseArchive | None = None,
+        base_url: str | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> None:
+        """
+        :param pool_size: number of connections kept open to HM,
+            should match the number of threads sharing the scrapper
+        :param parser_backend: backend used to scrap the HM pages
+        :param archive: if provided, every response received from HM is archived
+        :param base_url: url of HM, if not set use environment variable
+            HM_BASE_URL or the HM website
+        :param retry_policy: backoff of the retried requests
+        """
+        super().__init__(AJAX_REQUEST_HEADER, parser_backend, archive, base_url)
         self.session: Session | None = None
-        self.dashboard: BeautifulSoup | None = None  # Cached for navigation
+        self.pool_size = pool_size
+        self.requester = HMRequester(self.hm_url, pool_size, retry_policy)
 
     def connect_to_hm(self, user, password):
         self.session = requests.session()
-        query_data = (
-            f"fh_u={quote(user)}&fh_p={quote(password)}&randomNumber={_random_number()}"
-        )
-
-        response = self.session.post(
-            AJAX_URL + "try-login", query_data, headers=AJAX_REQUEST_HEADER
+        self.session.mount(
+            self.hm_url,
+            HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size),
         )
-        connection_success = response.status_code == 200 and "1" == response.text
-        if not connection_success:
-            raise ConnectionError(
-                f"Couldn't connect to Hockey Manager: <{response.status_code}>\n{response.text}"
-            )
+        _check_login(self._send(_login_request(self, user, password)))
         self._load_main_dashboard()
 
     def get_all_players(self):
@@ -84,99 +267,44 @@ class HMAjaxScrapper:
             logging.warning(
                 "Couldn't get player team, maybe the admin still doesn't have a team. "
             )
-        return _scrap_players_html_list(player_html_list)
+        return self.parser_backend.scrap_players_html_list(player_html_list)
 
     def get_player_stats(self, player_id):
         """
         :param player_id:
         :return: dictionary of statistics for a given player
         """
-        session = self._get_open_session()
-        query_data = f"id={player_id}"
-        logging.debug(f"==> POST get-player-detail {player_id} {{{query_data}}}")
-        response = session.post(
-            AJAX_URL + "get-player-detail", query_data, headers=AJAX_REQUEST_HEADER
-        )
+        request = _player_details_request(self, player_id)
+        logging.debug(f"==> POST get-player-detail {player_id} {{{request.body}}}")
+        response = self._send(request)
         logging.debug(f"<== {response.status_code} {{{response.text}}}")
-        connection_success = response.status_code == 200 and len(response.text) != 0
-        if not connection_success:
-            raise ConnectionError(
-                f"Couldn't query the players list from: <{response.status_code}>"
-            )
-
-        return _scrap_player_details(response.text)
+        return _read_player_details(self, request, response)
 
     def get_teams(self):
         """
         :return: data about the existing teams of the player
         """
-        assert self.dashboard is not None, "Scrapper needs to be connected to HM"
-        teams_soups = self.dashboard.select(".is-a-team.selectTeam")
-
-        def _get_points_rank(team_soup):
-            """Get the ranking position and points of a team
-            If none exist return only the points to 0 since the season did not start
-            """
-            points_rank = team_soup.find(attrs={"class": "team-rank"})
-            if points_rank is None:
-                return {"points": 0}
-            try:
-                points, rank = points_rank.text.split("/")
-                return {
-                    "points": int(points.replace("'", "")),
-                    "rank": int(rank.replace("'", "").replace("e", "")),
-                }
-            except ValueError:
-                return {"points": 0}
-
-        def get_team_name(team_soup: Tag):
-            team_name_element = team_soup.find(attrs={"class": "team-name"})
-            if team_name_element is None:
-                raise ScrappingError("Name of team couldn't be found in team object")
-            return team_name_element.text
-
-        return [
-            {
-                "id": team_soup["attr"],
-                "name": get_team_name(team_soup),
-                **_get_points_rank(team_soup),
-            }
-            for team_soup in teams_soups
-        ]
+        return _read_teams(self)
 
     def auto_lineup(self):
-        session = self._get_open_session()
-        query_data = f"randomNumber={_random_number()}"
-        response = session.post(
-            AJAX_URL + "roster-auto-lineup", query_data, headers=AJAX_REQUEST_HEADER
-        )
-        if not response.text == "1":
-            raise ConnectionError("Couldn't auto line up")
+        _check_auto_lineup(self, self._send(_auto_lineup_request(self)))
 
     def select_team(self, team_id):
-        session = self._get_open_session()
-        query_data = f"randomNumber={_random_number()}&myteam={team_id}"
-        response = session.post(
-            AJAX_URL + "use-team", query_data, headers=AJAX_REQUEST_HEADER
-        )
-        if response.status_code != 200:
-            raise ConnectionError(
-                f"Could not select the team: Error {response.status_code} - {response.text}"
-            )
-        if not response.text:
-            raise ConnectionError(f"Could not select the team {team_id}")
+        request = _select_team_request(self, team_id)
+        _check_selected_team(self, request, self._send(request), team_id)
 
     def get_current_team(self):
         """
         :return: a list of all player in the selected team
         """
         player_html_list = self._get_player_html_list(club=MY_TEAM_CLUB_ID)
-        return _scrap_players_html_list(player_html_list)
+        return self.parser_backend.scrap_players_html_list(player_html_list)
 
     def close_session(self):
         if self.session is None:
             return
         self.session.close()
+        logging.info(f"HM requests: {self.requester.stats.summary()}")
         self.session = None
 
     def _get_open_session(self) -> Session:
@@ -184,60 +312,345 @@ class HMAjaxScrapper:
             raise ConnectionError("Parser isn't connected to Hockey Manager")
         return self.session
 
+    def _send(self, request: _HMRequest) -> requests.Response:
+        return self.requester.request(
+            self._get_open_session(),
+            request.method,
+            request.url,
+            retry=request.retry,
+            data=request.body,
+            headers=request.headers,
+        )
+
     def _load_main_dashboard(self):
         """
         Load the main page of Hockey Manager.
         If the gamemode is arcade, switch to original
         :return: None
         """
-        session = self._get_open_session()
-        MAX_ATTEMPTS = 5
-        attempts = 0
-        while attempts < MAX_ATTEMPTS:
-            response = session.get(
-                HM_URL + "/fr/dashboard", headers=PAGE_REQUEST_HEADER
-            )
-            dashboard_soup = BeautifulSoup(response.text, features="html.parser")
-            if response.status_code != 200:
+        for _ in range(DASHBOARD_MAX_ATTEMPTS):
+            dashboard = _read_dashboard(self, self._send(_dashboard_request(self)))
+            if dashboard is None:
                 continue
-            if _is_arcade(dashboard_soup):
-                query_data = f"randomNumber={_random_number()}"
-                session.post(
-                    AJAX_URL + "switch-classic-arcade",
-                    query_data,
-                    headers=AJAX_REQUEST_HEADER,
-                )  # switch mode
-            else:
-                self.dashboard = dashboard_soup
-                break
-            attempts += 1
-        if attempts == MAX_ATTEMPTS:
-            raise Exception("Couldn't load the main page for HM")
+            if not dashboard.arcade:
+                self.dashboard = dashboard
+                return
+            self._send(_switch_mode_request(self))
+        raise Exception("Couldn't load the main page for HM")
 
     def _get_player_html_list(self, club: int = 0):
-        session = self._get_open_session()
-        query_data = (
-            f"randomNumber={_random_number()}&"
-            f"club={club}&"
-            f"role=0&player=&min=1&max=50&country=0&blG=0&blP=0&orderBy=&orderByDirection="
+        request = _player_list_request(self, club)
+        return _read_player_list(self, request, self._send(request))
+
+
+class AsyncHMScrapper(_BaseHMScrapper):
+    """
+    Asyncio scrapper for HockeyManager website.
+    Same surface as HMAjaxScrapper but every call to HM has to be awaited.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 1,
+        parser_backend: ParserBackend | None = None,
+        archive: ResponseArchive | None = None,
+        base_url: str | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> None:
+        """
+        :param pool_size: number of connections kept open to HM,
+            should match the number of concurrent requests on the scrapper
+        :param parser_backend: backend used to scrap the HM pages
+        :param archive: if provided, every response received from HM is archived
+        :param base_url: url of HM, if not set use environment variable
+            HM_BASE_URL or the HM website
+        :param retry_policy: backoff of the retried requests
+        """
+        super().__init__(ASYNC_AJAX_REQUEST_HEADER, parser_backend, archive, base_url)
+        self.session: httpx.AsyncClient | None = None
+        self.pool_size = pool_size
+        self.requester = AsyncHMRequester(self.hm_url, pool_size, retry_policy)
+
+    async def connect_to_hm(self, user, password):
+        self.session = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.pool_size),
         )
-        response = session.post(
-            AJAX_URL + "transfers-classic-get-list-preview",
-            query_data,
-            headers=AJAX_REQUEST_HEADER,
+        _check_login(await self._send(_login_request(self, user, password)))
+        await self._load_main_dashboard()
+
+    async def get_all_players(self):
+        """
+        :return: a list containing information of all players in HM
+        """
+        player_html_list = await self._get_player_html_list(club=NOT_IN_MY_TEAM_CLUB_ID)
+        try:
+            player_html_list += await self._get_player_html_list(club=MY_TEAM_CLUB_ID)
+        except ConnectionError:
+            logging.warning(
+                "Couldn't get player team, maybe the admin still doesn't have a team. "
+            )
+        return self.parser_backend.scrap_players_html_list(player_html_list)
+
+    async def get_player_stats(self, player_id):
+        """
+        :param player_id:
+        :return: dictionary of statistics for a given player
+        """
+        request = _player_details_request(self, player_id)
+        return _read_player_details(self, request, await self._send(request))
+
+    async def get_teams(self):
+        """
+        :return: data about the existing teams of the player
+        """
+        return _read_teams(self)
+
+    async def auto_lineup(self):
+        _check_auto_lineup(self, await self._send(_auto_lineup_request(self)))
+
+    async def select_team(self, team_id):
+        request = _select_team_request(self, team_id)
+        _check_selected_team(self, request, await self._send(request), team_id)
+
+    async def get_current_team(self):
+        """
+        :return: a list of all player in the selected team
+        """
+        player_html_list = await self._get_player_html_list(club=MY_TEAM_CLUB_ID)
+        return self.parser_backend.scrap_players_html_list(player_html_list)
+
+    async def close_session(self):
+        if self.session is None:
+            return
+        await self.session.aclose()
+        logging.info(f"HM requests: {self.requester.stats.summary()}")
+        self.session = None
+
+    def _get_open_session(self) -> httpx.AsyncClient:
+        if self.session is None:
+            raise ConnectionError("Parser isn't connected to Hockey Manager")
+        return self.session
+
+    async def _send(self, request: _HMRequest) -> httpx.Response:
+        return await self.requester.request(
+            self._get_open_session(),
+            request.method,
+            request.url,
+            retry=request.retry,
+            content=request.body,
+            headers=request.headers,
         )
-        connection_success = response.status_code == 200 and len(response.text) != 0
-        if not connection_success:
-            raise ConnectionError(
-                f"Couldn't query the players list from: <{response.status_code}>"
+
+    async def _load_main_dashboard(self):
+        """
+        Same as HMAjaxScrapper._load_main_dashboard
+        """
+        for _ in range(DASHBOARD_MAX_ATTEMPTS):
+            dashboard = _read_dashboard(
+                self, await self._send(_dashboard_request(self))
             )
-        return response.text
+            if dashboard is None:
+                continue
+            if not dashboard.arcade:
+                self.dashboard = dashboard
+                return
+            await self._send(_switch_mode_request(self))
+        raise Exception("Couldn't load the main page for HM")
+
+    async def _get_player_html_list(self, club: int = 0):
+        request = _player_list_request(self, club)
+        return _read_player_list(self, request, await self._send(request))
+
+
+# Requests to HM and handling of their responses, shared by both scrappers.
+# The responses of requests and httpx have the same status_code and text.
+_Response = requests.Response | httpx.Response
+
+
+def _ajax_request(scrapper: _BaseHMScrapper, endpoint: str, body: str) -> _HMRequest:
+    return _HMRequest(
+        "POST", scrapper.ajax_url + endpoint, scrapper.ajax_header, body=body
+    )
+
+
+def _login_request(scrapper: _BaseHMScrapper, user: str, password: str) -> _HMRequest:
+    return _ajax_request(scrapper, "try-login", _login_query(user, password))
+
+
+def _check_login(response: _Response):
+    connection_success = response.status_code == 200 and "1" == response.text
+    if not connection_success:
+        raise ConnectionError(
+            f"Couldn't connect to Hockey Manager: <{response.status_code}>\n{response.text}"
+        )
+
+
+def _dashboard_request(scrapper: _BaseHMScrapper) -> _HMRequest:
+    return _HMRequest("GET", scrapper.hm_url + "fr/dashboard", PAGE_REQUEST_HEADER)
+
+
+def _read_dashboard(scrapper: _BaseHMScrapper, response: _Response) -> Dashboard | None:
+    """
+    :return: the dashboard, None if it couldn't be loaded
+    """
+    if response.status_code != 200:
+        return None
+    scrapper._archive("dashboard", "", response.text)
+    return scrapper.parser_backend.scrap_dashboard(response.text)
+
+
+def _switch_mode_request(scrapper: _BaseHMScrapper) -> _HMRequest:
+    return _HMRequest(
+        "POST",
+        scrapper.ajax_url + "switch-classic-arcade",
+        scrapper.ajax_header,
+        body=f"randomNumber={_random_number()}",
+        retry=False,  # the mode is toggled, the dashboard is checked again
+    )
+
+
+def _read_teams(scrapper: _BaseHMScrapper) -> list[dict]:
+    assert scrapper.dashboard is not None, "Scrapper needs to be connected to HM"
+    return _to_teams(scrapper.dashboard)
+
+
+def _player_list_request(scrapper: _BaseHMScrapper, club: int) -> _HMRequest:
+    return _ajax_request(
+        scrapper, "transfers-classic-get-list-preview", _player_list_query(club)
+    )
+
+
+def _read_player_list(
+    scrapper: _BaseHMScrapper, request: _HMRequest, response: _Response
+) -> str:
+    """
+    :return: the html of the players list
+    """
+    _check_players_response(response)
+    scrapper._archive(
+        "transfers-classic-get-list-preview", request.body or "", response.text
+    )
+    return response.text
+
+
+def _player_details_request(scrapper: _BaseHMScrapper, player_id) -> _HMRequest:
+    return _ajax_request(scrapper, "get-player-detail", f"id={player_id}")
+
+
+def _read_player_details(
+    scrapper: _BaseHMScrapper, request: _HMRequest, response: _Response
+) -> dict[str, str]:
+    """
+    :return: dictionary of statistics of the player
+    """
+    _check_players_response(response)
+    scrapper._archive("get-player-detail", request.body or "", response.text)
+    return scrapper.parser_backend.scrap_player_details(response.text)
+
+
+def _check_players_response(response: _Response):
+    connection_success = response.status_code == 200 and len(response.text) != 0
+    if not connection_success:
+        raise ConnectionError(
+            f"Couldn't query the players list from: <{response.status_code}>"
+        )
+
+
+def _auto_lineup_request(scrapper: _BaseHMScrapper) -> _HMRequest:
+    return _ajax_request(
+        scrapper, "roster-auto-lineup", f"randomNumber={_random_number()}"
+    )
+
+
+def _check_auto_lineup(scrapper: _BaseHMScrapper, response: _Response):
+    if not response.text == "1":
+        raise ConnectionError("Couldn't auto line up")
+    scrapper._archive("roster-auto-lineup", "", response.text)
+
+
+def _select_team_request(scrapper: _BaseHMScrapper, team_id) -> _HMRequest:
+    return _ajax_request(
+        scrapper, "use-team", f"randomNumber={_random_number()}&myteam={team_id}"
+    )
+
+
+def _check_selected_team(
+    scrapper: _BaseHMScrapper, request: _HMRequest, response: _Response, team_id
+):
+    if response.status_code != 200:
+        raise ConnectionError(
+            f"Could not select the team: Error {response.status_code} - {response.text}"
+        )
+    if not response.text:
+        raise ConnectionError(f"Could not select the team {team_id}")
+    scrapper._archive("use-team", request.body or "", response.text)
 
 
 def _random_number() -> str:
     return str(randint(10000000, 99999999))
 
 
+def _login_query(user: str, password: str) -> str:
+    return f"fh_u={quote(user)}&fh_p={quote(password)}&randomNumber={_random_number()}"
+
+
+def _player_list_query(club: int) -> str:
+    return (
+        f"randomNumber={_random_number()}&"
+        f"club={club}&"
+        f"role=0&player=&min=1&max=50&country=0&blG=0&blP=0&orderBy=&orderByDirection="
+    )
+
+
+def _scrap_teams(
+    dashboard: BeautifulSoup,
+) -> list[tuple[str, str | None, str | None]]:
+    def text_of(team_soup: Tag, class_name: str) -> str | None:
+        element = team_soup.find(attrs={"class": class_name})
+        return None if element is None else element.text
+
+    return [
+        (
+            team_soup.attrs["attr"],
+            text_of(team_soup, "team-name"),
+            text_of(team_soup, "team-rank"),
+        )
+        for team_soup in dashboard.select(".is-a-team.selectTeam")
+    ]
+
+
+def _to_teams(dashboard: Dashboard) -> list[dict]:
+    def _get_points_rank(points_rank: str | None):
+        """Get the ranking position and points of a team
+        If none exist return only the points to 0 since the season did not start
+        """
+        if points_rank is None:
+            return {"points": 0}
+        try:
+            points, rank = points_rank.split("/")
+            return {
+                "points": int(points.replace("'", "")),
+                "rank": int(rank.replace("'", "").replace("e", "")),
+            }
+        except ValueError:
+            return {"points": 0}
+
+    def get_team_name(team_name: str | None):
+        if team_name is None:
+            raise ScrappingError("Name of team couldn't be found in team object")
+        return team_name
+
+    return [
+        {
+            "id": team_id,
+            "name": get_team_name(team_name),
+            **_get_points_rank(points_rank),
+        }
+        for team_id, team_name, points_rank in dashboard.teams
+    ]
+
+
 def _scrap_player_row(player_row_html: bs4.element.Tag) -> dict[str, str]:
     return {
         "id": player_row_html.attrs["attr"],
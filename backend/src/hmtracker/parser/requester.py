@@ -0,0 +1,454 @@
+"""
+Request layer shared by the HM scrappers.
+
+Every request to HM goes through a requester which
+ - waits for a token of the rate limiter shared by every scrapper of the process,
+ - waits for a slot of its adaptive concurrency limit, that shrinks when HM
+   latency rises or HM is overloaded and grows back when it recovers,
+ - retries with jittered exponential backoff on 429, 5xx and connection errors,
+ - counts per endpoint the time spent waiting and transferring, and exports the
+   duration of each attempt in the metrics.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from os import getenv
+from random import uniform
+from urllib.parse import urlparse
+
+import httpx
+import requests
+
+from hmtracker.common.constants import (
+    HM_RATE_BURST_ENV_NAME,
+    HM_RATE_LIMIT_ENV_NAME,
+)
+from hmtracker.common.metrics import Histogram
+
+DEFAULT_RATE_LIMIT = 20.0  # requests per second
+DEFAULT_RATE_BURST = 10
+DEFAULT_TIMEOUT = 30.0  # seconds
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+HM_REQUEST_SECONDS = Histogram(
+    "hmtracker_hm_request_duration_seconds",
+    "Duration of the attempts of the requests to HM",
+    ["endpoint", "status"],
+)
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay: float = 0.5  # seconds
+    max_delay: float = 30.0  # seconds
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """
+        :param attempt: number of attempts already made
+        :param retry_after: delay asked by HM, if any
+        :return: seconds to wait before the next attempt, with full jitter
+        """
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket, usable from threads and coroutines
+    as it only computes how long the caller has to wait.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """
+        :param rate: tokens added per second
+        :param burst: maximum number of tokens available at once
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token, possibly in advance
+        :return: seconds to wait before the token is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+_rate_limiters: dict[str, TokenBucket | None] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(hm_url: str) -> TokenBucket | None:
+    """
+    :param hm_url: url of HM
+    :return: the rate limiter shared by every request to the host of the url,
+        configured by the environment variables HM_RATE_LIMIT (requests per second,
+        0 to disable) and HM_RATE_BURST
+    """
+    host = urlparse(hm_url).netloc
+    with _rate_limiters_lock:
+        if host not in _rate_limiters:
+            rate = float(getenv(HM_RATE_LIMIT_ENV_NAME, DEFAULT_RATE_LIMIT))
+            burst = int(getenv(HM_RATE_BURST_ENV_NAME, DEFAULT_RATE_BURST))
+            _rate_limiters[host] = TokenBucket(rate, burst) if rate > 0 else None
+        return _rate_limiters[host]
+
+
+class ConcurrencyLimit:
+    """
+    Additive increase / multiplicative decrease of the number of concurrent requests.
+    The limit is halved when HM is overloaded and reduced by a quarter when the
+    smoothed latency exceeds twice the fastest latency observed.
+    It grows by one after a full window of fast responses.
+    Only computes the limit, the requesters do the waiting.
+    """
+
+    LATENCY_TOLERANCE = 2.0
+    SMOOTHING = 0.2
+
+    def __init__(self, max_concurrency: int) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.in_flight = 0
+        self._fastest_latency: float | None = None
+        self._smoothed_latency: float | None = None
+        self._window = 0  # responses since the last change of the limit
+
+    def on_response(self, latency: float):
+        self._fastest_latency = (
+            latency
+            if self._fastest_latency is None
+            else min(self._fastest_latency, latency)
+        )
+        self._smoothed_latency = (
+            latency
+            if self._smoothed_latency is None
+            else self._smoothed_latency
+            + self.SMOOTHING * (latency - self._smoothed_latency)
+        )
+        self._window += 1
+        if self._window < self.limit:
+            return
+        if self._smoothed_latency > self.LATENCY_TOLERANCE * self._fastest_latency:
+            self._set_limit(int(self.limit * 0.75))
+        else:
+            self._set_limit(self.limit + 1)
+
+    def on_overload(self):
+        self._set_limit(self.limit // 2)
+
+    def _set_limit(self, limit: int):
+        limit = min(self.max_concurrency, max(1, limit))
+        if limit != self.limit:
+            logging.debug(f"HM concurrency limit {self.limit} -> {limit}")
+        self.limit = limit
+        self._window = 0
+
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0  # attempts that failed (429, 5xx or connection error)
+    wait_time: float = 0.0  # rate limiting, concurrency limit and backoff
+    transfer_time: float = 0.0
+
+
+class RequestStats:
+    def __init__(self) -> None:
+        self._endpoints: dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        endpoint: str,
+        requests: int = 0,
+        retries: int = 0,
+        errors: int = 0,
+        wait_time: float = 0.0,
+        transfer_time: float = 0.0,
+    ):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, EndpointStats())
+            stats.requests += requests
+            stats.retries += retries
+            stats.errors += errors
+            stats.wait_time += wait_time
+            stats.transfer_time += transfer_time
+
+    def snapshot(self) -> dict[str, EndpointStats]:
+        with self._lock:
+            return {
+                endpoint: EndpointStats(**vars(stats))
+                for endpoint, stats in self._endpoints.items()
+            }
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{endpoint}: {stats.requests} requests ({stats.retries} retries, "
+            f"{stats.errors} errors) waited {stats.wait_time:.2f}s "
+            f"transferred {stats.transfer_time:.2f}s"
+            for endpoint, stats in sorted(self.snapshot().items())
+        )
+
+
+class _BaseRequester:
+    def __init__(
+        self,
+        hm_url: str,
+        max_concurrency: int = 1,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: TokenBucket | None = None,
+    ) -> None:
+        """
+        :param hm_url: url of HM
+        :param max_concurrency: maximum number of concurrent requests
+        :param retry_policy: backoff of the retries, default policy if not set
+        :param rate_limiter: if not set use the rate limiter shared for HM url
+        """
+        self.retry_policy = RetryPolicy() if retry_policy is None else retry_policy
+        self.rate_limiter = (
+            get_rate_limiter(hm_url) if rate_limiter is None else rate_limiter
+        )
+        self.concurrency = ConcurrencyLimit(max_concurrency)
+        self.stats = RequestStats()
+
+    def _rate_limit_delay(self) -> float:
+        return 0.0 if self.rate_limiter is None else self.rate_limiter.reserve()
+
+    def _record_attempt(
+        self,
+        endpoint: str,
+        status_code: int | None,
+        waited: float,
+        transfer_time: float,
+    ):
+        """
+        :param status_code: status of the response, None on connection error
+        """
+        self.stats.add(
+            endpoint,
+            errors=int(status_code is None or status_code in RETRY_STATUSES),
+            wait_time=waited,
+            transfer_time=transfer_time,
+        )
+        HM_REQUEST_SECONDS.observe(
+            transfer_time,
+            endpoint=endpoint,
+            status="error" if status_code is None else str(status_code),
+        )
+
+    def _should_retry(self, status_code: int | None, attempt: int) -> bool:
+        """
+        :param status_code: status of the response, None on connection error
+        """
+        return attempt < self.retry_policy.max_attempts and (
+            status_code is None or status_code in RETRY_STATUSES
+        )
+
+
+class HMRequester(_BaseRequester):
+    """
+    Request layer of HMAjaxScrapper, shared by the threads using the scrapper
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._condition = threading.Condition()
+
+    def request(
+        self,
+        session: requests.Session,
+        method: str,
+        url: str,
+        retry: bool = True,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        :param session: session used to send the request
+        :param method: http method
+        :param url: url of the request, its last segment names the endpoint
+        :param retry: False if the request mustn't be sent twice
+        :param kwargs: arguments of the request
+        :return: the response, possibly an error if every attempt failed
+        :raise requests.RequestException: if the last attempt couldn't connect
+        """
+        endpoint = url.rstrip("/").rsplit("/", 1)[-1]
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        self.stats.add(endpoint, requests=1)
+        attempt = 0
+        while True:
+            attempt += 1
+            waited = self._acquire()
+            started_at = time.monotonic()
+            response: requests.Response | None = None
+            error: Exception | None = None
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exception:
+                error = exception
+            finally:
+                transfer_time = time.monotonic() - started_at
+                status_code = None if response is None else response.status_code
+                self._release(status_code, transfer_time)
+
+            self._record_attempt(endpoint, status_code, waited, transfer_time)
+            if not (retry and self._should_retry(status_code, attempt)):
+                if response is None:
+                    assert error is not None
+                    raise error
+                return response
+            logging.warning(
+                f"HM {endpoint} failed ({status_code or error}), retry {attempt}"
+            )
+            self._backoff(
+                endpoint,
+                attempt,
+                None if response is None else _retry_after(response.headers),
+            )
+
+    def _acquire(self) -> float:
+        """
+        Wait for the rate limiter and a concurrency slot
+        :return: seconds waited
+        """
+        started_at = time.monotonic()
+        delay = self._rate_limit_delay()
+        if delay > 0:
+            time.sleep(delay)
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.concurrency.in_flight < self.concurrency.limit
+            )
+            self.concurrency.in_flight += 1
+        return time.monotonic() - started_at
+
+    def _release(self, status_code: int | None, latency: float):
+        with self._condition:
+            self.concurrency.in_flight -= 1
+            if status_code is None or status_code in RETRY_STATUSES:
+                self.concurrency.on_overload()
+            else:
+                self.concurrency.on_response(latency)
+            self._condition.notify_all()
+
+    def _backoff(self, endpoint: str, attempt: int, retry_after: float | None):
+        delay = self.retry_policy.delay(attempt, retry_after)
+        self.stats.add(endpoint, retries=1, wait_time=delay)
+        time.sleep(delay)
+
+
+class AsyncHMRequester(_BaseRequester):
+    """
+    Request layer of AsyncHMScrapper, used from a single event loop
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._condition: asyncio.Condition | None = None
+
+    async def request(
+        self,
+        session: httpx.AsyncClient,
+        method: str,
+        url: str,
+        retry: bool = True,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Same as HMRequester.request
+        :raise httpx.TransportError: if the last attempt couldn't connect
+        """
+        endpoint = url.rstrip("/").rsplit("/", 1)[-1]
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        self.stats.add(endpoint, requests=1)
+        attempt = 0
+        while True:
+            attempt += 1
+            waited = await self._acquire()
+            started_at = time.monotonic()
+            response: httpx.Response | None = None
+            error: Exception | None = None
+            try:
+                response = await session.request(method, url, **kwargs)
+            except httpx.TransportError as exception:
+                error = exception
+            finally:
+                transfer_time = time.monotonic() - started_at
+                status_code = None if response is None else response.status_code
+                await self._release(status_code, transfer_time)
+
+            self._record_attempt(endpoint, status_code, waited, transfer_time)
+            if not (retry and self._should_retry(status_code, attempt)):
+                if response is None:
+                    assert error is not None
+                    raise error
+                return response
+            logging.warning(
+                f"HM {endpoint} failed ({status_code or error}), retry {attempt}"
+            )
+            await self._backoff(
+                endpoint,
+                attempt,
+                None if response is None else _retry_after(response.headers),
+            )
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Created lazily to be bound to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def _acquire(self) -> float:
+        started_at = time.monotonic()
+        delay = self._rate_limit_delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(
+                lambda: self.concurrency.in_flight < self.concurrency.limit
+            )
+            self.concurrency.in_flight += 1
+        return time.monotonic() - started_at
+
+    async def _release(self, status_code: int | None, latency: float):
+        condition = self._get_condition()
+        async with condition:
+            self.concurrency.in_flight -= 1
+            if status_code is None or status_code in RETRY_STATUSES:
+                self.concurrency.on_overload()
+            else:
+                self.concurrency.on_response(latency)
+            condition.notify_all()
+
+    async def _backoff(self, endpoint: str, attempt: int, retry_after: float | None):
+        delay = self.retry_policy.delay(attempt, retry_after)
+        self.stats.add(endpoint, retries=1, wait_time=delay)
+        await asyncio.sleep(delay)
+
+
+def _retry_after(headers) -> float | None:
+    """
+    :return: the delay in seconds of the Retry-After header, if any
+    """
+    try:
+        return float(headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
@@ -1,20 +1,37 @@
 import logging
-from threading import Thread
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import replace
+from functools import partial
 from os import getenv
-from datetime import datetime
-import traceback
 
 from hmtracker.common.exceptions import NoDatabaseError
 from hmtracker.common.constants import (
     HM_DATABASE_URL_ENV_NAME,
     HM_USER_ENV_NAME,
     HM_PASSWORD_ENV_NAME,
+    HM_ARCHIVE_DIR_ENV_NAME,
+    HM_STATS_ONLY_CHANGES_ENV_NAME,
 )
 import hmtracker.loader.main as loader
-from hmtracker.database import repository, models
+from hmtracker.common.progress import ProgressEvent, progress_events
+from hmtracker.database import repository
+from hmtracker.services import jobs
 from hashlib import sha256
 
-_current_operation: Thread | None = None
+from sqlalchemy.exc import IntegrityError
+
+LOAD_HM_STATS = "Load HM stats"
+LOAD_CHANGED_HM_STATS = "Load changed HM stats"
+ALIGN_TEAM = "Align Team"
+
+# The loads write the same stats, so they run one after the other
+PLAYER_STATS_RESOURCE = "Player stats"
+_RESOURCES = {
+    LOAD_HM_STATS: PLAYER_STATS_RESOURCE,
+    LOAD_CHANGED_HM_STATS: PLAYER_STATS_RESOURCE,
+}
 
 HMTRACKER_ADMIN_USER_ENV = "HMTRACKER_ADMIN_USER"
 HMTRACKER_ADMIN_PASSWORD_ENV = "HMTRACKER_ADMIN_PASSWORD"
@@ -45,79 +62,185 @@ def is_admin(user, password) -> bool:
     return same_user and same_password
 
 
-def is_running_operation() -> bool:
-    global _current_operation
-    return _current_operation is not None and _current_operation.is_alive()
-
-
-def check_operation():
-    global _current_operation
-    if is_running_operation() and _current_operation is not None:
-        raise ServerBusyException(
-            f"Server is currently busy with operation: {_current_operation.name}"
-        )
-    del _current_operation
-    _current_operation = None
-
-
 def get_current_operation() -> str | None:
-    global _current_operation
-    if not is_running_operation() or _current_operation is None:
-        return None
-    return _current_operation.name
-
-
-def registerTask(task: models.Task):
+    """
+    :return: the name of the oldest running task, None if no task is running
+    """
+    with repository.create_repository_session_maker(_database_url())() as session:
+        running_tasks = [
+            task
+            for task in jobs.get_unfinished_tasks(session)
+            if task.status == jobs.TASK_RUNNING
+        ]
+        return running_tasks[0].name if running_tasks else None
+
+
+_RECENT_TASKS = 10
+_RELAY_POLL_S = 1.0
+
+
+class TasksProgressRelay:
+    """
+    Relay of the progress that the workers save in the recent tasks, shared by the
+    clients of the process: one thread reads the TASK table while clients wait.
+    A progress is identified by its task id and the progress sequence stored with it,
+    so a client can resume from the progress it received on any process of the API.
+    """
+
+    def __init__(
+        self, poll_s: float = _RELAY_POLL_S, recent_tasks: int = _RECENT_TASKS
+    ):
+        """
+        :param poll_s: seconds between two reads of the TASK table
+        :param recent_tasks: number of tasks whose progress is relayed, latest first
+        """
+        self.poll_s = poll_s
+        self.recent_tasks = recent_tasks
+        self._progress: dict[int, ProgressEvent] = {}
+        self._condition = threading.Condition()
+        self._waiting_clients = 0
+        self._thread: threading.Thread | None = None
+
+    def refresh(self) -> list[ProgressEvent]:
+        """
+        Read the progress of the recent tasks. The progress that changed since the
+        last read is published in the progress events of the process
+        :return: the changed progress, oldest task first
+        """
+        with repository.create_repository_session_maker(_database_url())() as session:
+            progress = {
+                task.id: _progress_event(task)
+                for task in reversed(session.get_tasks(limit=self.recent_tasks))
+                if task.progress is not None
+            }
+        with self._condition:
+            changed = [
+                event
+                for task_id, event in progress.items()
+                if task_id not in self._progress
+                or self._progress[task_id].sequence != event.sequence
+            ]
+            self._progress = progress
+            if changed:
+                self._condition.notify_all()
+        for event in changed:
+            # The buffer numbers its own copy of the event
+            progress_events.publish(replace(event))
+        return changed
+
+    def wait(self, positions: dict[int, int], timeout_s: float) -> list[ProgressEvent]:
+        """
+        :param positions: progress sequence received by the client, by task id
+        :param timeout_s: seconds to wait for a progress if there is none
+        :return: the progress of the recent tasks after the positions, oldest task
+            first, the sequence of the events is the progress sequence of their task
+        """
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="tasks-progress-relay", daemon=True
+                )
+                self._thread.start()
+            self._waiting_clients += 1
+            self._condition.notify_all()
+            try:
+                self._condition.wait_for(
+                    lambda: self._progress_after(positions), timeout_s
+                )
+                return self._progress_after(positions)
+            finally:
+                self._waiting_clients -= 1
+
+    def _progress_after(self, positions: dict[int, int]) -> list[ProgressEvent]:
+        return [
+            event
+            for task_id, event in self._progress.items()
+            if event.sequence > positions.get(task_id, 0)
+        ]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._waiting_clients > 0)
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.warning(f"Relay of the tasks progress failed: {e}")
+            time.sleep(self.poll_s)
+
+
+def _progress_event(task) -> ProgressEvent:
+    event_fields = {
+        name: value
+        for name, value in (jobs.task_progress(task) or {}).items()
+        if name not in ("task_id", "sequence")
+    }
+    return ProgressEvent(
+        **event_fields, task_id=task.id, sequence=task.progress_sequence
+    )
+
+
+tasks_progress_relay = TasksProgressRelay()
+
+
+def progress_event_id(positions: dict[int, int]) -> str:
+    """
+    :param positions: progress sequence received by the client, by task id
+    :return: the id of a server-sent event, e.g. 12:40,13:7. Only the latest tasks
+        are kept, the progress of the older ones isn't relayed anymore
+    """
+    return ",".join(
+        f"{task_id}:{sequence}"
+        for task_id, sequence in sorted(positions.items())[-_RECENT_TASKS:]
+    )
+
+
+def parse_progress_event_id(event_id: str | None) -> dict[int, int]:
+    """
+    :param event_id: id of the last server-sent event received by a client
+    :return: the progress sequence received by the client, by task id. Empty if the
+        id is missing or invalid, the client then receives the current progress again
+    """
+    positions: dict[int, int] = {}
+    for position in (event_id or "").split(","):
+        task_id, _, sequence = position.partition(":")
+        if not task_id.isdigit() or not sequence.isdigit():
+            return {}
+        positions[int(task_id)] = int(sequence)
+    return positions
+
+
+def _database_url() -> str:
     database_url = getenv(HM_DATABASE_URL_ENV_NAME)
-    if database_url:
-        session = repository.create_repository_session_maker(database_url)()
-        try:
-            session.add_task(task)
-        finally:
-            session.end_session()
-
-
-def _Operation(name: str):
-    def decorator(method):
-        def wrapper():
-            global _current_operation
-            check_operation()
-
-            def task_wrapper():
-                start_time = datetime.now()
-
-                try:
-                    method()
-
-                    end_time = datetime.now()
-                    registerTask(
-                        models.Task(name=name, start_at=start_time, end_at=end_time)
-                    )
-
-                except Exception as e:
-                    error_msg = str(e)
-                    stack_trace = traceback.format_exc()
-                    registerTask(
-                        models.Task(
-                            name=name,
-                            start_at=start_time,
-                            end_at=datetime.now(),
-                            error=error_msg,
-                            stacktrace=stack_trace,
-                        )
-                    )
-
-            thread = Thread(target=task_wrapper, name=name)
-            _current_operation = thread
-            thread.start()
+    if not database_url:
+        raise NoDatabaseError()
+    return database_url
 
-        return wrapper
 
-    return decorator
+def _enqueue(name: str, **parameters):
+    """
+    Queue a task for the workers, the tasks of a resource run one after the other.
+    A warning is logged if no worker is alive to run it
+    :raise ServerBusyException: if the same task is already queued or running
+    """
+    with repository.create_repository_session_maker(_database_url())() as session:
+        try:
+            task = jobs.enqueue_task(
+                session, name, parameters, resource=_RESOURCES.get(name)
+            )
+        except IntegrityError:
+            raise ServerBusyException(
+                f"Server is currently busy with operation: {name}"
+            )
+        logging.info(f"Task {task.id} queued: {name}")
+        if not jobs.alive_workers(session):
+            logging.warning(
+                f"No worker is alive, task {task.id} waits until one is started "
+                "with: python -m hmtracker.worker"
+            )
 
 
-@_Operation("Load HM stats")
-def start_loading():
+def _load_hm_stats(incremental: bool, force: bool = False):
     database_url = getenv(HM_DATABASE_URL_ENV_NAME)
     hm_user = getenv(HM_USER_ENV_NAME)
     hm_password = getenv(HM_PASSWORD_ENV_NAME)
@@ -126,14 +249,32 @@ def start_loading():
             f"{HM_DATABASE_URL_ENV_NAME if database_url is None else ''} - {HM_USER_ENV_NAME if hm_user is None else ''}{HM_PASSWORD_ENV_NAME if hm_password is None else ''} are not defined. aborting operation"
         )
         return
-    loader.import_playerstats_from_ajax(database_url, hm_user, hm_password)
+    loader.import_playerstats_from_ajax(
+        database_url,
+        hm_user,
+        hm_password,
+        incremental=incremental,
+        archive_directory=getenv(HM_ARCHIVE_DIR_ENV_NAME),
+        only_changes=getenv(HM_STATS_ONLY_CHANGES_ENV_NAME, "").lower()
+        in ("1", "true", "yes"),
+        force=force,
+    )
+
+
+def start_loading(force: bool = False):
+    _enqueue(LOAD_HM_STATS, force=force)
+
+
+def start_incremental_loading(force: bool = False):
+    _enqueue(LOAD_CHANGED_HM_STATS, force=force)
 
 
-@_Operation("Align Team")
 def start_team_alignement():
-    database_url = getenv(HM_DATABASE_URL_ENV_NAME)
-    if not database_url:
-        raise NoDatabaseError()
+    _enqueue(ALIGN_TEAM)
+
+
+def _align_teams():
+    database_url = _database_url()
 
     from hmtracker.services import autolineup
 
@@ -152,3 +293,11 @@ def start_team_alignement():
     finally:
         connection.end_session()
     autolineup.process_all_managers_autolineup(database_url, cutoff_time)
+
+
+# Jobs run by the workers, by task name, called with the parameters of the task
+JOBS: dict[str, Callable[..., None]] = {
+    LOAD_HM_STATS: partial(_load_hm_stats, incremental=False),
+    LOAD_CHANGED_HM_STATS: partial(_load_hm_stats, incremental=True),
+    ALIGN_TEAM: _align_teams,
+}
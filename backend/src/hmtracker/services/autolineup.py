@@ -1,11 +1,25 @@
 import logging
+import time
 import traceback
 from datetime import datetime
 
+from hmtracker.common.metrics import Counter, Histogram
+from hmtracker.common.progress import ProgressTracker
 from hmtracker.parser.hmparser import HMAjaxScrapper
 from hmtracker.database import repository, models
 from hmtracker.services import encryption
 
+AUTOLINEUP_MANAGERS = Counter(
+    "hmtracker_autolineup_managers_total",
+    "Managers processed by the autolineup, by result",
+    ["result"],
+)
+AUTOLINEUP_BATCH_SECONDS = Histogram(
+    "hmtracker_autolineup_batch_duration_seconds",
+    "Duration of the autolineup of a batch of managers",
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1200),
+)
+
 
 def autolineup(user_email: str, password: str):
     parser = HMAjaxScrapper()
@@ -46,11 +60,13 @@ def _process_manager_batch(
     batch_size: int,
     offset: int,
     last_autolineup_before: datetime | None = None,
+    progress: ProgressTracker | None = None,
 ) -> tuple[int, int, bool]:
     """
     Process a batch of managers with autolineup enabled.
     Returns (success_count, fail_count, has_more_batches).
     """
+    started_at = time.perf_counter()
     connection = repository.create_repository_session_maker(database_url)()
     try:
         managers = connection.get_managers_with_autolineup(
@@ -68,9 +84,14 @@ def _process_manager_batch(
         for manager in managers:
             if _process_manager(manager):
                 success_count += 1
+                AUTOLINEUP_MANAGERS.inc(result="success")
             else:
                 fail_count += 1
+                AUTOLINEUP_MANAGERS.inc(result="failure")
+            if progress is not None:
+                progress.advance()
 
+        AUTOLINEUP_BATCH_SECONDS.observe(time.perf_counter() - started_at)
         return (success_count, fail_count, True)
     finally:
         connection.end_session()
@@ -94,9 +115,15 @@ def process_all_managers_autolineup(
     batch_size = 50
     offset = 0
 
+    with repository.create_repository_session_maker(database_url)() as connection:
+        managers_count = connection.count_managers_with_autolineup(
+            last_autolineup_before
+        )
+    progress = ProgressTracker("Autolineup", total=managers_count)
+
     while True:
         success, fail, has_more = _process_manager_batch(
-            database_url, batch_size, offset, last_autolineup_before
+            database_url, batch_size, offset, last_autolineup_before, progress
         )
         total_success += success
         total_fail += fail
@@ -106,6 +133,7 @@ def process_all_managers_autolineup(
 
         offset += batch_size
 
+    progress.finish()
     logging.info(
         f"Team alignment completed: {total_success} successful, {total_fail} failed"
     )
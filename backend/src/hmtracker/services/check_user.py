@@ -1,6 +1,178 @@
-from hmtracker.parser.hmparser import HMAjaxScrapper
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from hmtracker.common.constants import (
+    HM_MAX_SESSIONS_ENV_NAME,
+    HM_SESSION_TIMEOUT_ENV_NAME,
+)
+from hmtracker.parser.hmparser import AsyncHMScrapper, HMAjaxScrapper
+
+VERIFIED_CREDENTIALS_TTL_S = 300
+VERIFIED_CREDENTIALS_MAX_SIZE = 1024
+DEFAULT_MAX_SESSIONS = 4
+DEFAULT_SESSION_TIMEOUT_S = 60.0
+
+
+class VerifiedCredentialsCache:
+    """
+    Credentials recently verified against HM, to not log in to HM on every request.
+    Credentials are only kept as a salted scrypt hash, the salt is random for each
+    process so the hashes are useless outside of it.
+    The least recently verified credentials are evicted when the cache is full.
+    """
+
+    def __init__(
+        self,
+        ttl_s: float = VERIFIED_CREDENTIALS_TTL_S,
+        max_size: int = VERIFIED_CREDENTIALS_MAX_SIZE,
+    ) -> None:
+        self.ttl_s = ttl_s
+        self.max_size = max_size
+        self._salt = os.urandom(16)
+        self._expirations: OrderedDict[bytes, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def contains(self, email: str, password: str) -> bool:
+        """
+        :return: True if the credentials were verified less than ttl_s ago
+        """
+        return self.contains_key(self.key(email, password))
+
+    def add(self, email: str, password: str):
+        """
+        Remember credentials that HM accepted
+        """
+        self.add_key(self.key(email, password))
+
+    def contains_key(self, key: bytes) -> bool:
+        """
+        Same as contains, for the key of the credentials
+        """
+        with self._lock:
+            expiration = self._expirations.get(key)
+            if expiration is None:
+                return False
+            if expiration < time.monotonic():
+                del self._expirations[key]
+                return False
+            return True
+
+    def add_key(self, key: bytes):
+        """
+        Same as add, for the key of the credentials
+        """
+        with self._lock:
+            self._expirations[key] = time.monotonic() + self.ttl_s
+            self._expirations.move_to_end(key)
+            while len(self._expirations) > self.max_size:
+                self._expirations.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._expirations.clear()
+
+    def key(self, email: str, password: str) -> bytes:
+        """
+        :return: the key of the credentials in the cache, computed once to
+            look up and add the same credentials
+        """
+        # Slow on purpose, takes about 50ms
+        return hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=self._salt + email.encode("utf-8"),
+            n=2**14,
+            r=8,
+            p=1,
+            dklen=32,
+        )
+
+
+verified_credentials = VerifiedCredentialsCache()
+
+
+class HMSessionLimiter:
+    """
+    Caps the number of HM sessions the event loop has open at the same time,
+    and how long a request can wait for a session and use it.
+    """
+
+    def __init__(self, max_sessions: int, timeout_s: float) -> None:
+        self.max_sessions = max_sessions
+        self.timeout_s = timeout_s
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_sessions)
+
+    @asynccontextmanager
+    async def session(self, timeout_s: float | None = None) -> AsyncIterator[None]:
+        """
+        Wait for a free session, to hold while connected to HM
+        :param timeout_s: overrides the timeout of the limiter
+        :raise TimeoutError: if waiting for the session and using it takes
+            more than the timeout
+        """
+        async with asyncio.timeout(self.timeout_s if timeout_s is None else timeout_s):
+            self.waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            try:
+                yield
+            finally:
+                self.active -= 1
+                self._semaphore.release()
+
+
+hm_sessions = HMSessionLimiter(
+    int(os.getenv(HM_MAX_SESSIONS_ENV_NAME, DEFAULT_MAX_SESSIONS)),
+    float(os.getenv(HM_SESSION_TIMEOUT_ENV_NAME, DEFAULT_SESSION_TIMEOUT_S)),
+)
 
 
 def connect_to_hm(email, password):
+    """
+    Check the credentials by connecting to HM, unless they were recently verified
+    :raise ConnectionError: if HM refuses the credentials
+    """
+    key = verified_credentials.key(email, password)
+    if verified_credentials.contains_key(key):
+        return
     parser = HMAjaxScrapper()
-    parser.connect_to_hm(email, password)
+    try:
+        parser.connect_to_hm(email, password)
+    finally:
+        parser.close_session()
+    verified_credentials.add_key(key)
+
+
+async def connect_to_hm_async(email, password):
+    """
+    Same as connect_to_hm, the credentials are hashed once outside the event loop
+    and the HM session is limited by hm_sessions
+    :raise TimeoutError: if no HM session is available or HM is too slow
+    """
+    key = await asyncio.to_thread(verified_credentials.key, email, password)
+    if verified_credentials.contains_key(key):
+        return
+    async with hm_sessions.session():
+        parser = AsyncHMScrapper()
+        try:
+            await parser.connect_to_hm(email, password)
+        finally:
+            await parser.close_session()
+    verified_credentials.add_key(key)
+
+
+async def remember_verified_credentials(email, password):
+    """
+    Remember credentials that HM accepted through another connection
+    """
+    await asyncio.to_thread(verified_credentials.add, email, password)
@@ -0,0 +1,337 @@
+"""
+Job queue on the TASK table, shared by the API processes and the workers.
+
+A task is queued by the API, then claimed by a worker that holds a lease on it and
+renews it with heartbeats while the task runs. A task whose lease expired, because
+its worker died, is claimed again by another worker, up to MAX_ATTEMPTS times.
+The claims are conditional updates, so two workers can't claim the same task.
+
+Some jobs write the same tables, e.g. a full and an incremental load of the stats,
+so their tasks share a resource and don't overlap: a task is only claimed when no
+task of its resource is running, while the tasks of other resources run on the other
+workers. A job also has at most one unfinished task. Unique partial indexes of the
+TASK table enforce both between the processes.
+
+The workers record a heartbeat in the WORKER table even when idle, so the API can
+tell when the tasks it queues won't run.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, cast
+
+from sqlalchemy import CursorResult, and_, delete, exists, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from hmtracker.database import models
+from hmtracker.database.repository import RepositorySession
+
+TASK_QUEUED = "queued"
+TASK_RUNNING = "running"
+TASK_SUCCEEDED = "succeeded"
+TASK_FAILED = "failed"
+
+DEFAULT_LEASE_S = 60
+MAX_ATTEMPTS = 3
+# Seconds after its last heartbeat before a worker is considered stopped
+WORKER_ALIVE_S = 120
+_CLAIM_CANDIDATES = 5
+
+
+def enqueue_task(
+    repository_session: RepositorySession,
+    name: str,
+    parameters: dict[str, Any] | None = None,
+    resource: str | None = None,
+) -> models.Task:
+    """
+    :param repository_session:
+    :param name: name of the job to run
+    :param parameters: keyword arguments of the job, have to be JSON serializable
+    :param resource: what the job writes, the tasks of a resource run one at a time.
+        The name of the job if not set
+    :return: the queued task, committed
+    :raise IntegrityError: if a task of the job is already queued or running, the
+        session is rolled back
+    """
+    now = datetime.now()
+    task = models.Task(
+        name=name,
+        status=TASK_QUEUED,
+        parameters=json.dumps(parameters or {}),
+        resource=name if resource is None else resource,
+        created_at=now,
+        start_at=now,  # Replaced when the task starts
+        attempts=0,
+    )
+    try:
+        repository_session.add_task(task)
+        repository_session.session.commit()
+    except IntegrityError:
+        repository_session.session.rollback()
+        raise
+    return task
+
+
+def get_unfinished_tasks(
+    repository_session: RepositorySession, name: str | None = None
+) -> list[models.Task]:
+    """
+    :param repository_session:
+    :param name: only the tasks of this job if set
+    :return: the queued and running tasks, oldest first
+    """
+    query = select(models.Task).where(
+        models.Task.status.in_((TASK_QUEUED, TASK_RUNNING))
+    )
+    if name is not None:
+        query = query.where(models.Task.name == name)
+    return list(
+        repository_session.session.execute(
+            query.order_by(models.Task.created_at, models.Task.id)
+        ).scalars()
+    )
+
+
+def task_parameters(task: models.Task) -> dict[str, Any]:
+    return json.loads(task.parameters) if task.parameters else {}
+
+
+def _claimable(now: datetime):
+    running_task = aliased(models.Task)
+    return or_(
+        and_(
+            models.Task.status == TASK_QUEUED,
+            ~exists().where(
+                running_task.status == TASK_RUNNING,
+                running_task.resource == models.Task.resource,
+            ),
+        ),
+        and_(
+            models.Task.status == TASK_RUNNING,
+            models.Task.lease_expires_at < now,
+            models.Task.attempts < MAX_ATTEMPTS,
+        ),
+    )
+
+
+def _fail_abandoned_tasks(repository_session: RepositorySession, now: datetime):
+    """
+    Fail the tasks whose lease expired too many times, they likely kill their worker
+    """
+    result = cast(
+        CursorResult,
+        repository_session.session.execute(
+            update(models.Task)
+            .where(
+                models.Task.status == TASK_RUNNING,
+                models.Task.lease_expires_at < now,
+                models.Task.attempts >= MAX_ATTEMPTS,
+            )
+            .values(
+                status=TASK_FAILED,
+                end_at=now,
+                lease_owner=None,
+                lease_expires_at=None,
+                error=f"Lease expired after {MAX_ATTEMPTS} attempts",
+            )
+            .execution_options(synchronize_session=False)
+        ),
+    )
+    if result.rowcount:
+        logging.warning(f"{result.rowcount} abandoned tasks failed")
+
+
+def claim_task(
+    repository_session: RepositorySession,
+    worker_id: str,
+    lease_s: float = DEFAULT_LEASE_S,
+) -> models.Task | None:
+    """
+    Claim the oldest queued task whose resource is free, or a running task whose
+    lease expired
+    :param repository_session:
+    :param worker_id: unique name of the worker claiming the task
+    :param lease_s: seconds the task stays claimed without heartbeat
+    :return: the claimed task, committed as running, None if no task is waiting
+    """
+    session = repository_session.session
+    now = datetime.now()
+    _fail_abandoned_tasks(repository_session, now)
+    session.commit()
+
+    candidate_ids = session.execute(
+        select(models.Task.id)
+        .where(_claimable(now))
+        .order_by(models.Task.created_at, models.Task.id)
+        .limit(_CLAIM_CANDIDATES)
+    ).scalars()
+    for task_id in list(candidate_ids):
+        # Only one worker updates the row while it is still claimable
+        try:
+            result = cast(
+                CursorResult,
+                session.execute(
+                    update(models.Task)
+                    .where(models.Task.id == task_id, _claimable(now))
+                    .values(
+                        status=TASK_RUNNING,
+                        start_at=now,
+                        attempts=models.Task.attempts + 1,
+                        lease_owner=worker_id,
+                        lease_expires_at=now + timedelta(seconds=lease_s),
+                        heartbeat_at=now,
+                    )
+                    .execution_options(synchronize_session=False)
+                ),
+            )
+            session.commit()
+        except IntegrityError:
+            # Another worker started a task of the resource since the selection
+            session.rollback()
+            return None
+        if result.rowcount == 1:
+            task = session.get(models.Task, task_id, populate_existing=True)
+            if task is not None:
+                return task
+    return None
+
+
+def heartbeat(
+    repository_session: RepositorySession,
+    task_id: int,
+    worker_id: str,
+    lease_s: float = DEFAULT_LEASE_S,
+) -> bool:
+    """
+    Extend the lease of a running task
+    :return: False if the worker lost the lease of the task
+    """
+    now = datetime.now()
+    result = cast(
+        CursorResult,
+        repository_session.session.execute(
+            update(models.Task)
+            .where(
+                models.Task.id == task_id,
+                models.Task.status == TASK_RUNNING,
+                models.Task.lease_owner == worker_id,
+            )
+            .values(
+                lease_expires_at=now + timedelta(seconds=lease_s),
+                heartbeat_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        ),
+    )
+    repository_session.session.commit()
+    return result.rowcount == 1
+
+
+def save_progress(
+    repository_session: RepositorySession,
+    task_id: int,
+    worker_id: str,
+    progress: dict[str, Any],
+) -> bool:
+    """
+    Save the last progress event of a running task, for the other processes.
+    The progress sequence of the task is incremented
+    :return: False if the worker lost the lease of the task
+    """
+    result = cast(
+        CursorResult,
+        repository_session.session.execute(
+            update(models.Task)
+            .where(
+                models.Task.id == task_id,
+                models.Task.status == TASK_RUNNING,
+                models.Task.lease_owner == worker_id,
+            )
+            .values(
+                progress=json.dumps(progress),
+                progress_sequence=models.Task.progress_sequence + 1,
+            )
+            .execution_options(synchronize_session=False)
+        ),
+    )
+    repository_session.session.commit()
+    return result.rowcount == 1
+
+
+def task_progress(task: models.Task) -> dict[str, Any] | None:
+    return json.loads(task.progress) if task.progress else None
+
+
+def finish_task(
+    repository_session: RepositorySession,
+    task_id: int,
+    worker_id: str,
+    error: str | None = None,
+    stacktrace: str | None = None,
+) -> bool:
+    """
+    Record the end of a task and release its lease
+    :param error: message of the error that failed the task, succeeded if not set
+    :return: False if the worker lost the lease of the task, it is then not updated
+    """
+    result = cast(
+        CursorResult,
+        repository_session.session.execute(
+            update(models.Task)
+            .where(
+                models.Task.id == task_id,
+                models.Task.status == TASK_RUNNING,
+                models.Task.lease_owner == worker_id,
+            )
+            .values(
+                status=TASK_SUCCEEDED if error is None else TASK_FAILED,
+                end_at=datetime.now(),
+                lease_owner=None,
+                lease_expires_at=None,
+                error=error,
+                stacktrace=stacktrace,
+            )
+            .execution_options(synchronize_session=False)
+        ),
+    )
+    repository_session.session.commit()
+    return result.rowcount == 1
+
+
+def worker_heartbeat(repository_session: RepositorySession, worker_id: str):
+    """
+    Record that the worker is alive, idle or running a task
+    """
+    repository_session.session.merge(
+        models.Worker(id=worker_id, heartbeat_at=datetime.now())
+    )
+    repository_session.session.commit()
+
+
+def remove_worker(repository_session: RepositorySession, worker_id: str):
+    """
+    Forget a worker that stopped
+    """
+    repository_session.session.execute(
+        delete(models.Worker).where(models.Worker.id == worker_id)
+    )
+    repository_session.session.commit()
+
+
+def alive_workers(
+    repository_session: RepositorySession, alive_s: float = WORKER_ALIVE_S
+) -> list[str]:
+    """
+    :return: the workers whose last heartbeat is less than alive_s seconds old
+    """
+    return list(
+        repository_session.session.execute(
+            select(models.Worker.id).where(
+                models.Worker.heartbeat_at
+                >= datetime.now() - timedelta(seconds=alive_s)
+            )
+        ).scalars()
+    )
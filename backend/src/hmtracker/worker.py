@@ -0,0 +1,211 @@
+"""
+Worker running the tasks queued in the TASK table by the API, e.g. the loading of the
+HM stats and the autolineups. The API only queues the tasks, at least one worker has
+to run next to it. Several workers can run at the same time, each runs one task and
+the tasks of a same resource (e.g. the loads of the stats) never overlap.
+
+    python -m hmtracker.worker
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import traceback
+from collections.abc import Callable
+from os import getenv
+
+from hmtracker.common.constants import (
+    HM_DATABASE_URL_ENV_NAME,
+    HM_METRICS_ENV_NAME,
+    HM_METRICS_TOKEN_ENV_NAME,
+)
+from hmtracker.common.metrics import metrics_enabled, start_metrics_server
+from hmtracker.common.progress import ProgressEvent, progress_events
+from hmtracker.database.repository import create_repository_session_maker
+from hmtracker.services import jobs
+
+DEFAULT_POLL_INTERVAL_S = 5.0
+
+
+class Worker:
+    def __init__(
+        self,
+        database_url: str,
+        jobs_by_name: dict[str, Callable[..., None]],
+        worker_id: str | None = None,
+        lease_s: float = jobs.DEFAULT_LEASE_S,
+        poll_interval_s: float = DEFAULT_POLL_INTERVAL_S,
+    ):
+        """
+        :param database_url: database of the TASK table
+        :param jobs_by_name: function run for each task name, with the task parameters
+        :param worker_id: unique name of the worker, host and pid if not set
+        :param lease_s: seconds a task stays claimed if the worker stops its heartbeats
+        :param poll_interval_s: seconds between two checks of the queue when it is empty
+        """
+        self.repository_session_maker = create_repository_session_maker(database_url)
+        self.jobs_by_name = jobs_by_name
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_s = lease_s
+        self.poll_interval_s = poll_interval_s
+        self.stop_event = threading.Event()
+
+    def run(self):
+        """
+        Run the queued tasks until stop is called
+        """
+        logging.info(f"Worker {self.worker_id} started")
+        try:
+            while not self.stop_event.is_set():
+                if not self.run_next_task():
+                    self.stop_event.wait(self.poll_interval_s)
+        finally:
+            with self.repository_session_maker() as repository_session:
+                jobs.remove_worker(repository_session, self.worker_id)
+        logging.info(f"Worker {self.worker_id} stopped")
+
+    def stop(self):
+        """
+        Stop the worker once its current task is done
+        """
+        self.stop_event.set()
+
+    def run_next_task(self) -> bool:
+        """
+        :return: False if no task was waiting
+        """
+        with self.repository_session_maker() as repository_session:
+            jobs.worker_heartbeat(repository_session, self.worker_id)
+            task = jobs.claim_task(repository_session, self.worker_id, self.lease_s)
+            if task is None:
+                return False
+            task_id, name = task.id, task.name
+            parameters = jobs.task_parameters(task)
+
+        logging.info(f"Task {task_id} started: {name} {parameters}")
+
+        def save_progress(event: ProgressEvent):
+            with self.repository_session_maker() as repository_session:
+                jobs.save_progress(
+                    repository_session, task_id, self.worker_id, event.to_dict()
+                )
+
+        progress_events.add_listener(save_progress)
+        error = stacktrace = None
+        heartbeat_stop = threading.Event()
+        heartbeat_thread = threading.Thread(
+            target=self._heartbeat,
+            args=(task_id, heartbeat_stop),
+            name=f"heartbeat-{task_id}",
+            daemon=True,
+        )
+        heartbeat_thread.start()
+        try:
+            job = self.jobs_by_name.get(name)
+            if job is None:
+                raise ValueError(f"Unknown task {name}")
+            job(**parameters)
+        except Exception as e:
+            error = str(e)
+            stacktrace = traceback.format_exc()
+            logging.error(f"Task {task_id} failed: {name} {error}")
+        finally:
+            progress_events.remove_listener(save_progress)
+            heartbeat_stop.set()
+            heartbeat_thread.join()
+
+        with self.repository_session_maker() as repository_session:
+            if not jobs.finish_task(
+                repository_session, task_id, self.worker_id, error, stacktrace
+            ):
+                logging.warning(
+                    f"Task {task_id} lease was lost, its result isn't recorded"
+                )
+        if error is None:
+            logging.info(f"Task {task_id} succeeded: {name}")
+        return True
+
+    def _heartbeat(self, task_id: int, heartbeat_stop: threading.Event):
+        while not heartbeat_stop.wait(self.lease_s / 3):
+            try:
+                with self.repository_session_maker() as repository_session:
+                    jobs.worker_heartbeat(repository_session, self.worker_id)
+                    if not jobs.heartbeat(
+                        repository_session, task_id, self.worker_id, self.lease_s
+                    ):
+                        logging.warning(f"Task {task_id} lease was lost")
+                        return
+            except Exception as e:
+                # The lease expires only after several missed heartbeats
+                logging.warning(f"Task {task_id} heartbeat failed: {e}")
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description="Run the tasks queued by the API in the database"
+    )
+    argument_parser.add_argument(
+        "-d",
+        "--database-url",
+        default=getenv(HM_DATABASE_URL_ENV_NAME),
+        help=f"""Connection string to connect to the database of the tasks.
+                             If not set, use environment variable {HM_DATABASE_URL_ENV_NAME}""",
+    )
+    argument_parser.add_argument(
+        "-l",
+        "--lease",
+        type=float,
+        default=jobs.DEFAULT_LEASE_S,
+        help="""Seconds before another worker can claim a task whose worker stopped sending heartbeats""",
+    )
+    argument_parser.add_argument(
+        "-i",
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL_S,
+        help="""Seconds between two checks of the queue when no task is waiting""",
+    )
+    argument_parser.add_argument(
+        "-o",
+        "--once",
+        action="store_true",
+        help="""If present, run the waiting tasks then stop""",
+    )
+    argument_parser.add_argument(
+        "-m",
+        "--metrics-port",
+        type=int,
+        help=f"""Port serving the metrics of the worker, if {HM_METRICS_ENV_NAME} is true.
+                             They are only served to the bearer of {HM_METRICS_TOKEN_ENV_NAME}""",
+    )
+    argument_parser.add_argument(
+        "--metrics-host",
+        default="127.0.0.1",
+        help="""Address the metrics server is bound to, only the local host by default""",
+    )
+    args = argument_parser.parse_args()
+    if args.database_url is None:
+        raise SystemError(f"{HM_DATABASE_URL_ENV_NAME} is not defined")
+
+    logging.basicConfig(level=logging.INFO)
+    from hmtracker.services.admin import JOBS
+
+    if args.metrics_port is not None and metrics_enabled():
+        start_metrics_server(args.metrics_port, args.metrics_host)
+
+    worker = Worker(
+        args.database_url,
+        JOBS,
+        lease_s=args.lease,
+        poll_interval_s=args.poll_interval,
+    )
+    if args.once:
+        while worker.run_next_task():
+            pass
+    else:
+        signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+        signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+        worker.run()
@@ -0,0 +1,83 @@
+"""
+Rows per second of the conversion of a player stats CSV, row by row against by column.
+
+    python -m tests.benchmarks.convert_stats --players 1000 --days 100
+"""
+
+import argparse
+import csv
+import logging
+import os
+import tempfile
+import time
+
+from hmtracker.loader.playerstats import mapper
+from hmtracker.loader.playerstats.source.file import __ENCODING, load_csv
+from tests.benchmarks.import_stats import generate_rows
+
+
+def _try_convert(data_dict: dict[str, str], field_name: str, type_cast):
+    """
+    Previous conversion of a single value, one warning for each invalid value
+    """
+    if field_name not in data_dict:
+        return None
+    field: str = data_dict[field_name]
+    if field == "":
+        return None
+    try:
+        return type_cast(field)
+    except Exception as exception:
+        logging.warning(
+            f'Invalid field cannot convert value "{field}" into type <{type_cast.__name__}>: {exception}'
+        )
+        return None
+
+
+def convert_by_row(player_stats_data: list[dict[str, str]]) -> list[dict]:
+    return [
+        {
+            field_name: _try_convert(player, field_name, convertion)
+            for field_name, convertion in mapper.FIELDS.items()
+        }
+        for player in player_stats_data
+    ]
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(
+        description="Benchmark the conversion of the rows of a player stats CSV"
+    )
+    argument_parser.add_argument("--players", type=int, default=1000)
+    argument_parser.add_argument("--days", type=int, default=100)
+    arguments = argument_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "playerstats.csv")
+        rows = list(generate_rows(arguments.players, arguments.days))
+        with open(csv_path, "w", encoding=__ENCODING, newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=rows[0].keys(), delimiter=";")
+            writer.writeheader()
+            writer.writerows(rows)
+        player_stats_data = load_csv(csv_path)
+
+    results = []
+    for name, convert in (
+        ("Row", convert_by_row),
+        ("Column", mapper._convert_columns),
+    ):
+        started_at = time.perf_counter()
+        results.append(convert(player_stats_data))
+        elapsed = time.perf_counter() - started_at
+        print(
+            f"{name:<6} {len(player_stats_data)} rows in {elapsed:6.2f}s "
+            f"{len(player_stats_data) / elapsed:10.0f} rows/s"
+        )
+
+    by_row, by_column = results
+    if by_row != [dict(zip(by_column, row)) for row in zip(*by_column.values())]:
+        raise AssertionError("Both conversions should give the same values")
+
+
+if __name__ == "__main__":
+    main()
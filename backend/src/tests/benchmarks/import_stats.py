@@ -0,0 +1,110 @@
+"""
+Rows per second of the player stats import, ORM unit of work against Core bulk insert.
+
+    python -m tests.benchmarks.import_stats --players 1000 --days 20
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from hmtracker.database import models
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.repository import create_repository_session_maker
+from hmtracker.loader.playerstats.importer import import_hockey_stats_chunks
+from hmtracker.loader.playerstats.mapper import iter_player_stats_chunks
+
+FIRST_DAY = date(2024, 9, 1)
+
+
+def generate_rows(players: int, days: int):
+    for day in range(days):
+        validity_date = (FIRST_DAY + timedelta(days=day)).isoformat()
+        for player_id in range(1, players + 1):
+            yield {
+                "id": str(player_id),
+                "date": validity_date,
+                "name": f"Player {player_id}",
+                "role": "FW",
+                "club": "FRI",
+                "foreigner": "NON",
+                "Price": str(10 + (player_id + day) % 20),
+                "Ownership": "12.5%",
+                "HM points": str(day),
+                "Appareances": str(day),
+                "Goal": "1",
+                "Assist #1": "1",
+                "Assist #2": "0",
+                "Assist OT": "0",
+                "Penalties": "2",
+                "+/-": "0",
+            }
+
+
+def import_with_orm(database_url: str, chunks):
+    """
+    Previous import path, every object flushed by the unit of work of the ORM
+    """
+    repository_session = create_repository_session_maker(database_url)()
+    importation = models.StatImport(origin="Benchmark")
+    repository_session.session.add(importation)
+    seasons: dict = {}
+    known_players: set[tuple[int, int]] = set()
+    for players, players_stats in chunks:
+        for player, stats in zip(players, players_stats):
+            if stats.validity_date not in seasons:
+                seasons[stats.validity_date] = repository_session.find_season(
+                    stats.validity_date
+                ).id
+            player.season_id = stats.season_id = seasons[stats.validity_date]
+            stats.importation = importation
+            if (player.id, player.season_id) not in known_players:
+                known_players.add((player.id, player.season_id))
+                repository_session.session.add(player)
+        repository_session.session.add_all(players_stats)
+        repository_session.session.commit()
+    repository_session.end_session()
+
+
+def import_with_core(database_url: str, chunks):
+    repository_session = create_repository_session_maker(database_url)()
+    import_hockey_stats_chunks(repository_session, chunks, origin="Benchmark")
+    repository_session.end_session()
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(
+        description="Benchmark the import of player stats into a SQLite database"
+    )
+    argument_parser.add_argument("--players", type=int, default=1000)
+    argument_parser.add_argument("--days", type=int, default=20)
+    argument_parser.add_argument("--chunk-size", type=int, default=5000)
+    arguments = argument_parser.parse_args()
+    total_rows = arguments.players * arguments.days
+
+    for name, import_function in (("ORM", import_with_orm), ("Core", import_with_core)):
+        with tempfile.TemporaryDirectory() as directory:
+            database_url = f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+            initialize_database(database_url)
+            # Mapped beforehand to only measure the writes
+            chunks = list(
+                iter_player_stats_chunks(
+                    generate_rows(arguments.players, arguments.days),
+                    arguments.chunk_size,
+                )
+            )
+
+            started_at = time.perf_counter()
+            import_function(database_url, chunks)
+            elapsed = time.perf_counter() - started_at
+
+        print(
+            f"{name:<5} {total_rows} rows in {elapsed:6.2f}s "
+            f"{total_rows / elapsed:10.0f} rows/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Query plans and timings of the repository methods, without and with the indexes of the
+models, on a synthetic SQLite database.
+
+    python -m tests.benchmarks.query_indexes --players 2000 --days 150 --managers 500
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections.abc import Mapping, Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Engine, Index, event, insert
+
+from hmtracker.database import models
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.database import init_engine
+from hmtracker.database.repository import (
+    RepositorySession,
+    create_repository_session_maker,
+)
+from hmtracker.loader.playerstats.latest import rebuild_latest_stats
+
+FIRST_DAY = datetime(2024, 9, 1)
+REPETITIONS = 5
+
+QUERIES = {
+    "get_player_stats": lambda repository, sample: repository.get_player_stats(
+        sample.player_ids[:50], sample.season_id
+    ),
+    "get_current_player_stats": lambda repository, sample: (
+        repository.get_current_player_stats(sample.player_ids, sample.season_id)
+    ),
+    "get_player_stats_at_date": lambda repository, sample: (
+        repository.get_player_stats_at_date(
+            sample.player_ids[:500], sample.middle_day, sample.season_id
+        )
+    ),
+    "get_team": lambda repository, sample: repository.get_team(
+        sample.manager_id, sample.season_id, "0"
+    ),
+    "get_teams": lambda repository, sample: repository.get_teams(
+        sample.manager_id, sample.season_id
+    ),
+    "get_managers_with_autolineup": lambda repository, sample: (
+        repository.get_managers_with_autolineup(
+            last_autolineup_before=sample.middle_day
+        )
+    ),
+    "get_last_played_match": lambda repository, sample: (
+        repository.get_last_played_match()
+    ),
+    "get_matches_for_season": lambda repository, sample: (
+        repository.get_matches_for_season(sample.season_id)
+    ),
+}
+
+
+class Sample:
+    def __init__(self, season_id: int, players: int, days: int):
+        self.season_id = season_id
+        self.player_ids = list(range(1, players + 1))
+        self.middle_day = FIRST_DAY + timedelta(days=days // 2)
+        self.manager_id = 1
+
+
+def seed(engine: Engine, season_id: int, players: int, days: int, managers: int):
+    random_generator = random.Random(0)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(models.HockeyPlayer),
+            [
+                {
+                    "id": player_id,
+                    "season_id": season_id,
+                    "name": f"Player {player_id}",
+                    "role": "FW",
+                    "foreigner": False,
+                }
+                for player_id in range(1, players + 1)
+            ],
+        )
+        for day in range(days):
+            connection.execute(
+                insert(models.HockeyPlayerStats),
+                [
+                    {
+                        "player_id": player_id,
+                        "season_id": season_id,
+                        "validity_date": FIRST_DAY + timedelta(days=day),
+                        "price": random_generator.randint(5, 30),
+                        "club": "FRI",
+                    }
+                    for player_id in range(1, players + 1)
+                ],
+            )
+        connection.execute(
+            insert(models.Manager),
+            [
+                {
+                    "id": manager_id,
+                    "email": f"manager{manager_id}@example.com",
+                    "autolineup": manager_id % 2 == 0,
+                    "last_autolineup": FIRST_DAY
+                    + timedelta(days=random_generator.randint(0, days)),
+                }
+                for manager_id in range(1, managers + 1)
+            ],
+        )
+        connection.execute(
+            insert(models.Team),
+            [
+                {
+                    "team": str(team),
+                    "manager_id": manager_id,
+                    "player_id": random_generator.randint(1, players),
+                    "season_id": season_id,
+                    "from_datetime": FIRST_DAY,
+                }
+                for manager_id in range(1, managers + 1)
+                for team in range(2)
+                for _ in range(20)
+            ],
+        )
+        connection.execute(
+            insert(models.Match),
+            [
+                {
+                    "id": match_id,
+                    "home_club": "FRI",
+                    "away_club": "LAU",
+                    "match_datetime": FIRST_DAY + timedelta(hours=6 * match_id),
+                }
+                for match_id in range(1, 4 * days)
+            ],
+        )
+
+
+def _benchmark_indexes() -> list[Index]:
+    return [
+        index
+        for table in models.HMDatabaseObject.metadata.sorted_tables
+        for index in table.indexes
+        if table.name != models.StatImport.__tablename__
+    ]
+
+
+def measure(database_url: str, sample: Sample) -> dict[str, tuple[float, list[str]]]:
+    """
+    :return: the best time of each query, with the query plans of its statements
+    """
+    repository: RepositorySession = create_repository_session_maker(database_url)()
+    engine: Engine = init_engine(database_url)  # the engine of the repository session
+    statements: list[tuple[str, Sequence[Any] | Mapping[str, Any]]] = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    results = {}
+    for name, query in QUERIES.items():
+        query(repository, sample)  # Warm up the caches
+        elapsed = []
+        for _ in range(REPETITIONS):
+            started_at = time.perf_counter()
+            query(repository, sample)
+            elapsed.append(time.perf_counter() - started_at)
+            repository.session.expunge_all()
+
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", record_statement)
+        query(repository, sample)
+        event.remove(engine, "before_cursor_execute", record_statement)
+        with engine.connect() as connection:
+            plans = [
+                " | ".join(
+                    row[-1]
+                    for row in connection.exec_driver_sql(
+                        f"EXPLAIN QUERY PLAN {statement}", parameters
+                    )
+                )
+                for statement, parameters in statements
+            ]
+        results[name] = (min(elapsed), plans)
+    repository.end_session()
+    return results
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(
+        description="Benchmark the repository queries without and with the indexes"
+    )
+    argument_parser.add_argument("--players", type=int, default=2000)
+    argument_parser.add_argument("--days", type=int, default=150)
+    argument_parser.add_argument("--managers", type=int, default=500)
+    arguments = argument_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+        initialize_database(database_url)
+        engine = init_engine(database_url)
+        repository = create_repository_session_maker(database_url)()
+        season_id = repository.find_season(FIRST_DAY).id
+        repository.end_session()
+
+        indexes = _benchmark_indexes()
+        for index in indexes:
+            index.drop(engine)
+        started_at = time.perf_counter()
+        seed(engine, season_id, arguments.players, arguments.days, arguments.managers)
+        repository = create_repository_session_maker(database_url)()
+        rebuild_latest_stats(repository)
+        repository.end_session()
+        print(
+            f"Seeded {arguments.players * arguments.days} player stats "
+            f"in {time.perf_counter() - started_at:.1f}s"
+        )
+
+        sample = Sample(season_id, arguments.players, arguments.days)
+        before = measure(database_url, sample)
+        for index in indexes:
+            index.create(engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+        after = measure(database_url, sample)
+        engine.dispose()
+
+    for name in QUERIES:
+        before_time, before_plans = before[name]
+        after_time, after_plans = after[name]
+        print(
+            f"\n{name}: {before_time * 1000:8.2f}ms -> {after_time * 1000:8.2f}ms "
+            f"({before_time / after_time:5.1f}x)"
+        )
+        for before_plan, after_plan in zip(before_plans, after_plans):
+            print(f"  before: {before_plan}")
+            print(f"  after:  {after_plan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+from tests.fakehm.server import FakeHMConfig, FakeHMServer, manager_credentials
+
+__all__ = ["FakeHMConfig", "FakeHMServer", "manager_credentials"]
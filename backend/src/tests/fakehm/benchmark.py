@@ -0,0 +1,81 @@
+"""
+Throughput of the HM scrapping against the fake HM server.
+
+    python -m tests.fakehm.benchmark --players 500 --latency 0.05 --workers 1 4 8
+"""
+
+import argparse
+import os
+import time
+
+from hmtracker.common.constants import HM_BASE_URL_ENV_NAME
+from hmtracker.loader.playerstats.source.website import playerstats_ajax_loader
+from hmtracker.services.autolineup import autolineup
+from tests.fakehm.server import FakeHMConfig, FakeHMServer, manager_credentials
+
+
+def _report(name: str, started_at: float, server: FakeHMServer, requests_before: int):
+    elapsed = time.perf_counter() - started_at
+    requests = server.stats.total - requests_before
+    print(
+        f"{name:<32} {elapsed:8.2f}s {requests:7d} requests {requests / elapsed:9.1f} req/s"
+    )
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(
+        description="Benchmark the HM scrapping against a local fake HM server"
+    )
+    argument_parser.add_argument("--players", type=int, default=500)
+    argument_parser.add_argument("--managers", type=int, default=20)
+    argument_parser.add_argument(
+        "--latency", type=float, default=0.02, help="seconds added to every request"
+    )
+    argument_parser.add_argument("--jitter", type=float, default=0.0)
+    argument_parser.add_argument("--error-rate", type=float, default=0.0)
+    argument_parser.add_argument(
+        "--rate-limit", type=float, default=None, help="requests per second"
+    )
+    argument_parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    arguments = argument_parser.parse_args()
+
+    config = FakeHMConfig(
+        players=arguments.players,
+        managers=arguments.managers,
+        latency=arguments.latency,
+        latency_jitter=arguments.jitter,
+        error_rate=arguments.error_rate,
+        rate_limit=arguments.rate_limit,
+    )
+    with FakeHMServer(config) as server:
+        # The scrappers created by the loaders read HM url from the environment
+        os.environ[HM_BASE_URL_ENV_NAME] = server.url
+        user, password = manager_credentials(0)
+        for workers in arguments.workers:
+            requests_before = server.stats.total
+            started_at = time.perf_counter()
+            loader = playerstats_ajax_loader(user, password, max_workers=workers)
+            loaded = len(loader())
+            _report(
+                f"player stats ({workers} workers)",
+                started_at,
+                server,
+                requests_before,
+            )
+            print(f"{'':<32} {loaded}/{config.players} players loaded")
+
+        requests_before = server.stats.total
+        started_at = time.perf_counter()
+        for index in range(config.managers):
+            autolineup(*manager_credentials(index))
+        _report(
+            f"autolineup ({config.managers} managers)",
+            started_at,
+            server,
+            requests_before,
+        )
+        print(f"Responses status: {dict(server.stats.statuses)}")
+
+
+if __name__ == "__main__":
+    main()
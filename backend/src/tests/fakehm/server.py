@@ -0,0 +1,418 @@
+"""
+Local stand-in for the Hockey Manager website.
+
+Implements the pages and ajax requests used by the scrappers with generated
+players and managers, with configurable latency, error rate and rate limiting.
+
+    with FakeHMServer(FakeHMConfig(players=500, latency=0.05)) as server:
+        scrapper = HMAjaxScrapper(base_url=server.url)
+"""
+
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from uuid import uuid4
+
+from hmtracker.loader.matches.mapper import CLUB_MAPPING
+
+CLUBS = sorted(CLUB_MAPPING.values())
+ROLES = ["GK", "DF", "FW"]
+SESSION_COOKIE = "PHPSESSID"
+
+
+@dataclass
+class FakeHMConfig:
+    players: int = 500
+    managers: int = 10
+    teams_per_manager: int = 2
+    team_size: int = 12
+    latency: float = 0.0  # seconds added to every request
+    latency_jitter: float = 0.0  # maximum random seconds added to the latency
+    error_rate: float = 0.0  # probability of answering with an error 500
+    rate_limit: float | None = None  # requests per second before answering 429
+    burst: int = 10  # requests accepted at once by the rate limiter
+    arcade: bool = False  # sessions start in arcade mode
+    seed: int = 0
+
+
+@dataclass
+class FakePlayer:
+    id: int
+    name: str
+    role: str
+    club: str
+    foreigner: bool
+    stats: dict[str, str]
+
+
+@dataclass
+class FakeManager:
+    email: str
+    password: str
+    teams: dict[str, list[int]]  # team id -> players id
+
+
+@dataclass
+class _Session:
+    manager: FakeManager | None = None
+    team: str | None = None
+    arcade: bool = False
+
+
+@dataclass
+class FakeHMStats:
+    """Requests received by the server"""
+
+    requests: Counter = field(default_factory=Counter)  # per endpoint
+    statuses: Counter = field(default_factory=Counter)  # per status code
+    auto_lineups: Counter = field(default_factory=Counter)  # per team id
+
+    @property
+    def total(self) -> int:
+        return sum(self.requests.values())
+
+
+def manager_credentials(index: int) -> tuple[str, str]:
+    """
+    :return: email and password of the generated manager
+    """
+    return f"manager{index}@example.com", f"password{index}"
+
+
+def _generate_players(config: FakeHMConfig, rng: random.Random) -> list[FakePlayer]:
+    players = []
+    for player_id in range(1, config.players + 1):
+        assist_1, assist_2, assist_ot = (rng.randint(0, 10) for _ in range(3))
+        goal = rng.randint(0, 15)
+        appearances = rng.randint(0, 30)
+        stats = {
+            "Price": f"{rng.randint(10, 60) / 2}",
+            "Ownership": f"{rng.randint(0, 400) / 10}%",
+            "HM points": str(rng.randint(-10, 200)),
+            "Appareances": str(appearances),
+            "Goal": str(goal),
+            "Goal OT": str(rng.randint(0, 2)),
+            "Assist #1": str(assist_1),
+            "Assist #2": str(assist_2),
+            "Assist OT": str(assist_ot),
+            "Points": str(goal + assist_1 + assist_2 + assist_ot),
+            "GWG": str(rng.randint(0, 3)),
+            "Penalties": str(rng.randint(0, 40)),
+            "+/-": str(rng.randint(-15, 15)),
+            "Shots": str(rng.randint(0, 80)),
+        }
+        players.append(
+            FakePlayer(
+                id=player_id,
+                name=f"Player {player_id}",
+                role=rng.choice(ROLES),
+                club=rng.choice(CLUBS),
+                foreigner=rng.random() < 0.2,
+                stats=stats,
+            )
+        )
+    return players
+
+
+def _generate_managers(
+    config: FakeHMConfig, rng: random.Random, players: list[FakePlayer]
+) -> dict[str, FakeManager]:
+    players_id = [player.id for player in players]
+    managers = {}
+    for index in range(config.managers):
+        email, password = manager_credentials(index)
+        teams = {
+            f"{rng.getrandbits(128):032x}": rng.sample(
+                players_id, min(config.team_size, len(players_id))
+            )
+            for _ in range(config.teams_per_manager)
+        }
+        managers[email] = FakeManager(email=email, password=password, teams=teams)
+    return managers
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class FakeHMServer:
+    def __init__(self, config: FakeHMConfig | None = None) -> None:
+        self.config = FakeHMConfig() if config is None else config
+        self._rng = random.Random(self.config.seed)
+        self.players = _generate_players(self.config, self._rng)
+        self.players_by_id = {player.id: player for player in self.players}
+        self.managers = _generate_managers(self.config, self._rng, self.players)
+        self.stats = FakeHMStats()
+        self._sessions: dict[str, _Session] = {}
+        self._lock = threading.Lock()
+        self._rate_limiter = (
+            None
+            if self.config.rate_limit is None
+            else _TokenBucket(self.config.rate_limit, self.config.burst)
+        )
+        self._http_server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        if self._http_server is None:
+            raise RuntimeError("Fake HM server isn't started")
+        host, port = self._http_server.server_address[:2]
+        return f"http://{host!s}:{port}/"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Serve in a background thread
+        :return: url of the server
+        """
+        server = self
+
+        class Handler(_FakeHMRequestHandler):
+            fake_hm = server
+
+        self._http_server = ThreadingHTTPServer((host, port), Handler)
+        self._http_server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._http_server.serve_forever, name="fake-hm", daemon=True
+        )
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        if self._http_server is None:
+            return
+        self._http_server.shutdown()
+        self._http_server.server_close()
+        self._http_server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _get_session(self, session_id: str | None) -> tuple[str, _Session]:
+        with self._lock:
+            if session_id is None or session_id not in self._sessions:
+                session_id = uuid4().hex
+                self._sessions[session_id] = _Session(arcade=self.config.arcade)
+            return session_id, self._sessions[session_id]
+
+    def _record(self, endpoint: str, status: int):
+        with self._lock:
+            self.stats.requests[endpoint] += 1
+            self.stats.statuses[status] += 1
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.config.error_rate
+
+    def _wait_latency(self):
+        latency = self.config.latency
+        if self.config.latency_jitter:
+            with self._lock:
+                latency += self._rng.uniform(0, self.config.latency_jitter)
+        if latency > 0:
+            time.sleep(latency)
+
+    def _is_rate_limited(self) -> bool:
+        return self._rate_limiter is not None and not self._rate_limiter.try_acquire()
+
+    # Endpoints, return (status, body)
+
+    def try_login(self, session: _Session, data: dict[str, str]) -> tuple[int, str]:
+        manager = self.managers.get(data.get("fh_u", ""))
+        if manager is None or manager.password != data.get("fh_p"):
+            return 200, "0"
+        session.manager = manager
+        session.team = next(iter(manager.teams), None)
+        return 200, "1"
+
+    def players_list(self, session: _Session, data: dict[str, str]) -> tuple[int, str]:
+        if session.manager is None:
+            return 403, ""
+        club = int(data.get("club", "0"))
+        team_players = (
+            set(session.manager.teams[session.team])
+            if session.team is not None
+            else set()
+        )
+        if club == -1:
+            if not team_players:
+                return 200, ""
+            players = [player for player in self.players if player.id in team_players]
+        else:
+            players = [
+                player for player in self.players if player.id not in team_players
+            ]
+        return 200, "".join(_player_row_html(player) for player in players)
+
+    def player_detail(self, session: _Session, data: dict[str, str]) -> tuple[int, str]:
+        if session.manager is None:
+            return 403, ""
+        try:
+            player = self.players_by_id[int(data.get("id", ""))]
+        except (KeyError, ValueError):
+            return 200, ""
+        return 200, _player_detail_html(player)
+
+    def use_team(self, session: _Session, data: dict[str, str]) -> tuple[int, str]:
+        if session.manager is None:
+            return 403, ""
+        team_id = data.get("myteam", "")
+        if team_id not in session.manager.teams:
+            return 200, ""
+        session.team = team_id
+        return 200, "1"
+
+    def auto_lineup(self, session: _Session, data: dict[str, str]) -> tuple[int, str]:
+        if session.manager is None or session.team is None:
+            return 200, "0"
+        with self._lock:
+            self.stats.auto_lineups[session.team] += 1
+        return 200, "1"
+
+    def switch_mode(self, session: _Session, data: dict[str, str]) -> tuple[int, str]:
+        session.arcade = not session.arcade
+        return 200, "1"
+
+    def dashboard(self, session: _Session) -> tuple[int, str]:
+        if session.manager is None:
+            return 403, ""
+        return 200, _dashboard_html(session)
+
+
+_AJAX_ENDPOINTS = {
+    "try-login": FakeHMServer.try_login,
+    "transfers-classic-get-list-preview": FakeHMServer.players_list,
+    "get-player-detail": FakeHMServer.player_detail,
+    "use-team": FakeHMServer.use_team,
+    "roster-auto-lineup": FakeHMServer.auto_lineup,
+    "switch-classic-arcade": FakeHMServer.switch_mode,
+}
+
+
+class _FakeHMRequestHandler(BaseHTTPRequestHandler):
+    fake_hm: FakeHMServer
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass  # Keep the test output clean
+
+    def do_GET(self):
+        path = "/" + self.path.split("?")[0].lstrip("/")
+        if path != "/fr/dashboard":
+            self._reply("unknown", 404, "")
+            return
+        self._handle("dashboard", lambda session: self.fake_hm.dashboard(session))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8")
+        data = {name: values[-1] for name, values in parse_qs(body).items()}
+
+        path = self.path.split("?")[0]
+        endpoint = path.rsplit("/", 1)[-1]
+        if not path.startswith("/ajaxrequest/") or endpoint not in _AJAX_ENDPOINTS:
+            self._reply("unknown", 404, "")
+            return
+        handler = _AJAX_ENDPOINTS[endpoint]
+        self._handle(endpoint, lambda session: handler(self.fake_hm, session, data))
+
+    def _handle(self, endpoint: str, handler):
+        fake_hm = self.fake_hm
+        if fake_hm._is_rate_limited():
+            self._reply(endpoint, 429, "Too Many Requests")
+            return
+        fake_hm._wait_latency()
+        if fake_hm._should_fail():
+            self._reply(endpoint, 500, "Internal Server Error")
+            return
+
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        session_id, session = fake_hm._get_session(
+            cookie[SESSION_COOKIE].value if SESSION_COOKIE in cookie else None
+        )
+        status, body = handler(session)
+        self._reply(endpoint, status, body, session_id)
+
+    def _reply(
+        self, endpoint: str, status: int, body: str, session_id: str | None = None
+    ):
+        self.fake_hm._record(endpoint, status)
+        content = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=UTF-8")
+        self.send_header("Content-Length", str(len(content)))
+        if session_id is not None:
+            self.send_header("Set-Cookie", f"{SESSION_COOKIE}={session_id}; Path=/")
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def _player_row_html(player: FakePlayer) -> str:
+    nationality = '<i class="flag ch"></i>' if player.foreigner else ""
+    return (
+        f'<div class="tr row" attr="{player.id}">'
+        f'<div class="td">{player.role}</div>'
+        f'<div class="td name">{player.name}</div>'
+        f'<div class="td"><img src="/site/images/clubs/{player.club}/logo.png"/></div>'
+        f'<div class="td">{player.stats["Price"]}</div>'
+        f'<div class="td">{nationality}</div>'
+        "</div>"
+    )
+
+
+def _player_detail_html(player: FakePlayer) -> str:
+    histograms = "".join(
+        f'<div class="histogram horiz" label="{label}" value="{value}">'
+        f'<span class="bar" style="width: 50%"></span></div>'
+        for label, value in player.stats.items()
+    )
+    return f'<div class="player-detail"><h2>{player.name}</h2>{histograms}</div>'
+
+
+def _dashboard_html(session: _Session) -> str:
+    assert session.manager is not None
+    logo = (
+        "logo-hockey-manager-plain_arcade.png"
+        if session.arcade
+        else ("logo-hockey-manager-plain.png")
+    )
+    teams = "".join(
+        f'<div class="button-medium is-a-team selectTeam pointer" attr="{team_id}">'
+        f'<div class="team-name">Team {index}</div>'
+        f'<div class="team-rank">{1000 + index}\'000 / {index + 1}<sup>e</sup></div>'
+        "</div>"
+        for index, team_id in enumerate(session.manager.teams)
+    )
+    return (
+        "<html><head><title>Hockey Manager</title></head><body>"
+        f'<a href="/"><img src="/site/images/2023/logos/{logo}" class="img logo logo-hm" /></a>'
+        f'<div class="teams">{teams}</div>'
+        "</body></html>"
+    )
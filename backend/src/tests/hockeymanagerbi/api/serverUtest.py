@@ -0,0 +1,118 @@
+import importlib
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from hmtracker.common.constants import (
+    HM_DATABASE_URL_ENV_NAME,
+    HM_METRICS_TOKEN_ENV_NAME,
+)
+from hmtracker.database import database
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.repository import create_repository_session_maker
+from hmtracker.loader.playerstats.importer import import_hockey_stats_chunks
+from hmtracker.loader.playerstats.mapper import iter_player_stats_chunks
+from tests.hockeymanagerbi.querybudget import (
+    QUERY_COUNT_ENVIRONMENT,
+    QueryBudgetMixin,
+    query_count,
+)
+
+PLAYERS = 20
+
+
+def _rows():
+    for player_id in range(1, PLAYERS + 1):
+        yield {
+            "id": str(player_id),
+            "date": date.today().isoformat(),
+            "name": f"Player {player_id}",
+            "role": "FW",
+            "club": "FRI",
+            "foreigner": "NON",
+            "Price": "10",
+        }
+
+
+class TestQueryBudgets(QueryBudgetMixin, unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The engines and the API count the queries if enabled when they are created
+        query_count_environment = patch.dict(os.environ, QUERY_COUNT_ENVIRONMENT)
+        query_count_environment.start()
+        cls.addClassCleanup(query_count_environment.stop)
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        cls.database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        cls.addClassCleanup(database.dispose_engine, cls.database_url)
+        initialize_database(cls.database_url)
+        with create_repository_session_maker(cls.database_url)() as session:
+            import_hockey_stats_chunks(session, iter_player_stats_chunks(_rows()))
+
+        # The routers read the database url when they are imported
+        with patch.dict(os.environ, {HM_DATABASE_URL_ENV_NAME: cls.database_url}):
+            server = importlib.import_module("hmtracker.api.server")
+        cls.client = TestClient(server.api)
+
+    def test_ping(self):
+        response = self.client.get("/ping")
+
+        self.assertEqual(0, query_count(response))
+
+    def test_metrics_protected(self):
+        with patch.dict(os.environ, {HM_METRICS_TOKEN_ENV_NAME: "secret"}):
+            self.assertEqual(401, self.client.get("/metrics").status_code)
+            self.assertEqual(
+                401,
+                self.client.get(
+                    "/metrics", headers={"Authorization": "Bearer wrong"}
+                ).status_code,
+            )
+            # Metrics are disabled in the tests
+            self.assertEqual(
+                404,
+                self.client.get(
+                    "/metrics", headers={"Authorization": "Bearer secret"}
+                ).status_code,
+            )
+
+    def test_players(self):
+        response = self.client.get("/players/")
+
+        self.assertEqual(PLAYERS, len(response.json()))
+        self.assertQueryBudget(response, max_queries=1)
+
+    def test_latest_player_stats(self):
+        response = self.client.get("/players/latest/")
+
+        self.assertEqual(PLAYERS, len(response.json()))
+        self.assertQueryBudget(response, max_queries=2)
+
+    def test_player_stats(self):
+        response = self.client.get("/players/stats/id/1")
+
+        self.assertEqual(1, len(response.json()))
+        self.assertQueryBudget(response, max_queries=1)
+
+    def test_budget_exceeded(self):
+        response = self.client.get("/players/latest/")
+
+        with self.assertRaises(AssertionError):
+            self.assertQueryBudget(response, max_queries=1)
+
+    def test_repeated_statements(self):
+        with create_repository_session_maker(self.database_url)() as session:
+            with self.assertMaxQueries(1):
+                session.get_players()
+            with self.assertRaises(AssertionError):
+                with self.assertMaxQueries(2):
+                    session.get_player_stats([1])
+                    session.get_player_stats([1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import os
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+from hmtracker.common import metrics
+from hmtracker.common.constants import HM_METRICS_TOKEN_ENV_NAME
+from hmtracker.common.metrics import Counter, Histogram, MetricsRegistry
+from hmtracker.database import database
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.repository import (
+    REPOSITORY_CALL_SECONDS,
+    RepositorySession,
+    create_repository_session_maker,
+    instrument_repository_methods,
+)
+
+
+class MetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.was_enabled = metrics.metrics_enabled()
+        metrics.set_metrics_enabled(True)
+        self.registry = MetricsRegistry()
+
+    def tearDown(self):
+        metrics.set_metrics_enabled(self.was_enabled)
+
+
+class TestMetrics(MetricsTestCase):
+    def test_counter(self):
+        counter = Counter("test_total", "Test", ["table"], registry=self.registry)
+        counter.inc(table="A")
+        counter.inc(2, table="A")
+        counter.inc(table='B"')
+
+        self.assertEqual(3, counter.value(table="A"))
+        self.assertEqual(
+            "# HELP test_total Test\n"
+            "# TYPE test_total counter\n"
+            'test_total{table="A"} 3.0\n'
+            'test_total{table="B\\""} 1.0\n',
+            self.registry.render(),
+        )
+
+    def test_histogram(self):
+        histogram = Histogram(
+            "test_seconds", "Test", ["route"], buckets=(0.1, 1), registry=self.registry
+        )
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.observe(value, route="/players/")
+
+        self.assertEqual(
+            [
+                'test_seconds_bucket{route="/players/",le="0.1"} 1.0',
+                'test_seconds_bucket{route="/players/",le="1.0"} 3.0',
+                'test_seconds_bucket{route="/players/",le="+Inf"} 4.0',
+                'test_seconds_sum{route="/players/"} 6.05',
+                'test_seconds_count{route="/players/"} 4.0',
+            ],
+            self.registry.render().splitlines()[2:],
+        )
+
+    def test_disabled(self):
+        counter = Counter("test_total", "Test", registry=self.registry)
+        histogram = Histogram("test_seconds", "Test", registry=self.registry)
+        metrics.set_metrics_enabled(False)
+
+        counter.inc()
+        with histogram.time():
+            pass
+
+        self.assertEqual(0, counter.value())
+        self.assertEqual(0, histogram.count())
+
+    def test_duplicate_and_labels(self):
+        Counter("test_total", "Test", ["table"], registry=self.registry)
+        with self.assertRaises(ValueError):
+            Counter("test_total", "Test", registry=self.registry)
+        with self.assertRaises(ValueError):
+            Counter("other_total", "Test", ["table"], registry=self.registry).inc()
+
+
+class TestMetricsServer(MetricsTestCase):
+    def setUp(self):
+        super().setUp()
+        server = metrics.start_metrics_server(0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+
+    def _get(self, token: str | None = None) -> int:
+        request = urllib.request.Request(self.url)
+        if token is not None:
+            request.add_header("Authorization", f"Bearer {token}")
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+    def test_token_needed(self):
+        with patch.dict(os.environ, {HM_METRICS_TOKEN_ENV_NAME: "secret"}):
+            self.assertEqual(401, self._get())
+            self.assertEqual(401, self._get("wrong"))
+            self.assertEqual(200, self._get("secret"))
+
+    def test_closed_without_token(self):
+        with patch.dict(os.environ, {HM_METRICS_TOKEN_ENV_NAME: ""}):
+            self.assertEqual(401, self._get(""))
+
+
+class TestRepositoryMetrics(MetricsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.methods = dict(vars(RepositorySession))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        self.addCleanup(database.dispose_engine, self.database_url)
+        initialize_database(self.database_url)
+
+    def tearDown(self):
+        for name, method in self.methods.items():
+            if callable(method):
+                setattr(RepositorySession, name, method)
+        super().tearDown()
+
+    def test_queries_by_repository_method(self):
+        instrument_repository_methods()
+        instrument_repository_methods()  # Doesn't wrap twice
+        queries = database.DB_QUERIES.value(method="get_player")
+        calls = REPOSITORY_CALL_SECONDS.count(method="get_player")
+
+        with create_repository_session_maker(self.database_url)() as repository:
+            self.assertIsNone(repository.get_player(1, 1))
+
+        self.assertEqual(queries + 1, database.DB_QUERIES.value(method="get_player"))
+        self.assertEqual(calls + 1, REPOSITORY_CALL_SECONDS.count(method="get_player"))
+        self.assertIn(
+            'hmtracker_db_queries_total{method="get_player"}',
+            metrics.REGISTRY.render(),
+        )
+
+    def test_engine_not_instrumented_without_metrics(self):
+        database.dispose_engine(self.database_url)
+        metrics.set_metrics_enabled(False)
+        engine = database.get_engine(self.database_url)
+        metrics.set_metrics_enabled(True)
+        queries = database.DB_QUERIES.value(method="other")
+
+        with engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+
+        self.assertEqual(queries, database.DB_QUERIES.value(method="other"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from hmtracker.common.progress import ProgressBuffer, ProgressEvent, ProgressTracker
+
+
+class TestProgressBuffer(unittest.TestCase):
+    def test_ring_buffer(self):
+        buffer = ProgressBuffer(max_size=3)
+        for done in range(5):
+            buffer.publish(ProgressEvent(stage="stage", done=done))
+
+        # Late clients catch up from the events still in the buffer
+        self.assertEqual([3, 4, 5], [event.sequence for event in buffer.since()])
+        self.assertEqual([4], [event.done for event in buffer.since(4)])
+        self.assertEqual([], buffer.wait(5, timeout_s=0.01))
+
+    def test_wait(self):
+        buffer = ProgressBuffer()
+        timer = threading.Timer(
+            0.05, buffer.publish, args=(ProgressEvent(stage="stage", done=1),)
+        )
+        timer.start()
+
+        events = buffer.wait(0, timeout_s=5)
+
+        self.assertEqual([1], [event.done for event in events])
+
+    def test_listeners(self):
+        buffer = ProgressBuffer()
+        received = []
+
+        def failing_listener(event):
+            raise RuntimeError()
+
+        buffer.add_listener(failing_listener)
+        buffer.add_listener(received.append)
+        buffer.publish(ProgressEvent(stage="stage", done=1))
+        buffer.remove_listener(received.append)
+        buffer.publish(ProgressEvent(stage="stage", done=2))
+
+        self.assertEqual([1], [event.done for event in received])
+
+
+class TestProgressTracker(unittest.TestCase):
+    @patch("time.monotonic")
+    def test_rate_and_eta(self, monotonic):
+        buffer = ProgressBuffer()
+        monotonic.return_value = 100.0
+        tracker = ProgressTracker("Load", total=100, min_interval_s=1, buffer=buffer)
+        monotonic.return_value = 100.5
+        tracker.advance(10)  # throttled
+        monotonic.return_value = 102.0
+        tracker.advance(10)
+        tracker.finish()
+
+        start, progress, finished = buffer.since()
+        self.assertEqual(
+            (0, None, None, False),
+            (start.done, start.rate, start.eta_s, start.finished),
+        )
+        self.assertEqual(
+            ("Load", 20, 100), (progress.stage, progress.done, progress.total)
+        )
+        self.assertEqual(10.0, progress.rate)
+        self.assertEqual(8.0, progress.eta_s)
+        self.assertTrue(finished.finished)
+        self.assertEqual(0.0, finished.eta_s)
+
+    def test_unknown_total(self):
+        buffer = ProgressBuffer()
+        tracker = ProgressTracker("Import", min_interval_s=0, buffer=buffer)
+        tracker.advance(5)
+
+        self.assertIsNone(buffer.since()[-1].eta_s)
+        self.assertEqual(5, buffer.since()[-1].done)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from hmtracker.common.constants import (
+    HM_DB_MAX_OVERFLOW_ENV_NAME,
+    HM_DB_POOL_SIZE_ENV_NAME,
+    HM_DB_POOL_TIMEOUT_ENV_NAME,
+    HM_QUERY_COUNT_ENV_NAME,
+    HM_SQLITE_WAL_ENV_NAME,
+)
+from hmtracker.database import database
+
+
+class TestEngineRegistry(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        self.addCleanup(database.dispose_engine, self.database_url)
+
+    def test_shared_engine(self):
+        engine = database.get_engine(self.database_url)
+
+        self.assertIs(engine, database.init_engine(self.database_url))
+        self.assertIs(
+            database.init_session_maker(self.database_url),
+            database.init_session_maker(self.database_url),
+        )
+        self.assertIs(engine, database.init_session_maker(self.database_url).kw["bind"])
+        self.assertIsInstance(engine.pool, database.TimedQueuePool)
+
+    def test_read_only_engine(self):
+        engine = database.get_engine(self.database_url, read_only=True)
+
+        self.assertIsNot(engine, database.get_engine(self.database_url))
+        self.assertIs(engine, database.get_engine(self.database_url, read_only=True))
+        with engine.connect() as connection:
+            with self.assertRaises(OperationalError):
+                connection.execute(text("CREATE TABLE T (id INTEGER)"))
+        # The in-memory databases have a single engine
+        self.assertIs(
+            database.get_engine("sqlite://"),
+            database.get_engine("sqlite://", read_only=True),
+        )
+
+    @patch.dict(os.environ, {HM_SQLITE_WAL_ENV_NAME: "false"})
+    def test_without_wal(self):
+        engine = database.get_engine(self.database_url)
+
+        with engine.connect() as connection:
+            self.assertEqual(
+                "delete", connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+            )
+            self.assertEqual(
+                5000, connection.exec_driver_sql("PRAGMA busy_timeout").scalar()
+            )
+
+    @patch.dict(os.environ, {HM_QUERY_COUNT_ENV_NAME: "true"})
+    def test_count_queries(self):
+        engine = database.get_engine(self.database_url)
+
+        with database.count_queries(track_statements=True) as queries:
+            with engine.connect() as connection:
+                for _ in range(2):
+                    connection.execute(text("SELECT 1"))
+                connection.execute(text("SELECT 2"))
+
+        self.assertEqual(3, queries.count)
+        self.assertEqual({"SELECT 1 ()": 2}, queries.repeated_statements())
+
+    @patch.dict(os.environ, {HM_QUERY_COUNT_ENV_NAME: "false"})
+    def test_without_query_count(self):
+        engine = database.get_engine(self.database_url)
+
+        with database.count_queries() as queries:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+
+        self.assertEqual(0, queries.count)
+
+    def test_dispose_engine(self):
+        engine = database.get_engine(self.database_url)
+
+        database.dispose_engine(self.database_url)
+
+        self.assertIsNot(engine, database.get_engine(self.database_url))
+
+    def test_checkout_stats(self):
+        engine = database.get_engine(self.database_url)
+        for _ in range(3):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+
+        stats = database.pool_stats()[self.database_url]
+
+        self.assertEqual(3, stats["checkouts"])
+        self.assertEqual(0, stats["checked_out"])
+        self.assertEqual(0, stats["timeouts"])
+        self.assertGreaterEqual(stats["max_wait_time_s"], stats["mean_wait_time_s"])
+
+    @patch.dict(
+        os.environ,
+        {
+            HM_DB_POOL_SIZE_ENV_NAME: "1",
+            HM_DB_MAX_OVERFLOW_ENV_NAME: "0",
+            HM_DB_POOL_TIMEOUT_ENV_NAME: "0.05",
+        },
+    )
+    def test_checkout_timeout(self):
+        engine = database.get_engine(self.database_url)
+
+        with engine.connect():
+            with self.assertRaises(PoolTimeoutError):
+                engine.connect()
+
+        stats = database.pool_stats()[self.database_url]
+        self.assertEqual(2, stats["checkouts"])
+        self.assertEqual(1, stats["timeouts"])
+        self.assertGreaterEqual(stats["max_wait_time_s"], 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date
+
+from sqlalchemy import text
+
+from hmtracker.database import database
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.repository import (
+    RepositorySession,
+    create_async_repository_session_maker,
+)
+
+_SLEEP_S = 0.2
+
+
+def _sleep(repository_session: RepositorySession) -> str:
+    time.sleep(_SLEEP_S)
+    return threading.current_thread().name
+
+
+# Counts to a billion, runs for minutes on SQLite
+_SLOW_QUERY = text(
+    "WITH RECURSIVE numbers(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM numbers "
+    "WHERE n < 1000000000) SELECT count(*) FROM numbers"
+)
+
+
+def _slow_query(repository_session: RepositorySession):
+    return repository_session.session.execute(_SLOW_QUERY).scalar()
+
+
+class TestAsyncRepositorySession(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        self.addCleanup(database.dispose_engine, database_url)
+        initialize_database(database_url)
+        self.session_maker = create_async_repository_session_maker(database_url)
+
+    async def test_same_methods(self):
+        async with self.session_maker() as session:
+            season = await session.find_season(date(2024, 10, 1))
+            players = await session.get_players(season_id=season.id)
+            self.assertIs(season, await session.get_season(season.id))
+
+        self.assertEqual([], players)
+
+    async def test_queries_run_in_worker_thread(self):
+        async with self.session_maker() as session:
+            thread_name = await session.run_sync(_sleep)
+
+        self.assertNotEqual(threading.current_thread().name, thread_name)
+
+    async def test_sessions_overlap(self):
+        sessions = [self.session_maker() for _ in range(3)]
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(session.run_sync(_sleep) for session in sessions))
+        self.assertLess(time.perf_counter() - started_at, 2 * _SLEEP_S)
+
+        # The calls on the same session wait for each other
+        started_at = time.perf_counter()
+        await asyncio.gather(*(sessions[0].run_sync(_sleep) for _ in range(2)))
+        self.assertGreaterEqual(time.perf_counter() - started_at, 2 * _SLEEP_S)
+
+    async def test_cancelled_call_keeps_session(self):
+        session = self.session_maker()
+        done = []
+
+        def sleep_then_done(repository_session: RepositorySession):
+            _sleep(repository_session)
+            done.append(True)
+
+        with self.assertRaises(TimeoutError):
+            async with asyncio.timeout(_SLEEP_S / 4):
+                await session.run_sync(sleep_then_done)
+
+        # The timed out call released the session only once it ended
+        self.assertEqual([True], done)
+        await session.run_sync(RepositorySession.end_session)
+
+    async def test_timeout_interrupts_queries(self):
+        async with self.session_maker() as session:
+            # Already in a transaction when the call starts
+            season = await session.find_season(date(2024, 10, 1))
+
+            started_at = time.perf_counter()
+            with self.assertRaises(TimeoutError):
+                await session.run_sync(_slow_query, timeout_s=_SLEEP_S)
+            self.assertLess(time.perf_counter() - started_at, 10 * _SLEEP_S)
+
+            # The session and its connection aren't interrupted after the call
+            await asyncio.sleep(_SLEEP_S)
+            self.assertEqual(season.id, (await session.get_season(season.id)).id)
+
+    async def test_timeout_in_new_transaction(self):
+        async with self.session_maker() as session:
+            with self.assertRaises(TimeoutError):
+                await session.run_sync(_slow_query, timeout_s=_SLEEP_S)
+
+    async def test_timeout_not_reached(self):
+        async with self.session_maker() as session:
+            thread_name = await session.run_sync(_sleep, timeout_s=10 * _SLEEP_S)
+
+        self.assertNotEqual(threading.current_thread().name, thread_name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+
+from sqlalchemy import event, make_url
+from sqlalchemy.exc import NoResultFound
+
+from hmtracker.database import models, seasons
+from hmtracker.database.creation import create_seasons, initialize_database
+from hmtracker.database.repository import create_repository_session_maker
+from hmtracker.database.seasons import SeasonIndex, invalidate_season_index
+
+
+class TestSeasonIndex(unittest.TestCase):
+    season_index = SeasonIndex(
+        [
+            models.Season(id=1, start=date(2023, 8, 1), end=date(2024, 7, 1)),
+            models.Season(id=2, start=date(2024, 8, 1), end=date(2025, 7, 1)),
+            models.Season(
+                id=3, start=date(2024, 8, 1), end=date(2025, 7, 1), arcade=True
+            ),
+        ]
+    )
+
+    def test_find(self):
+        self.assertEqual(1, self.season_index.find(date(2023, 8, 1)).id)
+        self.assertEqual(1, self.season_index.find(datetime(2024, 7, 1)).id)
+        self.assertEqual(2, self.season_index.find(datetime(2024, 10, 5, 12)).id)
+        self.assertEqual(3, self.season_index.find(date(2024, 10, 5), arcade=True).id)
+
+    def test_find_outside_seasons(self):
+        self.assertIsNone(self.season_index.find(date(2023, 7, 31)))
+        self.assertIsNone(self.season_index.find(datetime(2024, 7, 1, 0, 1)))
+        self.assertIsNone(self.season_index.find(date(2026, 1, 1)))
+        self.assertIsNone(self.season_index.find(date(2023, 10, 1), arcade=True))
+
+    def test_get(self):
+        self.assertEqual(date(2024, 8, 1), self.season_index.get(2).start)
+        self.assertIsNone(self.season_index.get(4))
+
+
+class TestRepositorySeasons(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        initialize_database(self.database_url)
+        self.repository_session = create_repository_session_maker(self.database_url)()
+        self.addCleanup(self.repository_session.end_session)
+        self.addCleanup(invalidate_season_index, self.database_url)
+
+        self.statements = []
+        event.listen(
+            self.repository_session.session.get_bind(),
+            "before_cursor_execute",
+            self._count_statement,
+        )
+
+    def _count_statement(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def _season_statements(self) -> int:
+        return sum('"SEASONS"' in statement for statement in self.statements)
+
+    def test_lookups_without_queries(self):
+        season = self.repository_session.find_season(datetime(2024, 10, 1))
+        self.statements.clear()
+
+        for _ in range(10):
+            self.assertEqual(
+                season.id, self.repository_session.get_season(season.id).id
+            )
+            self.repository_session.get_current_season()
+            self.repository_session.find_season(date(2024, 10, 1))
+
+        self.assertEqual(0, self._season_statements())
+
+    def test_refresh_on_miss(self):
+        with self.assertRaises(NoResultFound):
+            self.repository_session.find_season(datetime(2040, 10, 1))
+
+        # Seasons created by another process are found
+        other_session = create_repository_session_maker(self.database_url)()
+        other_session.session.add(
+            models.Season(
+                name="2040/2041", start=date(2040, 8, 1), end=date(2041, 7, 1)
+            )
+        )
+        other_session.end_session()
+
+        season = self.repository_session.find_season(datetime(2040, 10, 1))
+        self.assertEqual("2040/2041", season.name)
+
+    def test_create_seasons_invalidates(self):
+        self.repository_session.get_current_season()
+        self.assertIn(make_url(self.database_url), seasons._season_indexes)
+
+        create_seasons(self.database_url, 2040, 2041)
+
+        self.assertNotIn(make_url(self.database_url), seasons._season_indexes)
+        season = self.repository_session.find_season(date(2040, 10, 1))
+        self.assertEqual("2040/2041", season.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import date, timedelta
+
+from hmtracker.database import database
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.repository import create_repository_session_maker
+from hmtracker.loader.playerstats.importer import import_hockey_stats_chunks
+from hmtracker.loader.playerstats.mapper import iter_player_stats_chunks
+
+PLAYERS = 300
+DAYS = 20
+READERS = 4
+FIRST_DAY = date(2024, 10, 1)
+
+
+def _rows():
+    for day in range(DAYS):
+        for player_id in range(1, PLAYERS + 1):
+            yield {
+                "id": str(player_id),
+                "date": (FIRST_DAY + timedelta(days=day)).isoformat(),
+                "name": f"Player {player_id}",
+                "role": "FW",
+                "club": "FRI",
+                "foreigner": "NON",
+                "Price": str(10 + day),
+            }
+
+
+class TestSqliteConcurrency(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        self.addCleanup(database.dispose_engine, self.database_url)
+        initialize_database(self.database_url)
+        with create_repository_session_maker(self.database_url)() as session:
+            self.season_id = session.find_season(FIRST_DAY).id
+
+    def test_read_while_importing(self):
+        import_done = threading.Event()
+        errors: list[Exception] = []
+        reads_during_import = [0] * READERS
+
+        def read(reader: int):
+            session_maker = create_repository_session_maker(
+                self.database_url, read_only=True
+            )
+            while not import_done.is_set():
+                try:
+                    with session_maker() as repository_session:
+                        repository_session.get_players(season_id=self.season_id)
+                        repository_session.get_current_player_stats(
+                            season_id=self.season_id
+                        )
+                except Exception as exception:
+                    errors.append(exception)
+                    return
+                reads_during_import[reader] += 1
+
+        readers = [threading.Thread(target=read, args=(i,)) for i in range(READERS)]
+        for reader in readers:
+            reader.start()
+        try:
+            with create_repository_session_maker(self.database_url)() as writer:
+                import_hockey_stats_chunks(
+                    writer, iter_player_stats_chunks(_rows(), chunk_size=PLAYERS)
+                )
+        finally:
+            import_done.set()
+            for reader in readers:
+                reader.join()
+
+        self.assertEqual([], errors)
+        self.assertTrue(all(reads_during_import), reads_during_import)
+        with create_repository_session_maker(
+            self.database_url, read_only=True
+        )() as repository_session:
+            self.assertEqual(
+                PLAYERS,
+                len(
+                    repository_session.get_current_player_stats(
+                        season_id=self.season_id
+                    )
+                ),
+            )
+
+    def test_wal_mode(self):
+        engine = database.get_engine(self.database_url, read_only=True)
+
+        with engine.connect() as connection:
+            self.assertEqual(
+                "wal", connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+            )
+            self.assertEqual(
+                1, connection.exec_driver_sql("PRAGMA query_only").scalar()
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
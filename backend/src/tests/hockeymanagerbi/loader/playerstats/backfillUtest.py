@@ -0,0 +1,138 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from hmtracker.database import models
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.repository import create_repository_session_maker
+from hmtracker.loader.playerstats.backfill import (
+    BACKFILL_INCOMPLETE_ORIGIN,
+    BACKFILL_ORIGIN,
+    backfill_player_stats,
+    find_snapshot_files,
+)
+
+FIELDNAMES = ["id", "date", "name", "role", "club", "foreigner", "Price"]
+
+
+def _write_snapshot(path: str, date: str, price: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8-sig", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=FIELDNAMES, delimiter=";")
+        writer.writeheader()
+        for player_id in ("1", "2"):
+            writer.writerow(
+                {
+                    "id": player_id,
+                    "date": date,
+                    "name": f"Player {player_id}",
+                    "role": "FW",
+                    "club": "FRI",
+                    "foreigner": "NON",
+                    "Price": price,
+                }
+            )
+
+
+class TestBackfill(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.snapshots = os.path.join(directory.name, "snapshots")
+        # Names are not in the order of the dates
+        _write_snapshot(
+            os.path.join(self.snapshots, "a", "week.csv"), "2024-10-15", "12"
+        )
+        _write_snapshot(
+            os.path.join(self.snapshots, "b", "week.csv"), "2024-10-01", "10"
+        )
+        _write_snapshot(
+            os.path.join(self.snapshots, "c", "week.csv"), "2024-10-08", "10"
+        )
+
+        database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        initialize_database(database_url)
+        self.repository_session = create_repository_session_maker(database_url)()
+        self.addCleanup(self.repository_session.end_session)
+
+    def _importations(self) -> list[tuple[str, str]]:
+        return [
+            (importation.origin, os.path.basename(os.path.dirname(importation.comment)))
+            for importation in self.repository_session.session.query(
+                models.StatImport
+            ).order_by(models.StatImport.id)
+        ]
+
+    def test_find_snapshot_files(self):
+        self.assertEqual(3, len(find_snapshot_files(self.snapshots)))
+        self.assertEqual(
+            1, len(find_snapshot_files(os.path.join(self.snapshots, "a", "*.csv")))
+        )
+
+    def test_backfill_in_date_order(self):
+        imported = backfill_player_stats(
+            self.repository_session, self.snapshots, processes=2, only_changes=True
+        )
+
+        # The stats of c are identical to b, they only change in a
+        self.assertEqual(4, imported)
+        self.assertEqual(
+            [(BACKFILL_ORIGIN, "b"), (BACKFILL_ORIGIN, "c"), (BACKFILL_ORIGIN, "a")],
+            self._importations(),
+        )
+
+    def test_chunks_across_files(self):
+        # Only one row of each file is mapped at once, the empty file is recorded
+        empty_snapshot = os.path.join(self.snapshots, "d", "week.csv")
+        os.makedirs(os.path.dirname(empty_snapshot))
+        with open(empty_snapshot, "w", encoding="utf-8-sig") as csv_file:
+            csv_file.write(";".join(FIELDNAMES) + "\n")
+
+        imported = backfill_player_stats(
+            self.repository_session, self.snapshots, processes=1, chunk_size=1
+        )
+
+        self.assertEqual(6, imported)
+        self.assertEqual(
+            [
+                (BACKFILL_ORIGIN, "b"),
+                (BACKFILL_ORIGIN, "c"),
+                (BACKFILL_ORIGIN, "a"),
+                (BACKFILL_ORIGIN, "d"),
+            ],
+            self._importations(),
+        )
+
+    def test_resume(self):
+        self.repository_session.session.add_all(
+            [
+                models.StatImport(
+                    origin=BACKFILL_ORIGIN,
+                    comment=os.path.join(self.snapshots, "b", "week.csv"),
+                ),
+                models.StatImport(
+                    origin=BACKFILL_INCOMPLETE_ORIGIN,
+                    comment=os.path.join(self.snapshots, "c", "week.csv"),
+                ),
+            ]
+        )
+        self.repository_session.session.commit()
+
+        imported = backfill_player_stats(
+            self.repository_session, self.snapshots, processes=1
+        )
+
+        self.assertEqual(4, imported)
+        # The importation of the interrupted file is completed
+        self.assertEqual(
+            [(BACKFILL_ORIGIN, "b"), (BACKFILL_ORIGIN, "c"), (BACKFILL_ORIGIN, "a")],
+            self._importations(),
+        )
+        self.assertEqual(
+            0, backfill_player_stats(self.repository_session, self.snapshots)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from hmtracker.database import models
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.repository import create_repository_session_maker
+from hmtracker.loader.playerstats.compaction import compact_player_stats
+from hmtracker.loader.playerstats.importer import import_hockey_stats_chunks
+from hmtracker.loader.playerstats.mapper import iter_player_stats_chunks
+
+
+def _row(player_id: str, date: str, price: str, club: str = "FRI"):
+    return {
+        "id": player_id,
+        "date": date,
+        "name": f"Player {player_id}",
+        "role": "FW",
+        "club": club,
+        "foreigner": "NON",
+        "Price": price,
+    }
+
+
+ROWS = [
+    _row("1", "2024-10-01", "10"),
+    _row("2", "2024-10-01", "12"),
+    _row("1", "2024-10-02", "10"),
+    _row("2", "2024-10-02", "12", club="LAU"),
+    _row("1", "2024-10-03", "10"),
+    _row("2", "2024-10-03", "12", club="LAU"),
+    _row("1", "2024-10-04", "11"),
+    _row("2", "2024-10-04", "12", club="LAU"),
+]
+
+
+class TestChangePoints(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        initialize_database(database_url)
+        self.repository_session = create_repository_session_maker(database_url)()
+        self.addCleanup(self.repository_session.end_session)
+
+    def _import(self, rows, only_changes: bool, chunk_size: int = 3) -> int:
+        return import_hockey_stats_chunks(
+            self.repository_session,
+            iter_player_stats_chunks(rows, chunk_size),
+            only_changes=only_changes,
+        )
+
+    def _stored_stats(self) -> list[tuple[int, int, str]]:
+        return [
+            (stats.player_id, stats.validity_date.day, stats.club)
+            for stats in self.repository_session.session.query(
+                models.HockeyPlayerStats
+            ).order_by(
+                models.HockeyPlayerStats.player_id,
+                models.HockeyPlayerStats.validity_date,
+            )
+        ]
+
+    def test_only_changes(self):
+        stored = self._import(ROWS, only_changes=True)
+
+        self.assertEqual(4, stored)
+        self.assertEqual(
+            [(1, 1, "FRI"), (1, 4, "FRI"), (2, 1, "FRI"), (2, 2, "LAU")],
+            self._stored_stats(),
+        )
+
+    def test_reimport_unchanged(self):
+        self._import(ROWS[:4], only_changes=True)
+
+        stored = self._import(ROWS[2:6], only_changes=True)
+
+        self.assertEqual(0, stored)
+
+    def test_latest_stats_before_date(self):
+        self._import(ROWS, only_changes=True)
+        season = self.repository_session.find_season(datetime(2024, 10, 3))
+
+        stats = self.repository_session.get_player_stats_at_date(
+            [1, 2], datetime(2024, 10, 3, 12), season.id
+        )
+
+        self.assertEqual([10, 12], [stat.price for stat in stats])
+        self.assertEqual(["FRI", "LAU"], [stat.club for stat in stats])
+
+    def test_compaction(self):
+        self._import(ROWS, only_changes=False)
+        self.assertEqual(8, len(self._stored_stats()))
+
+        deleted = compact_player_stats(self.repository_session)
+
+        self.assertEqual(4, deleted)
+        self.assertEqual(
+            [(1, 1, "FRI"), (1, 4, "FRI"), (2, 1, "FRI"), (2, 2, "LAU")],
+            self._stored_stats(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
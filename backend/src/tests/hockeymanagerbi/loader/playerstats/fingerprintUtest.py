@@ -0,0 +1,141 @@
+import csv
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from hmtracker.database import models
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.repository import create_repository_session_maker
+from hmtracker.loader.main import (
+    import_playerstats_from_csv,
+    import_playerstats_from_loader,
+)
+from hmtracker.loader.playerstats import importer
+from hmtracker.loader.playerstats.fingerprint import content_hash
+
+ROWS = [
+    {
+        "id": player_id,
+        "date": "2024-10-01",
+        "name": f"Player {player_id}",
+        "role": "FW",
+        "club": "FRI",
+        "foreigner": "NON",
+        "Price": price,
+    }
+    for player_id, price in (("1", "10"), ("2", "12"))
+]
+
+
+class TestContentHash(unittest.TestCase):
+    def test_row_order_does_not_matter(self):
+        self.assertEqual(content_hash(ROWS), content_hash(list(reversed(ROWS))))
+
+    def test_normalized_values(self):
+        rows = [
+            {**ROWS[0], "Price": " 10 ", "not imported": "x", "Goal": ""},
+            ROWS[1],
+        ]
+
+        self.assertEqual(content_hash(ROWS), content_hash(rows))
+
+    def test_changed_values(self):
+        self.assertNotEqual(content_hash(ROWS), content_hash(ROWS[:1]))
+        self.assertNotEqual(
+            content_hash(ROWS), content_hash([ROWS[0], {**ROWS[1], "Price": "13"}])
+        )
+        self.assertNotEqual(content_hash(ROWS), content_hash(ROWS + ROWS[:1]))
+
+    def test_rows_without_date(self):
+        rows = [{key: value for key, value in ROWS[0].items() if key != "date"}]
+
+        self.assertEqual(
+            content_hash(ROWS[:1]), content_hash(rows, default_date=date(2024, 10, 1))
+        )
+        self.assertNotEqual(
+            content_hash(ROWS[:1]), content_hash(rows, default_date=date(2024, 10, 2))
+        )
+
+
+class TestIdempotentImport(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        initialize_database(database_url)
+        self.repository_session = create_repository_session_maker(database_url)()
+        self.addCleanup(self.repository_session.end_session)
+
+    def _importations(self) -> int:
+        return self.repository_session.session.query(models.StatImport).count()
+
+    def test_identical_import_skipped(self):
+        import_playerstats_from_loader(lambda: ROWS, self.repository_session)
+        import_playerstats_from_loader(lambda: ROWS, self.repository_session)
+
+        self.assertEqual(1, self._importations())
+        self.assertEqual(
+            content_hash(ROWS),
+            self.repository_session.session.query(models.StatImport).one().content_hash,
+        )
+
+    def test_forced_import(self):
+        import_playerstats_from_loader(lambda: ROWS, self.repository_session)
+        import_playerstats_from_loader(
+            lambda: ROWS, self.repository_session, force=True
+        )
+        import_playerstats_from_loader(lambda: ROWS[:1], self.repository_session)
+
+        self.assertEqual(3, self._importations())
+
+    def test_interrupted_import_resumed(self):
+        csv_file_path = os.path.join(self.directory, "players.csv")
+        with open(csv_file_path, "w", encoding="utf-8", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, list(ROWS[0]), delimiter=";")
+            writer.writeheader()
+            writer.writerows(ROWS)
+
+        import_stats = importer._import_stats
+
+        def interrupted_import(database_session, importation, players_stats, *args):
+            if any(stats.player_id == 2 for stats in players_stats):
+                raise KeyboardInterrupt()
+            return import_stats(database_session, importation, players_stats, *args)
+
+        with patch.object(importer, "_import_stats", side_effect=interrupted_import):
+            with self.assertRaises(KeyboardInterrupt):
+                import_playerstats_from_csv(
+                    csv_file_path, self.repository_session, chunk_size=1
+                )
+        self.repository_session.session.rollback()
+        self.assertEqual(
+            1, self.repository_session.session.query(models.HockeyPlayerStats).count()
+        )
+
+        # The first rerun completes the import, the second one skips it
+        import_playerstats_from_csv(
+            csv_file_path, self.repository_session, chunk_size=1
+        )
+        import_playerstats_from_csv(
+            csv_file_path, self.repository_session, chunk_size=1
+        )
+
+        self.assertEqual(
+            2, self.repository_session.session.query(models.HockeyPlayerStats).count()
+        )
+        self.assertEqual(
+            [None, content_hash(ROWS)],
+            [
+                importation.content_hash
+                for importation in self.repository_session.session.query(
+                    models.StatImport
+                ).order_by(models.StatImport.id)
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import MagicMock
+
+from hmtracker.database import models
+from hmtracker.loader.playerstats.importer import import_new_players
+
+
+class TestImportNewPlayers(unittest.TestCase):
+    def setUp(self):
+        self.repository_session = MagicMock()
+        self.repository_session.get_current_season.return_value = models.Season(id=2)
+        existing_players = {
+            1: [models.HockeyPlayer(id=1, season_id=1)],
+            2: [models.HockeyPlayer(id=2, season_id=2)],
+        }
+        self.repository_session.get_players.side_effect = lambda players_id, season_id: [
+            player for player in existing_players[season_id] if player.id in players_id
+        ]
+
+    def _added_players(self) -> list[tuple[int, int]]:
+        (_, rows), _ = self.repository_session.session.execute.call_args
+        return [(row["id"], row["season_id"]) for row in rows]
+
+    def test_existing_players_of_every_season(self):
+        import_new_players(
+            self.repository_session,
+            [
+                models.HockeyPlayer(id=1, season_id=1),
+                models.HockeyPlayer(id=2, season_id=1),
+                models.HockeyPlayer(id=1, season_id=2),
+                models.HockeyPlayer(id=2, season_id=2),
+            ],
+        )
+
+        self.assertEqual([(2, 1), (1, 2)], self._added_players())
+
+    def test_duplicated_players(self):
+        import_new_players(
+            self.repository_session,
+            [
+                models.HockeyPlayer(id=3),
+                models.HockeyPlayer(id=3, season_id=2),
+                models.HockeyPlayer(id=3, season_id=1),
+            ],
+        )
+
+        self.assertEqual([(3, 2), (3, 1)], self._added_players())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from hmtracker.database import models
+from hmtracker.loader.playerstats.incremental import changed_players_filter
+
+
+class TestChangedPlayersFilter(unittest.TestCase):
+    at = datetime(2025, 11, 10, 12, 0)
+
+    def setUp(self):
+        self.repository_session = MagicMock()
+        self.repository_session.get_current_season.return_value = models.Season(id=3)
+        self.repository_session.get_players.return_value = [
+            models.HockeyPlayer(id=1, role="FW"),
+            models.HockeyPlayer(id=2, role="DF"),
+            models.HockeyPlayer(id=3, role="GK"),
+        ]
+        self.repository_session.get_current_player_stats.return_value = [
+            models.HockeyPlayerStats(
+                player_id=1, club="FRI", validity_date=datetime(2025, 11, 8, 10, 0)
+            ),
+            models.HockeyPlayerStats(
+                player_id=2, club="LAU", validity_date=datetime(2025, 11, 8, 10, 0)
+            ),
+            models.HockeyPlayerStats(
+                player_id=3, club="ZSC", validity_date=datetime(2025, 11, 8, 10, 0)
+            ),
+        ]
+        self.repository_session.get_matches_for_season.return_value = [
+            models.Match(
+                home_club="FRI",
+                away_club="GEN",
+                match_datetime=datetime(2025, 11, 9, 19, 45),
+            ),
+            models.Match(
+                home_club="LAU",
+                away_club="BER",
+                match_datetime=datetime(2025, 11, 6, 19, 45),
+            ),
+            models.Match(
+                home_club="ZSC",
+                away_club="ZUG",
+                match_datetime=datetime(2025, 11, 12, 19, 45),
+            ),
+        ]
+
+    def test_unchanged_player(self):
+        has_changed = changed_players_filter(self.repository_session, self.at)
+
+        # LAU didn't play since the last import, ZSC match is in the future
+        self.assertFalse(has_changed({"id": "2", "club": "LAU", "role": "DF"}))
+        self.assertFalse(has_changed({"id": "3", "club": "ZSC", "role": "GK"}))
+
+    def test_club_played_a_match(self):
+        has_changed = changed_players_filter(self.repository_session, self.at)
+
+        self.assertTrue(has_changed({"id": "1", "club": "FRI", "role": "FW"}))
+
+    def test_match_just_before_import(self):
+        self.repository_session.get_matches_for_season.return_value = [
+            models.Match(
+                home_club="LAU",
+                away_club="BER",
+                match_datetime=datetime(2025, 11, 7, 19, 45),
+            ),
+        ]
+        has_changed = changed_players_filter(self.repository_session, self.at)
+
+        # Stats of the match might not have been updated at the last import
+        self.assertTrue(has_changed({"id": "2", "club": "LAU", "role": "DF"}))
+
+    def test_changed_preview(self):
+        has_changed = changed_players_filter(self.repository_session, self.at)
+
+        self.assertTrue(has_changed({"id": "2", "club": "BIE", "role": "DF"}))
+        self.assertTrue(has_changed({"id": "2", "club": "LAU", "role": "FW"}))
+
+    def test_unknown_player(self):
+        has_changed = changed_players_filter(self.repository_session, self.at)
+
+        self.assertTrue(has_changed({"id": "4", "club": "LAU", "role": "DF"}))
+        self.assertTrue(has_changed({"id": "not an id"}))
+
+    def test_no_season(self):
+        self.repository_session.get_current_season.return_value = None
+
+        has_changed = changed_players_filter(self.repository_session, self.at)
+
+        self.assertTrue(has_changed({"id": "2", "club": "LAU", "role": "DF"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from sqlalchemy import delete, update
+
+from hmtracker.database import models
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.repository import create_repository_session_maker
+from hmtracker.loader.playerstats.compaction import compact_player_stats
+from hmtracker.loader.playerstats.importer import import_hockey_stats_chunks
+from hmtracker.loader.playerstats.latest import rebuild_latest_stats
+from hmtracker.loader.playerstats.mapper import iter_player_stats_chunks
+
+
+def _row(player_id: str, date: str, price: str):
+    return {
+        "id": player_id,
+        "date": date,
+        "name": f"Player {player_id}",
+        "role": "FW",
+        "club": "FRI",
+        "foreigner": "NON",
+        "Price": price,
+    }
+
+
+class TestLatestStats(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        initialize_database(database_url)
+        self.repository_session = create_repository_session_maker(database_url)()
+        self.addCleanup(self.repository_session.end_session)
+        self.season_id = self.repository_session.find_season(date(2024, 10, 1)).id
+
+    def _import(self, rows, only_changes: bool = False) -> int:
+        return import_hockey_stats_chunks(
+            self.repository_session,
+            iter_player_stats_chunks(rows, chunk_size=2),
+            only_changes=only_changes,
+        )
+
+    def _latest_prices(self) -> dict[int, tuple[int, float]]:
+        return {
+            stats.player_id: (stats.validity_date.day, stats.price)
+            for stats in self.repository_session.get_current_player_stats(
+                season_id=self.season_id
+            )
+        }
+
+    def test_updated_by_imports(self):
+        self._import([_row("1", "2024-10-02", "11"), _row("2", "2024-10-02", "20")])
+        # Older stats imported afterward don't replace the latest ones
+        self._import([_row("1", "2024-10-01", "10"), _row("1", "2024-10-03", "12")])
+
+        self.assertEqual({1: (3, 12), 2: (2, 20)}, self._latest_prices())
+        self.assertEqual(0, rebuild_latest_stats(self.repository_session))
+
+    def test_conflicting_stats(self):
+        self._import([_row("1", "2024-10-02", "11")])
+        with self.assertLogs(level="WARNING") as logs:
+            imported = self._import(
+                [_row("1", "2024-10-02", "12"), _row("2", "2024-10-02", "20")]
+            )
+
+        # The stored stats are kept, the latest stats agree with the history
+        self.assertEqual(1, imported)
+        self.assertEqual({1: (2, 11), 2: (2, 20)}, self._latest_prices())
+        self.assertEqual(0, rebuild_latest_stats(self.repository_session))
+        self.assertEqual(1, len(logs.records))
+        self.assertIn("1 rows of HOCKEY_PLAYER_STATS", logs.output[0])
+
+    def test_identical_stats_not_reported(self):
+        self._import([_row("1", "2024-10-02", "11")])
+        with self.assertNoLogs(level="WARNING"):
+            imported = self._import([_row("1", "2024-10-02", "11")])
+
+        self.assertEqual(0, imported)
+
+    def test_rebuild(self):
+        self._import([_row("1", "2024-10-01", "10"), _row("2", "2024-10-01", "20")])
+        session = self.repository_session.session
+        session.execute(
+            update(models.HockeyPlayerStatsLatest)
+            .where(models.HockeyPlayerStatsLatest.player_id == 1)
+            .values(price=99)
+        )
+        session.execute(
+            delete(models.HockeyPlayerStatsLatest).where(
+                models.HockeyPlayerStatsLatest.player_id == 2
+            )
+        )
+        session.commit()
+
+        self.assertEqual(2, rebuild_latest_stats(self.repository_session))
+        self.assertEqual({1: (1, 10), 2: (1, 20)}, self._latest_prices())
+
+    def test_compaction(self):
+        self._import([_row("1", "2024-10-01", "10"), _row("1", "2024-10-02", "10")])
+
+        compact_player_stats(self.repository_session)
+
+        self.assertEqual({1: (1, 10)}, self._latest_prices())
+
+
+if __name__ == "__main__":
+    unittest.main()
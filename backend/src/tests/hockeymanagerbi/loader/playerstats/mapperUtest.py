@@ -18,42 +18,47 @@ class TestPlayerStatsConverter(unittest.TestCase):
         self.assertIn("foreigner", mapper.FIELDS)
         self.assertNotIn("invalid field", mapper.FIELDS)
 
-    def test_convert_data(self):
-        result = mapper._convert_data(self.correct_data)
+    def test_convert_columns(self):
+        result = mapper._convert_columns(self.correct_data)
 
-        self.assertEqual(2, len(result))
-
-        self.assertEqual(13, result[0]["id"])
-        self.assertEqual(datetime.date(2020, 12, 30), result[0]["date"])
-        self.assertAlmostEqual(2.9, result[0]["Ownership"])
-        self.assertEqual(True, result[0]["foreigner"])
-
-        self.assertEqual(1, result[1]["id"])
-        self.assertEqual(datetime.date(2020, 1, 1), result[1]["date"])
-        self.assertAlmostEqual(4, result[1]["Ownership"])
-        self.assertEqual(True, result[1]["foreigner"])
+        self.assertEqual([13, 1], result["id"])
+        self.assertEqual(
+            [datetime.date(2020, 12, 30), datetime.date(2020, 1, 1)], result["date"]
+        )
+        self.assertAlmostEqual(2.9, result["Ownership"][0])
+        self.assertAlmostEqual(4, result["Ownership"][1])
+        self.assertEqual([True, True], result["foreigner"])
 
     def test_convert_not_existing_data(self):
-        result = mapper._convert_data([{"invalid field": "useless"}])
+        result = mapper._convert_columns([{"invalid field": "useless"}])
 
-        self.assertEqual(1, len(result))
-        self.assertNotIn("invalid field", result[0])
-        self.assertIsNone(result[0]["id"])
-        self.assertIsNone(result[0]["date"])
-        self.assertIsNone(result[0]["Ownership"])
-        self.assertIsNone(result[0]["foreigner"])
+        self.assertNotIn("invalid field", result)
+        self.assertEqual([None], result["id"])
+        self.assertEqual([None], result["date"])
+        self.assertEqual([None], result["Ownership"])
+        self.assertEqual([None], result["foreigner"])
 
     def test_convert_invalid_data(self):
-        result = mapper._convert_data(
+        result = mapper._convert_columns(
             [{"id": "Id:12", "date": "today", "Ownership": "non", "foreigner": "very"}]
         )
 
-        self.assertEqual(1, len(result))
-        self.assertIn("id", result[0])
-        self.assertIsNone(result[0]["id"])
-        self.assertIsNone(result[0]["date"])
-        self.assertIsNone(result[0]["Ownership"])
-        self.assertIsNone(result[0]["foreigner"])
+        self.assertIn("id", result)
+        self.assertEqual([None], result["id"])
+        self.assertEqual([None], result["date"])
+        self.assertEqual([None], result["Ownership"])
+        self.assertEqual([None], result["foreigner"])
+
+    def test_convert_invalid_data_warns_once_by_column(self):
+        rows = [{"id": "Id:12"}, {"id": "Id:12"}, {"id": "x"}, {"id": "3"}]
+
+        with self.assertLogs(level="WARNING") as logs:
+            result = mapper._convert_columns(rows)
+
+        self.assertEqual([None, None, None, 3], result["id"])
+        self.assertEqual(1, len(logs.records))
+        self.assertIn('"id"', logs.output[0])
+        self.assertIn("3 values", logs.output[0])
 
     def test_map_player_stats(self):
         players, players_stats = mapper.map_player_stats(self.correct_data)
@@ -70,6 +75,16 @@ class TestPlayerStatsConverter(unittest.TestCase):
         self.assertEqual(2.9, players_stats[0].ownership)
         self.assertIsNone(players_stats[0].goal)
 
+    def test_iter_player_stats_chunks(self):
+        rows = (row for row in self.correct_data * 3)
+
+        chunks = list(mapper.iter_player_stats_chunks(rows, chunk_size=4))
+
+        self.assertEqual([4, 2], [len(players) for players, _ in chunks])
+        self.assertEqual([4, 2], [len(stats) for _, stats in chunks])
+        self.assertEqual([13, 1, 13, 1], [player.id for player in chunks[0][0]])
+        self.assertEqual(1, chunks[1][1][1].player_id)
+
 
 class TestMapPlayerStats(unittest.TestCase):
     @patch("hmtracker.database.models.HockeyPlayer")
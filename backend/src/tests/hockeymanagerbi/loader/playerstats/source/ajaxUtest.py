@@ -48,6 +48,65 @@ class TestPlayerStatsAjaxLoader(unittest.TestCase):
         self.assertIn("name", data[0])
         self.assertEqual("PlayerName", data[0]["name"])
 
+    @patch("hmtracker.parser.hmparser.HMAjaxScrapper.connect_to_hm")
+    @patch("hmtracker.parser.hmparser.HMAjaxScrapper.get_all_players")
+    @patch("hmtracker.parser.hmparser.HMAjaxScrapper.get_player_stats")
+    @patch("hmtracker.parser.hmparser.HMAjaxScrapper.close_session")
+    def test_playerstats_ajax_loader_concurrent_with_failures(
+        self,
+        mock_close_session,
+        mock_get_player_stats,
+        mock_get_all_players,
+        mock_connect_to_hm,
+    ):
+        # Arrange
+        mock_get_all_players.return_value = [
+            {"id": str(player_id), "name": f"Player{player_id}"}
+            for player_id in range(20)
+        ]
+
+        def get_player_stats(player_id):
+            if player_id == "7":
+                raise ConnectionError("Couldn't query the player")
+            return {"Goals": player_id}
+
+        mock_get_player_stats.side_effect = get_player_stats
+
+        # Act
+        data_loader = website.playerstats_ajax_loader(
+            "testuser", "testpass", max_workers=4
+        )
+        data = data_loader()
+
+        # Assert
+        self.assertEqual(20, mock_get_player_stats.call_count)
+        mock_close_session.assert_called_once()
+
+        self.assertEqual(19, len(data))
+        self.assertNotIn("7", [player["id"] for player in data])
+        for player in data:
+            self.assertEqual(player["id"], player["Goals"])
+
+    @patch("hmtracker.parser.hmparser.HMAjaxScrapper.connect_to_hm")
+    @patch("hmtracker.parser.hmparser.HMAjaxScrapper.get_all_players")
+    @patch("hmtracker.parser.hmparser.HMAjaxScrapper.get_player_stats")
+    @patch("hmtracker.parser.hmparser.HMAjaxScrapper.close_session")
+    def test_playerstats_ajax_loader_all_failures(
+        self,
+        mock_close_session,
+        mock_get_player_stats,
+        mock_get_all_players,
+        mock_connect_to_hm,
+    ):
+        mock_get_all_players.return_value = [{"id": "1"}, {"id": "2"}]
+        mock_get_player_stats.side_effect = ConnectionError("HM is down")
+
+        data_loader = website.playerstats_ajax_loader("testuser", "testpass")
+
+        with self.assertRaises(ConnectionError):
+            data_loader()
+        mock_close_session.assert_called_once()
+
 
 if __name__ == "__main__":
     unittest.main()
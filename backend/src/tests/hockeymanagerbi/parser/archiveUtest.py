@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+from hmtracker.loader.playerstats.source.archive import playerstats_archive_loader
+from hmtracker.parser import archive
+
+PLAYERS_LIST_HTML = """
+<div class="row" attr="1">
+    <span class="name">Player 1</span>
+    <img src="/clubs/Club1/"/>
+    <div>FW</div>
+</div>
+<div class="row" attr="2">
+    <span class="name">Player 2</span>
+    <img src="/clubs/Club2/"/>
+    <div>DF</div>
+</div>
+"""
+
+PLAYER_DETAILS_HTML = """
+<div class='histogram horiz' label='Price' value='10.5'></div>
+<div class='histogram horiz' label='Goal' value='3'></div>
+"""
+
+
+class TestResponseArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _archive_load(self, snapshot_id: str):
+        response_archive = archive.ResponseArchive(self.directory.name, snapshot_id)
+        response_archive.record("dashboard", "", "<html></html>")
+        response_archive.record(
+            "transfers-classic-get-list-preview",
+            "randomNumber=12345678&club=0&role=0",
+            PLAYERS_LIST_HTML,
+        )
+        response_archive.record("get-player-detail", "id=1", PLAYER_DETAILS_HTML)
+        response_archive.record("get-player-detail", "id=2", PLAYER_DETAILS_HTML)
+        response_archive.close()
+
+    def test_snapshot(self):
+        self._archive_load("first")
+
+        self.assertEqual(["first"], archive.list_snapshots(self.directory.name))
+        _, responses = archive.read_snapshot(self.directory.name, "first")
+        self.assertEqual(4, len(responses))
+        self.assertEqual({"club": "0", "role": "0"}, responses[1].parameters)
+        self.assertEqual(
+            PLAYERS_LIST_HTML,
+            archive.read_payload(self.directory.name, responses[1].sha256),
+        )
+
+    def test_identical_payloads_stored_once(self):
+        self._archive_load("first")
+        self._archive_load("second")
+
+        stored_objects = [
+            file_name
+            for _, _, file_names in os.walk(
+                os.path.join(self.directory.name, "objects")
+            )
+            for file_name in file_names
+        ]
+        self.assertEqual(3, len(stored_objects))
+        self.assertEqual(
+            ["first", "second"], archive.list_snapshots(self.directory.name)
+        )
+
+    def test_replay(self):
+        self._archive_load("first")
+
+        players_data = playerstats_archive_loader(self.directory.name)()
+
+        self.assertEqual(2, len(players_data))
+        self.assertEqual("1", players_data[0]["id"])
+        self.assertEqual("Player 1", players_data[0]["name"])
+        self.assertEqual("Club1", players_data[0]["club"])
+        self.assertEqual("10.5", players_data[0]["Price"])
+        self.assertEqual("3", players_data[1]["Goal"])
+        self.assertIn("date", players_data[1])
+
+    def test_replay_without_snapshot(self):
+        with self.assertRaises(FileNotFoundError):
+            playerstats_archive_loader(self.directory.name)()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+from hmtracker.common.constants import HM_RATE_LIMIT_ENV_NAME
+from hmtracker.loader.playerstats.source.website import _load_players_details
+from hmtracker.parser.hmparser import AsyncHMScrapper, HMAjaxScrapper
+from hmtracker.parser.requester import RetryPolicy
+from tests.fakehm import FakeHMConfig, FakeHMServer, manager_credentials
+
+# The fake HM server is local, don't limit the rate of the scrappers
+_no_rate_limit = patch.dict(os.environ, {HM_RATE_LIMIT_ENV_NAME: "0"})
+
+
+def setUpModule():
+    _no_rate_limit.start()
+
+
+def tearDownModule():
+    _no_rate_limit.stop()
+
+
+class TestScrappersWithFakeHM(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeHMServer(
+            FakeHMConfig(players=40, managers=2, team_size=5, arcade=True)
+        )
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.scrapper = HMAjaxScrapper(pool_size=4, base_url=self.server.url)
+        self.scrapper.connect_to_hm(*manager_credentials(0))
+        self.addCleanup(self.scrapper.close_session)
+
+    def test_wrong_password(self):
+        scrapper = HMAjaxScrapper(base_url=self.server.url)
+        with self.assertRaises(ConnectionError):
+            scrapper.connect_to_hm(manager_credentials(0)[0], "wrong password")
+
+    def test_teams(self):
+        teams = self.scrapper.get_teams()
+
+        self.assertEqual(2, len(teams))
+        self.assertEqual("Team 0", teams[0]["name"])
+        self.assertEqual(1000000, teams[0]["points"])
+        self.assertEqual(1, teams[0]["rank"])
+
+    def test_players(self):
+        players = self.scrapper.get_all_players()
+
+        self.assertEqual(40, len(players))
+        player = next(player for player in players if player["id"] == "1")
+        fake_player = self.server.players_by_id[1]
+        self.assertEqual(fake_player.name, player["name"])
+        self.assertEqual(fake_player.club, player["club"])
+        self.assertEqual(fake_player.role, player["role"])
+        self.assertEqual(str(fake_player.foreigner), player["foreigner"])
+
+    def test_players_details(self):
+        players = _load_players_details(
+            self.scrapper, self.scrapper.get_all_players(), max_workers=4
+        )
+
+        self.assertEqual(40, len(players))
+        for player in players:
+            fake_player = self.server.players_by_id[int(player["id"])]
+            self.assertEqual(fake_player.stats["Price"], player["Price"])
+
+    def test_current_team(self):
+        team_id = self.scrapper.get_teams()[1]["id"]
+        self.scrapper.select_team(team_id)
+
+        team = self.scrapper.get_current_team()
+
+        fake_manager = self.server.managers[manager_credentials(0)[0]]
+        self.assertEqual(
+            sorted(fake_manager.teams[team_id]),
+            sorted(int(player["id"]) for player in team),
+        )
+
+    def test_auto_lineup(self):
+        team_id = self.scrapper.get_teams()[1]["id"]
+        self.scrapper.select_team(team_id)
+
+        self.scrapper.auto_lineup()
+
+        self.assertEqual(1, self.server.stats.auto_lineups[team_id])
+
+
+class TestAsyncScrapperWithFakeHM(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeHMServer(
+            FakeHMConfig(players=40, managers=2, team_size=5, arcade=True)
+        )
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    async def asyncSetUp(self):
+        self.scrapper = AsyncHMScrapper(pool_size=4, base_url=self.server.url)
+        await self.scrapper.connect_to_hm(*manager_credentials(1))
+        self.addAsyncCleanup(self.scrapper.close_session)
+
+    async def test_wrong_password(self):
+        scrapper = AsyncHMScrapper(base_url=self.server.url)
+        self.addAsyncCleanup(scrapper.close_session)
+        with self.assertRaises(ConnectionError):
+            await scrapper.connect_to_hm(manager_credentials(1)[0], "wrong password")
+
+    async def test_not_connected(self):
+        with self.assertRaises(ConnectionError):
+            await AsyncHMScrapper(base_url=self.server.url).get_current_team()
+
+    async def test_teams(self):
+        teams = await self.scrapper.get_teams()
+
+        self.assertEqual(2, len(teams))
+        self.assertEqual("Team 0", teams[0]["name"])
+
+    async def test_players(self):
+        players = await self.scrapper.get_all_players()
+
+        self.assertEqual(40, len(players))
+        player = next(player for player in players if player["id"] == "1")
+        self.assertEqual(self.server.players_by_id[1].name, player["name"])
+
+    async def test_players_details(self):
+        players_stats = await asyncio.gather(
+            *(self.scrapper.get_player_stats(player_id) for player_id in range(1, 11))
+        )
+
+        for player_id, player_stats in enumerate(players_stats, start=1):
+            fake_player = self.server.players_by_id[player_id]
+            self.assertEqual(fake_player.stats["Price"], player_stats["Price"])
+
+    async def test_current_team(self):
+        team_id = (await self.scrapper.get_teams())[0]["id"]
+        await self.scrapper.select_team(team_id)
+
+        team = await self.scrapper.get_current_team()
+
+        fake_manager = self.server.managers[manager_credentials(1)[0]]
+        self.assertEqual(
+            sorted(fake_manager.teams[team_id]),
+            sorted(int(player["id"]) for player in team),
+        )
+
+    async def test_auto_lineup(self):
+        team_id = (await self.scrapper.get_teams())[0]["id"]
+        await self.scrapper.select_team(team_id)
+
+        await self.scrapper.auto_lineup()
+
+        self.assertEqual(1, self.server.stats.auto_lineups[team_id])
+
+
+class TestFakeHMFailures(unittest.TestCase):
+    retry_policy = RetryPolicy(max_attempts=8, base_delay=0.01, max_delay=0.2)
+
+    def _load_players(self, server: FakeHMServer, retry_policy: RetryPolicy):
+        scrapper = HMAjaxScrapper(
+            pool_size=4, base_url=server.url, retry_policy=retry_policy
+        )
+        scrapper.connect_to_hm(*manager_credentials(0))
+        try:
+            players = _load_players_details(
+                scrapper, scrapper.get_all_players(), max_workers=4
+            )
+        finally:
+            scrapper.close_session()
+        return players, scrapper.requester.stats.snapshot()
+
+    def test_rate_limited(self):
+        config = FakeHMConfig(players=10, team_size=5, rate_limit=20, burst=2)
+        retry_policy = RetryPolicy(max_attempts=20, base_delay=0.05, max_delay=0.5)
+        with FakeHMServer(config) as server:
+            players, stats = self._load_players(server, retry_policy)
+
+        self.assertEqual(10, len(players))
+        self.assertLess(0, server.stats.statuses[429])
+        self.assertLess(0, stats["get-player-detail"].retries)
+
+    def test_server_errors(self):
+        config = FakeHMConfig(players=20, error_rate=0.2)
+        with FakeHMServer(config) as server:
+            players, stats = self._load_players(server, self.retry_policy)
+
+        self.assertEqual(20, len(players))
+        self.assertLess(0, server.stats.statuses[500])
+        self.assertEqual(
+            server.stats.statuses[500], sum(stat.errors for stat in stats.values())
+        )
+
+    def test_without_retry(self):
+        config = FakeHMConfig(players=5, rate_limit=0.1, burst=2)
+        with FakeHMServer(config) as server:
+            scrapper = HMAjaxScrapper(
+                base_url=server.url, retry_policy=RetryPolicy(max_attempts=1)
+            )
+            scrapper.connect_to_hm(*manager_credentials(0))  # login and dashboard
+            with self.assertRaises(ConnectionError):
+                scrapper.get_all_players()
+            scrapper.close_session()
+
+        self.assertEqual(1, server.stats.statuses[429])
+
+
+if __name__ == "__main__":
+    unittest.main()
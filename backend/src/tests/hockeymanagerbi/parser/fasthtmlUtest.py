@@ -0,0 +1,137 @@
+import unittest
+from importlib import resources
+from unittest.mock import patch
+
+from hmtracker.parser import fasthtml, hmparser
+
+PLAYERS_LIST_HTML = """
+<div class="row" attr="1">
+    <span class="name">Player 1</span>
+    <img src="/clubs/Club1/"/>
+    <div>FW</div>
+</div>
+<div class="row" attr="2">
+    <span class="name">Player <b>2</b> &amp; co<!-- comment --></span>
+    <img src="/clubs/Club2/">
+    <i class="flag ch"></i>
+    <div>DF<script>var role = "GK";</script></div>
+</div>
+<div class="row selected" attr="3">
+    <p><span class="name other">Player 3</p>
+    <div><div>GK</div> goalie</div>
+    <img src="/clubs/Club3/logo.png"/>
+</div>
+<div class="row" attr="4"><div class="cell"><span class="name"></span><div></div></div></div>
+<div class="row" attr="5"><span class="name">Player 5</span>
+"""
+
+PLAYER_DETAILS_HTML = """
+<div class='histogram horiz' label='Goals' value='10'></div>
+<div class='histogram' label='Ignored' value='0'></div>
+<div class="horiz  histogram big" label="Assists" value="5"><span>5</span></div>
+<div class='histogram horiz' label='Goals' value='11'/>
+<div class='histogram horiz' label='Price' value='12.5'>
+"""
+
+
+class TestStreamingScrapper(unittest.TestCase):
+    soup_backend = hmparser.SoupParserBackend()
+    streaming_backend = hmparser.StreamingParserBackend()
+
+    def test_scrap_players_html_list(self):
+        expected = self.soup_backend.scrap_players_html_list(PLAYERS_LIST_HTML)
+
+        result = fasthtml.scrap_players_html_list(PLAYERS_LIST_HTML)
+
+        self.assertEqual(5, len(result))
+        self.assertEqual(expected, result)
+        self.assertEqual("Player 2 & co", result[1]["name"])
+        self.assertEqual("DF", result[1]["role"])
+        self.assertEqual("True", result[1]["foreigner"])
+        self.assertEqual("Club3", result[2]["club"])
+
+    def test_scrap_player_details(self):
+        expected = self.soup_backend.scrap_player_details(PLAYER_DETAILS_HTML)
+
+        result = fasthtml.scrap_player_details(PLAYER_DETAILS_HTML)
+
+        self.assertEqual(expected, result)
+        self.assertEqual(
+            {"Goals": "11", "Assists": "5", "Price": "12.5"},
+            result,
+        )
+        self.assertEqual(list(expected), list(result))
+
+    def test_scrap_dashboard(self):
+        for page, is_arcade in [
+            ("main_page.html", False),
+            ("main_page_arcade.html", True),
+        ]:
+            with self.subTest(page=page):
+                with resources.open_text("tests.resources", page) as f:
+                    dashboard_html = f.read()
+
+                expected = self.soup_backend.scrap_dashboard(dashboard_html)
+                result = self.streaming_backend.scrap_dashboard(dashboard_html)
+
+                self.assertEqual(is_arcade, result.arcade)
+                self.assertEqual(expected, result)
+                self.assertEqual(
+                    hmparser._to_teams(expected), hmparser._to_teams(result)
+                )
+
+    def test_teams_of_dashboard(self):
+        with resources.open_text("tests.resources", "main_page.html") as f:
+            dashboard = self.streaming_backend.scrap_dashboard(f.read())
+
+        teams = hmparser._to_teams(dashboard)
+
+        self.assertEqual(2, len(teams))
+        self.assertEqual("finiDeRigoler", teams[0]["name"])
+        self.assertEqual(7462, teams[0]["points"])
+        self.assertEqual(3967, teams[0]["rank"])
+
+    def test_unscrappable_row_fails_in_both_backends(self):
+        # A row without name can't be scrapped by any backend
+        html = '<div class="row" attr="1"><div>FW</div></div>'
+
+        with self.assertRaises(IndexError):
+            fasthtml.scrap_players_html_list(html)
+        with self.assertRaises(IndexError):
+            self.soup_backend.scrap_players_html_list(html)
+        with self.assertRaises(IndexError):
+            self.streaming_backend.scrap_players_html_list(html)
+
+    def test_fallback_to_soup(self):
+        # The streaming scrappers follow the soup nesting rules, so no markup makes
+        # only them fail: simulate an error of the tokenizer
+        expected = self.soup_backend.scrap_players_html_list(PLAYERS_LIST_HTML)
+        expected_details = self.soup_backend.scrap_player_details(PLAYER_DETAILS_HTML)
+        tokenizer_error = patch.object(
+            fasthtml._StreamingScrapper,
+            "feed",
+            side_effect=AssertionError("unexpected markup"),
+        )
+
+        with tokenizer_error, self.assertLogs(level="DEBUG") as logs:
+            result = self.streaming_backend.scrap_players_html_list(PLAYERS_LIST_HTML)
+            details = self.streaming_backend.scrap_player_details(PLAYER_DETAILS_HTML)
+
+        self.assertEqual(expected, result)
+        self.assertEqual(expected_details, details)
+        self.assertEqual(2, len(logs.records))
+        self.assertIn("unexpected markup", logs.output[0])
+
+    def test_get_parser_backend(self):
+        self.assertIsInstance(
+            hmparser.get_parser_backend("soup"), hmparser.SoupParserBackend
+        )
+        self.assertIsInstance(
+            hmparser.get_parser_backend("streaming"), hmparser.StreamingParserBackend
+        )
+        with self.assertRaises(ValueError):
+            hmparser.get_parser_backend("unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from hmtracker.parser.requester import ConcurrencyLimit, RetryPolicy, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=10, burst=2)
+
+        self.assertEqual(0, bucket.reserve())
+        self.assertEqual(0, bucket.reserve())
+        self.assertAlmostEqual(0.1, bucket.reserve(), delta=0.01)
+        self.assertAlmostEqual(0.2, bucket.reserve(), delta=0.01)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_exponential_delay(self):
+        policy = RetryPolicy(base_delay=1, max_delay=5)
+
+        for _ in range(20):
+            self.assertLessEqual(policy.delay(1), 1)
+            self.assertLessEqual(policy.delay(3), 4)
+            self.assertLessEqual(policy.delay(10), 5)
+
+    def test_retry_after(self):
+        policy = RetryPolicy(max_delay=5)
+
+        self.assertEqual(2, policy.delay(1, retry_after=2))
+        self.assertEqual(5, policy.delay(1, retry_after=60))
+
+
+class TestConcurrencyLimit(unittest.TestCase):
+    def test_overload(self):
+        concurrency = ConcurrencyLimit(8)
+
+        concurrency.on_overload()
+        self.assertEqual(4, concurrency.limit)
+        concurrency.on_overload()
+        concurrency.on_overload()
+        concurrency.on_overload()
+        self.assertEqual(1, concurrency.limit)
+
+    def test_latency_rise_and_recovery(self):
+        concurrency = ConcurrencyLimit(8)
+        for _ in range(8):
+            concurrency.on_response(0.1)
+        self.assertEqual(8, concurrency.limit)
+
+        for _ in range(16):
+            concurrency.on_response(1.0)
+        self.assertLess(concurrency.limit, 8)
+
+        decreased_limit = concurrency.limit
+        for _ in range(100):
+            concurrency.on_response(0.1)
+        self.assertLess(decreased_limit, concurrency.limit)
+        self.assertEqual(8, concurrency.limit)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Statement budgets, so the changes adding queries to an endpoint fail the tests.
+The queries are only counted on the engines and the API created while
+HM_QUERY_COUNT is true, see QUERY_COUNT_ENVIRONMENT.
+
+    class TestPlayersApi(QueryBudgetMixin, unittest.TestCase):
+        def test_players(self):
+            self.assertQueryBudget(client.get("/players/"), max_queries=2)
+"""
+
+import re
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from hmtracker.common.constants import HM_QUERY_COUNT_ENV_NAME
+from hmtracker.database import database
+
+# Environment of the tests counting the queries, to patch in os.environ
+QUERY_COUNT_ENVIRONMENT = {HM_QUERY_COUNT_ENV_NAME: "true"}
+
+_SERVER_TIMING_QUERIES = re.compile(r'db;dur=[0-9.]+;desc="(\d+) queries"')
+
+
+def query_count(response) -> int:
+    """
+    :param response: response of the API
+    :return: the number of queries of the request, from its Server-Timing header
+    """
+    match = _SERVER_TIMING_QUERIES.search(response.headers.get("Server-Timing", ""))
+    if match is None:
+        raise AssertionError("The response has no query count in Server-Timing")
+    return int(match.group(1))
+
+
+class QueryBudgetMixin:
+    def assertQueryBudget(self, response, max_queries: int):
+        """
+        Fail if the request of the response ran more than max_queries queries
+        """
+        count = query_count(response)
+        if count > max_queries:
+            self.fail(  # type: ignore[attr-defined]
+                f"{response.request.method} {response.request.url.path} ran {count} "
+                f"queries, the budget is {max_queries}"
+            )
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries: int) -> Iterator[database.QueryCounter]:
+        """
+        Fail if the code of the block, outside the API, runs more than max_queries
+        queries or runs a statement twice with the same parameters
+        """
+        with database.count_queries(track_statements=True) as queries:
+            yield queries
+        if queries.count > max_queries:
+            self.fail(  # type: ignore[attr-defined]
+                f"{queries.count} queries, the budget is {max_queries}"
+            )
+        repeated_statements = queries.repeated_statements()
+        if repeated_statements:
+            self.fail(  # type: ignore[attr-defined]
+                f"Statements run several times: {repeated_statements}"
+            )
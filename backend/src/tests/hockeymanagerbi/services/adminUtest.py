@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from hmtracker.common.constants import HM_DATABASE_URL_ENV_NAME
+from hmtracker.common.progress import ProgressEvent, progress_events
+from hmtracker.database import database
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.repository import create_repository_session_maker
+from hmtracker.services import admin, jobs
+
+
+class TestAdminOperations(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        self.addCleanup(database.dispose_engine, self.database_url)
+        initialize_database(self.database_url)
+        environment = patch.dict(
+            os.environ, {HM_DATABASE_URL_ENV_NAME: self.database_url}
+        )
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def test_operation_queued_once(self):
+        admin.start_loading(force=True)
+        with self.assertRaises(admin.ServerBusyException):
+            admin.start_loading()
+        admin.start_team_alignement()
+
+        with create_repository_session_maker(self.database_url)() as session:
+            tasks = jobs.get_unfinished_tasks(session)
+            self.assertEqual(
+                [(admin.LOAD_HM_STATS, {"force": True}), (admin.ALIGN_TEAM, {})],
+                [(task.name, jobs.task_parameters(task)) for task in tasks],
+            )
+            jobs.claim_task(session, "worker")
+            # The alignment doesn't write the stats, it runs during the load
+            self.assertEqual(
+                admin.ALIGN_TEAM, jobs.claim_task(session, "other worker").name
+            )
+        self.assertEqual(admin.LOAD_HM_STATS, admin.get_current_operation())
+
+    def test_loads_run_one_at_a_time(self):
+        admin.start_loading()
+        admin.start_incremental_loading()
+        with create_repository_session_maker(self.database_url)() as session:
+            self.assertEqual(
+                admin.LOAD_HM_STATS, jobs.claim_task(session, "worker").name
+            )
+            self.assertIsNone(jobs.claim_task(session, "other worker"))
+
+    def test_warn_without_worker(self):
+        with self.assertLogs(level="WARNING") as logs:
+            admin.start_loading()
+        self.assertIn("No worker is alive", logs.output[0])
+
+        with create_repository_session_maker(self.database_url)() as session:
+            jobs.worker_heartbeat(session, "worker")
+        with self.assertNoLogs(level="WARNING"):
+            admin.start_incremental_loading()
+
+    def _save_progress(self, task_id: int, done: int):
+        with create_repository_session_maker(self.database_url)() as session:
+            jobs.save_progress(
+                session,
+                task_id,
+                "worker",
+                ProgressEvent("Load player details", done, 450).to_dict(),
+            )
+
+    def test_relay_tasks_progress(self):
+        admin.start_loading()
+        with create_repository_session_maker(self.database_url)() as session:
+            task_id = jobs.claim_task(session, "worker").id
+        self._save_progress(task_id, 50)
+        sequence = (
+            progress_events.since()[-1].sequence if progress_events.since() else 0
+        )
+
+        relay = admin.TasksProgressRelay()
+        self.assertEqual(1, len(relay.refresh()))
+        self.assertEqual([], relay.refresh())  # Already relayed
+
+        events = progress_events.since(sequence)
+        self.assertEqual(
+            [("Load player details", 50, 450, task_id)],
+            [(event.stage, event.done, event.total, event.task_id) for event in events],
+        )
+
+    def test_relay_resumed_on_other_process(self):
+        admin.start_loading()
+        with create_repository_session_maker(self.database_url)() as session:
+            task_id = jobs.claim_task(session, "worker").id
+        self._save_progress(task_id, 50)
+
+        # The relays of two processes of the API
+        relay = admin.TasksProgressRelay(poll_s=0.01)
+        other_relay = admin.TasksProgressRelay(poll_s=0.01)
+        events = relay.wait({}, 5)
+        self.assertEqual(
+            [(task_id, 1, 50)], [(e.task_id, e.sequence, e.done) for e in events]
+        )
+        event_id = admin.progress_event_id({task_id: events[0].sequence})
+        self.assertEqual(f"{task_id}:1", event_id)
+
+        # The progress already received isn't sent again by the other process
+        positions = admin.parse_progress_event_id(event_id)
+        self.assertEqual([], other_relay.wait(positions, 0.1))
+        self._save_progress(task_id, 100)
+        self.assertEqual(
+            [(task_id, 2, 100)],
+            [(e.task_id, e.sequence, e.done) for e in other_relay.wait(positions, 5)],
+        )
+
+    def test_parse_progress_event_id(self):
+        self.assertEqual({12: 40, 13: 7}, admin.parse_progress_event_id("12:40,13:7"))
+        self.assertEqual({}, admin.parse_progress_event_id(None))
+        self.assertEqual({}, admin.parse_progress_event_id("42"))
+        positions = {task_id: 1 for task_id in range(20)}
+        self.assertEqual(
+            {task_id: 1 for task_id in range(10, 20)},
+            admin.parse_progress_event_id(admin.progress_event_id(positions)),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from hmtracker.services import check_user
+from hmtracker.services.check_user import HMSessionLimiter, VerifiedCredentialsCache
+
+
+class TestVerifiedCredentialsCache(unittest.TestCase):
+    def test_verified_credentials(self):
+        cache = VerifiedCredentialsCache()
+        cache.add("user@example.com", "password")
+
+        self.assertTrue(cache.contains("user@example.com", "password"))
+        self.assertFalse(cache.contains("user@example.com", "other password"))
+        self.assertFalse(cache.contains("other@example.com", "password"))
+
+    def test_expiration(self):
+        cache = VerifiedCredentialsCache(ttl_s=10)
+        with patch("time.monotonic", return_value=100):
+            cache.add("user@example.com", "password")
+        with patch("time.monotonic", return_value=105):
+            self.assertTrue(cache.contains("user@example.com", "password"))
+        with patch("time.monotonic", return_value=111):
+            self.assertFalse(cache.contains("user@example.com", "password"))
+
+    def test_eviction(self):
+        cache = VerifiedCredentialsCache(max_size=2)
+        cache.add("user1@example.com", "password")
+        cache.add("user2@example.com", "password")
+        cache.add("user1@example.com", "password")  # most recently verified
+        cache.add("user3@example.com", "password")
+
+        self.assertTrue(cache.contains("user1@example.com", "password"))
+        self.assertFalse(cache.contains("user2@example.com", "password"))
+        self.assertTrue(cache.contains("user3@example.com", "password"))
+
+
+class TestConnectToHM(unittest.TestCase):
+    def setUp(self):
+        check_user.verified_credentials.clear()
+
+    @patch("hmtracker.services.check_user.HMAjaxScrapper")
+    def test_skip_hm_when_verified(self, scrapper):
+        check_user.connect_to_hm("user@example.com", "password")
+        check_user.connect_to_hm("user@example.com", "password")
+
+        scrapper.return_value.connect_to_hm.assert_called_once()
+
+    @patch("hmtracker.services.check_user.HMAjaxScrapper")
+    def test_refused_credentials_not_cached(self, scrapper):
+        scrapper.return_value.connect_to_hm.side_effect = ConnectionError()
+
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                check_user.connect_to_hm("user@example.com", "wrong password")
+
+        self.assertEqual(2, scrapper.return_value.connect_to_hm.call_count)
+
+
+class TestConnectToHMAsync(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        check_user.verified_credentials.clear()
+
+    @patch("hmtracker.services.check_user.AsyncHMScrapper")
+    async def test_credentials_hashed_once(self, scrapper):
+        scrapper.return_value.connect_to_hm = AsyncMock()
+        scrapper.return_value.close_session = AsyncMock()
+
+        with patch.object(
+            check_user.verified_credentials,
+            "key",
+            wraps=check_user.verified_credentials.key,
+        ) as key:
+            await check_user.connect_to_hm_async("user@example.com", "password")
+            self.assertEqual(1, key.call_count)
+            await check_user.connect_to_hm_async("user@example.com", "password")
+
+        self.assertEqual(2, key.call_count)
+        scrapper.return_value.connect_to_hm.assert_awaited_once()
+
+
+class TestHMSessionLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_max_sessions(self):
+        limiter = HMSessionLimiter(max_sessions=2, timeout_s=5)
+        max_active = 0
+
+        async def use_session():
+            nonlocal max_active
+            async with limiter.session():
+                max_active = max(max_active, limiter.active)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(use_session() for _ in range(6)))
+
+        self.assertEqual(2, max_active)
+        self.assertEqual(0, limiter.active)
+        self.assertEqual(0, limiter.waiting)
+
+    async def test_timeout(self):
+        limiter = HMSessionLimiter(max_sessions=1, timeout_s=0.05)
+
+        async with limiter.session(timeout_s=5):
+            # Waiting for a session counts in the timeout
+            with self.assertRaises(TimeoutError):
+                async with limiter.session():
+                    pass
+            self.assertEqual(0, limiter.waiting)
+
+        with self.assertRaises(TimeoutError):
+            async with limiter.session():
+                await asyncio.sleep(1)
+        self.assertEqual(0, limiter.active)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from unittest.mock import patch
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from hmtracker.database import database, models
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.repository import create_repository_session_maker
+from hmtracker.services import jobs
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        self.addCleanup(database.dispose_engine, database_url)
+        initialize_database(database_url)
+        self.repository_session = create_repository_session_maker(database_url)()
+        self.addCleanup(self.repository_session.end_session)
+
+    def _expire_lease(self, task_id: int):
+        self.repository_session.session.execute(
+            update(models.Task)
+            .where(models.Task.id == task_id)
+            .values(lease_expires_at=datetime.now() - timedelta(seconds=1))
+        )
+        self.repository_session.session.commit()
+
+    def test_claim_in_order(self):
+        first = jobs.enqueue_task(
+            self.repository_session, "first", {"force": True}, resource="stats"
+        )
+        second = jobs.enqueue_task(self.repository_session, "second", resource="stats")
+
+        task = jobs.claim_task(self.repository_session, "worker 1")
+        self.assertEqual(first.id, task.id)
+        self.assertEqual(jobs.TASK_RUNNING, task.status)
+        self.assertEqual("worker 1", task.lease_owner)
+        self.assertEqual(1, task.attempts)
+        self.assertEqual({"force": True}, jobs.task_parameters(task))
+
+        # The tasks of a resource don't overlap
+        self.assertIsNone(jobs.claim_task(self.repository_session, "worker 2"))
+        self.assertEqual(
+            2, len(jobs.get_unfinished_tasks(self.repository_session, None))
+        )
+        jobs.finish_task(self.repository_session, first.id, "worker 1")
+        self.assertEqual(
+            second.id, jobs.claim_task(self.repository_session, "worker 2").id
+        )
+        self.assertIsNone(jobs.claim_task(self.repository_session, "worker 3"))
+
+    def test_job_queued_once(self):
+        jobs.enqueue_task(self.repository_session, "job")
+
+        with self.assertRaises(IntegrityError):
+            jobs.enqueue_task(self.repository_session, "job")
+
+        jobs.enqueue_task(self.repository_session, "other job")
+        self.assertEqual(
+            ["job", "other job"],
+            [task.name for task in jobs.get_unfinished_tasks(self.repository_session)],
+        )
+
+    def test_single_running_task(self):
+        # What a concurrent worker sees if another worker claimed a task in between
+        first = jobs.enqueue_task(self.repository_session, "first", resource="stats")
+        second = jobs.enqueue_task(self.repository_session, "second", resource="stats")
+        jobs.claim_task(self.repository_session, "worker 1")
+
+        with self.assertRaises(IntegrityError):
+            self.repository_session.session.execute(
+                update(models.Task)
+                .where(models.Task.id == second.id)
+                .values(status=jobs.TASK_RUNNING)
+            )
+        self.repository_session.session.rollback()
+
+        # Without the check of the running tasks, the claim is refused by the index
+        without_running_check = models.Task.status == jobs.TASK_QUEUED
+        with patch.object(jobs, "_claimable", return_value=without_running_check):
+            self.assertIsNone(jobs.claim_task(self.repository_session, "worker 2"))
+        self.assertEqual(
+            [jobs.TASK_RUNNING, jobs.TASK_QUEUED],
+            [
+                task.status
+                for task in jobs.get_unfinished_tasks(self.repository_session)
+            ],
+        )
+        self.assertEqual(
+            first.id, jobs.get_unfinished_tasks(self.repository_session)[0].id
+        )
+
+    def test_resources_run_at_same_time(self):
+        load = jobs.enqueue_task(self.repository_session, "load", resource="stats")
+        jobs.enqueue_task(self.repository_session, "incremental load", resource="stats")
+        alignment = jobs.enqueue_task(self.repository_session, "alignment")
+        self.assertEqual("alignment", alignment.resource)
+
+        self.assertEqual(
+            load.id, jobs.claim_task(self.repository_session, "worker 1").id
+        )
+        # The incremental load waits for the load, the alignment doesn't
+        self.assertEqual(
+            alignment.id, jobs.claim_task(self.repository_session, "worker 2").id
+        )
+        self.assertIsNone(jobs.claim_task(self.repository_session, "worker 3"))
+
+    def test_alive_workers(self):
+        self.assertEqual([], jobs.alive_workers(self.repository_session))
+        jobs.worker_heartbeat(self.repository_session, "worker 1")
+        jobs.worker_heartbeat(self.repository_session, "worker 2")
+        jobs.worker_heartbeat(self.repository_session, "worker 1")
+        self.assertEqual(
+            ["worker 1", "worker 2"],
+            sorted(jobs.alive_workers(self.repository_session)),
+        )
+
+        self.repository_session.session.execute(
+            update(models.Worker)
+            .where(models.Worker.id == "worker 2")
+            .values(heartbeat_at=datetime.now() - timedelta(hours=1))
+        )
+        self.repository_session.session.commit()
+        self.assertEqual(["worker 1"], jobs.alive_workers(self.repository_session))
+
+        jobs.remove_worker(self.repository_session, "worker 1")
+        self.assertEqual([], jobs.alive_workers(self.repository_session))
+
+    def test_finish(self):
+        task_id = jobs.enqueue_task(self.repository_session, "job").id
+        jobs.claim_task(self.repository_session, "worker 1")
+
+        # Only the owner of the lease records the end of the task
+        self.assertFalse(
+            jobs.finish_task(self.repository_session, task_id, "worker 2", "error")
+        )
+        self.assertTrue(jobs.heartbeat(self.repository_session, task_id, "worker 1"))
+        self.assertTrue(
+            jobs.finish_task(self.repository_session, task_id, "worker 1", "error")
+        )
+
+        task = self.repository_session.session.get(
+            models.Task, task_id, populate_existing=True
+        )
+        self.assertEqual(jobs.TASK_FAILED, task.status)
+        self.assertEqual("error", task.error)
+        self.assertIsNotNone(task.end_at)
+        self.assertIsNone(task.lease_owner)
+        self.assertFalse(jobs.heartbeat(self.repository_session, task_id, "worker 1"))
+        self.assertEqual([], jobs.get_unfinished_tasks(self.repository_session))
+
+    def test_expired_lease_claimed_again(self):
+        task_id = jobs.enqueue_task(self.repository_session, "job").id
+        jobs.claim_task(self.repository_session, "worker 1")
+        self.assertIsNone(jobs.claim_task(self.repository_session, "worker 2"))
+
+        self._expire_lease(task_id)
+        task = jobs.claim_task(self.repository_session, "worker 2")
+
+        self.assertEqual(task_id, task.id)
+        self.assertEqual("worker 2", task.lease_owner)
+        self.assertEqual(2, task.attempts)
+        self.assertFalse(jobs.heartbeat(self.repository_session, task_id, "worker 1"))
+        self.assertFalse(jobs.finish_task(self.repository_session, task_id, "worker 1"))
+
+    def test_abandoned_task_failed(self):
+        task_id = jobs.enqueue_task(self.repository_session, "job").id
+        for attempt in range(jobs.MAX_ATTEMPTS):
+            self.assertEqual(
+                task_id,
+                jobs.claim_task(self.repository_session, f"worker {attempt}").id,
+            )
+            self._expire_lease(task_id)
+
+        self.assertIsNone(jobs.claim_task(self.repository_session, "worker"))
+        task = self.repository_session.session.get(
+            models.Task, task_id, populate_existing=True
+        )
+        self.assertEqual(jobs.TASK_FAILED, task.status)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from hmtracker.common.progress import ProgressTracker
+from hmtracker.database import database, models
+from hmtracker.database.creation import initialize_database
+from hmtracker.database.repository import create_repository_session_maker
+from hmtracker.services import jobs
+from hmtracker.worker import Worker
+
+
+class TestWorker(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database_url = f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        self.addCleanup(database.dispose_engine, self.database_url)
+        initialize_database(self.database_url)
+        self.calls: list[dict] = []
+
+    def _enqueue(self, name: str, **parameters) -> int:
+        with create_repository_session_maker(self.database_url)() as session:
+            return jobs.enqueue_task(session, name, parameters).id
+
+    def _tasks(self):
+        with create_repository_session_maker(self.database_url)() as session:
+            return {task.id: (task.status, task.error) for task in session.get_tasks()}
+
+    def _fail(self):
+        raise RuntimeError("HM is down")
+
+    def test_run_tasks(self):
+        succeeded = self._enqueue("record", force=True)
+        failed = self._enqueue("fail")
+        unknown = self._enqueue("unknown")
+        worker = Worker(
+            self.database_url,
+            {
+                "record": lambda **parameters: self.calls.append(parameters),
+                "fail": self._fail,
+            },
+        )
+
+        while worker.run_next_task():
+            pass
+
+        self.assertEqual([{"force": True}], self.calls)
+        tasks = self._tasks()
+        self.assertEqual((jobs.TASK_SUCCEEDED, None), tasks[succeeded])
+        self.assertEqual((jobs.TASK_FAILED, "HM is down"), tasks[failed])
+        self.assertEqual(jobs.TASK_FAILED, tasks[unknown][0])
+        with create_repository_session_maker(self.database_url)() as session:
+            self.assertEqual([worker.worker_id], jobs.alive_workers(session))
+
+    def test_heartbeat(self):
+        task_id = self._enqueue("wait")
+        release = threading.Event()
+        heartbeats = []
+
+        def wait():
+            with create_repository_session_maker(self.database_url)() as session:
+                heartbeats.append(session.get_tasks()[0].heartbeat_at)
+            release.wait(5)
+            with create_repository_session_maker(self.database_url)() as session:
+                heartbeats.append(session.get_tasks()[0].heartbeat_at)
+
+        worker = Worker(self.database_url, {"wait": wait}, lease_s=0.15)
+        thread = threading.Thread(target=worker.run_next_task)
+        thread.start()
+        # Three lease periods, the task would have been claimable without heartbeats
+        threading.Event().wait(0.45)
+        with create_repository_session_maker(self.database_url)() as session:
+            self.assertIsNone(jobs.claim_task(session, "other worker", 0.15))
+        release.set()
+        thread.join()
+
+        self.assertLess(heartbeats[0], heartbeats[1])
+        self.assertEqual(jobs.TASK_SUCCEEDED, self._tasks()[task_id][0])
+
+    def test_progress_saved(self):
+        task_id = self._enqueue("progress")
+
+        def report_progress():
+            progress = ProgressTracker("Stage", total=4, min_interval_s=0)
+            progress.advance(3)
+
+        Worker(self.database_url, {"progress": report_progress}).run_next_task()
+
+        with create_repository_session_maker(self.database_url)() as session:
+            task = session.session.get(models.Task, task_id)
+            progress = jobs.task_progress(task)
+        self.assertEqual(
+            ("Stage", 3, 4), (progress["stage"], progress["done"], progress["total"])
+        )
+
+    def test_stop(self):
+        worker = Worker(self.database_url, {}, poll_interval_s=10)
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+
+        worker.stop()
+        thread.join(2)
+
+        self.assertFalse(thread.is_alive())
+        with create_repository_session_maker(self.database_url)() as session:
+            self.assertEqual([], jobs.alive_workers(session))
+
+
+if __name__ == "__main__":
+    unittest.main()